@@ -0,0 +1,64 @@
+import os
+import time
+from typing import Callable
+
+import numpy as np
+
+from data import STORE_PATH, CSV_PATH
+from data.room_store import RoomStore, load_store
+from services.recommendation.filter_index import NEIGHBOURHOOD_GROUPS, ROOM_TYPES
+
+# Number of dummies of each one-hot encoded feature of the final csv
+FEATURE_SIZES: list[int] = [5, 4, 221, 21, 17, 12]
+
+
+def synthetic_store(n_rooms: int = 20457, seed: int = 0) -> RoomStore:
+    """ Build a store shaped like the New York catalog, for hosts without the dataset
+    :param n_rooms: the number of rooms
+    :param seed: the random seed
+    :return: the room store
+    """
+    rng = np.random.default_rng(seed)
+    rating = rng.uniform(3, 5, n_rooms)
+    features = np.zeros((n_rooms, sum(FEATURE_SIZES)), dtype=np.float32)
+    offset = 0
+    for size in FEATURE_SIZES:
+        features[np.arange(n_rooms), offset + rng.integers(0, size, n_rooms)] = rating / 5
+        offset += size
+    return RoomStore(
+        columns={
+            'id': rng.choice(np.arange(1000, 60000000), n_rooms, replace=False),
+            'price': rng.integers(10, 1000, n_rooms),
+            'minimum_nights': rng.integers(1, 60, n_rooms),
+            'rating': rating,
+        },
+        strings={},
+        features=features,
+        feature_columns=NEIGHBOURHOOD_GROUPS + ROOM_TYPES + [
+            f'feature_{index}' for index in range(features.shape[1] - len(NEIGHBOURHOOD_GROUPS + ROOM_TYPES))
+        ]
+    )
+
+
+def load_benchmark_store() -> RoomStore:
+    """ Load the real catalog when it is available, a synthetic one otherwise
+    :return: the room store
+    """
+    if os.path.exists(os.path.join(STORE_PATH, 'meta.json')) or os.path.exists(CSV_PATH):
+        return load_store(STORE_PATH, CSV_PATH)
+    print('Dataset not found, using a synthetic catalog')
+    return synthetic_store()
+
+
+def timeit(function: Callable, repeat: int = 20) -> float:
+    """ Time a function
+    :param function: the function to time
+    :param repeat: the number of calls
+    :return: the best duration of a call, in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+
+from benchmarks import load_benchmark_store
+from data.room_catalog import RoomCatalog
+from services.recommendation.batch import BatchRecommender
+from services.recommendation.filter_index import FilterIndex
+from services.recommendation.scoring import ScoringEngine
+
+N_USERS: int = 10000
+
+if __name__ == '__main__':
+    store = load_benchmark_store()
+    catalog = RoomCatalog(store)
+    engine = ScoringEngine(store.ids, store.features)
+    filter_index = FilterIndex(store.ids, store.columns['price'], store.columns['minimum_nights'],
+                               store.columns['rating'], engine.matrix, store.feature_columns,
+                               id_positions=catalog.id_positions)
+    rng = np.random.default_rng(0)
+    room_ids = store.ids.tolist()
+    users = [
+        {
+            'max_price': [None, 100, 150, 300][index % 4],
+            'rating': [None, 4][index % 2],
+            'ratings': {room_ids[position]: int(rng.integers(1, 6)) for position in rng.choice(len(room_ids), 5)}
+        }
+        for index in range(N_USERS)
+    ]
+    user_vectors = np.stack([engine.dense_rows(rng.choice(len(room_ids), 5)).mean(axis=0) for _ in range(N_USERS)])
+
+    start = time.perf_counter()
+    for block in range(0, N_USERS, 512):
+        user_vectors[block:block + 512] @ engine.matrix.T
+    gemm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    BatchRecommender(engine, filter_index, catalog).recommend(users, n=5)
+    batch = time.perf_counter() - start
+    print(f'{N_USERS} users, {len(store)} rooms')
+    print(f'GEMM of all users against all rooms: {gemm:.2f}s')
+    print(f'Batch recommendation: {batch:.2f}s ({batch / gemm:.1f}x the GEMM)')
@@ -0,0 +1,20 @@
+import tempfile
+import time
+
+from services.nlp import Chatbot
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        chatbot = Chatbot()
+        start = time.perf_counter()
+        chatbot.load_or_train(directory)
+        trained = time.perf_counter() - start
+
+        chatbot = Chatbot()
+        start = time.perf_counter()
+        loaded = chatbot.load_or_train(directory)
+        cached = time.perf_counter() - start
+
+    assert loaded
+    print(f'training at startup: {trained:.2f}s')
+    print(f'loading the cached model: {cached:.2f}s ({trained / cached:.0f}x faster)')
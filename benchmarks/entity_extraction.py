@@ -0,0 +1,68 @@
+import json
+import random
+import re
+
+from benchmarks import timeit
+from services.nlp.chatbot import INTENTS_PATH
+from services.nlp.entities import EntityExtractor
+
+TEMPLATES: list[str] = [
+    "I want a {room_type} room in {neighbourhood} cheaper than {price}€",
+    "Find me a room near {neighbourhood} between {low} and {price} for {nights} nights",
+    "Can you recommend a {room_type} room with {stars} stars under {price}",
+    "my max price is {price} and I'd like to stay {nights} nights close to {neighbourhood}",
+    "Something more expensive than {low}, rating {stars} or more",
+    "a room around {price}€ next to {neighbourhood} please",
+    "I have a budget of {price} for a {room_type} room",
+    "Show me another room",
+    "anything in {neighbourhood}?",
+]
+NEIGHBOURHOODS: list[str] = ['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten']
+ROOM_TYPES: list[str] = ['private', 'shared', 'hotel', 'home', 'cozy']
+
+
+def room_queries(n: int = 1000, seed: int = 0) -> list[str]:
+    """ Generate room queries like the ones the bot receives
+    :param n: the number of queries
+    :param seed: the random seed
+    :return: the queries
+    """
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            room_type=rng.choice(ROOM_TYPES), neighbourhood=rng.choice(NEIGHBOURHOODS), price=rng.randint(50, 500),
+            low=rng.randint(10, 50), nights=rng.randint(1, 14), stars=rng.randint(1, 5)
+        )
+        for _ in range(n)
+    ]
+
+
+def search_entities(message: str, entities_to_find: dict) -> dict:
+    """ Extract the entities like Chatbot._get_entities did, with a re.search per pattern
+    :param message: the message
+    :param entities_to_find: the patterns of each entity
+    :return: the entities
+    """
+    entities = {}
+    for entity, regexes in entities_to_find.items():
+        for regex in regexes:
+            regex_match = re.search(r"{}".format(regex), message, re.IGNORECASE)
+            if regex_match:
+                entities[entity] = regex_match.group(entity)
+                break
+    return entities
+
+
+if __name__ == '__main__':
+    with open(INTENTS_PATH) as intents_file:
+        room = next(intent for intent in json.load(intents_file)['intents'] if intent['tag'] == 'room')
+    queries = room_queries()
+    extractor = EntityExtractor(room['entities'])
+    assert [extractor.extract(query) for query in queries] == [search_entities(query, room['entities'])
+                                                              for query in queries]
+
+    searched = timeit(lambda: [search_entities(query, room['entities']) for query in queries], repeat=10)
+    compiled = timeit(lambda: [extractor.extract(query) for query in queries], repeat=10)
+    print(f'{len(queries)} room queries, identical entities')
+    print(f're.search per pattern: {searched / len(queries) * 1e6:.1f}us per message')
+    print(f'EntityExtractor: {compiled / len(queries) * 1e6:.1f}us per message ({searched / compiled:.1f}x faster)')
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks import synthetic_store
+from services.recommendation.scoring import ScoringEngine
+from services.utils.offload import Busy, Offloader
+
+N_REQUESTS: int = 200
+TICK: float = 0.001
+
+store = synthetic_store()
+engine = ScoringEngine(store.ids, store.features)
+user_vectors = engine.dense_rows(np.random.default_rng(0).choice(len(engine), (N_REQUESTS, 5))).mean(axis=1)
+
+
+def recommendation(index: int) -> list:
+    """ A recommendation over the whole catalog, the blocking work of a request
+    :param index: the user
+    :return: the recommended rooms
+    """
+    return engine.top_n(user_vectors[index], n=5)
+
+
+async def measure(handle) -> tuple:
+    """ Handle concurrent requests while measuring how late a 1ms ticker wakes up
+    :param handle: coroutine function handling a request
+    :return: the p50 and p99 lags in ms, and the duration in s
+    """
+    lags, done = [], asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    for batch in range(0, N_REQUESTS, 20):
+        await asyncio.gather(*(handle(index) for index in range(batch, batch + 20)))
+    duration = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return np.percentile(lags, 50) * 1e3, np.percentile(lags, 99) * 1e3, duration
+
+
+async def inline(index: int) -> None:
+    recommendation(index)
+    await asyncio.sleep(0)
+
+
+offloader = Offloader(kind='thread', max_workers=4, max_pending=16)
+
+
+async def offloaded(index: int) -> None:
+    try:
+        await offloader.run(recommendation, index)
+    except Busy:
+        pass
+
+
+if __name__ == '__main__':
+    for name, handle in (('on the event loop', inline), ('offloaded to threads', offloaded)):
+        p50, p99, duration = asyncio.run(measure(handle))
+        print(f'{name}: loop lag p50 {p50:.2f}ms, p99 {p99:.2f}ms, {N_REQUESTS} requests in {duration:.2f}s')
+    print(f'offloader: {offloader.metrics}')
+    offloader.shutdown()
@@ -0,0 +1,73 @@
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+from bs4 import FeatureNotFound
+
+from benchmarks import timeit
+from services.scraping.scrape import BACKENDS
+
+
+def room_page(seed: int = 0, n_sections: int = 400, n_images: int = 30) -> str:
+    """ Build a page shaped like an Airbnb room page: deep nested markup, large inline scripts, a few dozen images
+    :param seed: the random seed
+    :param n_sections: the number of sections of the page
+    :param n_images: the number of images
+    :return: the html of the page, about 140 kB with the defaults
+    """
+    rng = np.random.default_rng(seed)
+    state = json.dumps({'listing': {'id': seed, 'amenities': [f'amenity {i}' for i in range(2000)]}})
+    image_sections = set(rng.choice(n_sections, n_images, replace=False).tolist())
+    sections = []
+    for section in range(n_sections):
+        image = (f'<picture><img class="_6tbg2q" alt="Photo {section}" '
+                 f'src="https://a0.muscache.com/im/pictures/{seed}-{section}.jpg?im_w=720"></picture>'
+                 if section in image_sections else '')
+        sections.append(
+            f'<div class="_1e541ba5" data-section-id="{section}"><div class="_uy08umt"><span class="_1n81at5">'
+            f'<button type="button" class="_ejra3kg">Show more &gt;</button></span>{image}'
+            f'<p class="_1y6fhhr">Description {section} of the room, close to the subway &amp; the park.</p>'
+            f'</div></div>'
+        )
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Room - Airbnb</title>'
+        f'<script id="data-state" type="application/json">{state}</script></head><body><div id="site-content">'
+        f'<h1 class="_fecoyn4">Room {seed} near the park</h1>'
+        f'<span class="_12si43g">{rng.uniform(3, 5):.2f} ·</span>' + ''.join(sections) + '</div></body></html>'
+    )
+
+
+if __name__ == '__main__':
+    # python -m benchmarks.html_extraction [directory of saved room pages]
+    if len(sys.argv) >= 2:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(sys.argv[1], '*.html'))):
+            with open(path, encoding='utf-8') as file:
+                pages.append(file.read())
+    else:
+        pages = [room_page(seed) for seed in range(20)]
+    print(f'{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1000:.0f} kB per page')
+
+    def extract(backend: str) -> list:
+        results = []
+        for page in pages:
+            try:
+                results.append(BACKENDS[backend](page))
+            except FeatureNotFound:
+                raise
+            except Exception:
+                # get_data gives the same empty data whichever exception is raised
+                results.append(None)
+        return results
+
+    reference = extract('html.parser')
+    for backend in BACKENDS:
+        try:
+            identical = extract(backend) == reference
+        except FeatureNotFound:
+            print(f'{backend}: not installed')
+            continue
+        duration = timeit(lambda: extract(backend), repeat=3)
+        print(f'{backend}: {len(pages) / duration:.1f} pages/s, identical output: {identical}')
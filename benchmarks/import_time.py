@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+MODULES: list[str] = ['services.nlp', 'nltk', 'tensorflow']
+
+if __name__ == '__main__':
+    # A fresh interpreter, as the modules imported by this one would be cached
+    script = (
+        'import sys, time\n'
+        'start = time.perf_counter()\n'
+        'import services.nlp\n'
+        'print(time.perf_counter() - start)\n'
+        f'print(" ".join(module for module in {MODULES[1:]} if module in sys.modules))\n'
+    )
+    duration, imported = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                        check=True).stdout.splitlines()
+    print(f'import services.nlp: {float(duration):.2f}s')
+    print(f'heavy modules imported: {imported or "none"}')
@@ -0,0 +1,25 @@
+import importlib.util
+import resource
+
+import numpy as np
+
+from benchmarks import timeit
+from services.nlp import Chatbot
+
+if __name__ == '__main__':
+    chatbot = Chatbot()
+    chatbot.load_or_train()
+    bag = np.array([chatbot._bag_of_words('Can you recommend me a room in Manhattan?')])
+
+    numpy_latency = timeit(lambda: chatbot.model.predict(bag), repeat=200)
+    print(f'NumPy forward pass: {numpy_latency * 1e6:.0f}us per message')
+    print(f'max RSS without tensorflow: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB')
+
+    if importlib.util.find_spec('tensorflow'):
+        from tensorflow.keras.models import load_model
+
+        keras_model = load_model(f'models/{chatbot.model_name}-{chatbot.artifact_hash()}.h5')
+        keras_latency = timeit(lambda: keras_model.predict(bag), repeat=200)
+        print(f'Keras predict: {keras_latency * 1e6:.0f}us per message ({keras_latency / numpy_latency:.0f}x slower)')
+        print(f'max RSS with tensorflow: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB')
+        np.testing.assert_allclose(chatbot.model.predict(bag), keras_model.predict(bag), rtol=1e-5, atol=1e-6)
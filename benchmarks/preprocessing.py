@@ -0,0 +1,24 @@
+import numpy as np
+
+from benchmarks import timeit
+from benchmarks.entity_extraction import room_queries
+from services.nlp import Chatbot
+
+if __name__ == '__main__':
+    queries = room_queries(200)
+    chatbot = Chatbot()
+    chatbot.load_or_train()
+    uncached = Chatbot(lemma_cache_size=0, message_cache_size=0)
+
+    cold = timeit(lambda: [uncached._clean_up_sentence(query) for query in queries], repeat=3)
+    warm_lemmas = Chatbot(message_cache_size=0)
+    lemmas = timeit(lambda: [warm_lemmas._clean_up_sentence(query) for query in queries], repeat=3)
+    messages = timeit(lambda: [chatbot._clean_up_sentence(query) for query in queries], repeat=3)
+    bags = chatbot.featurizer.transform_batch([chatbot._clean_up_sentence(query) for query in queries])
+    inference = timeit(lambda: [chatbot.model.predict(bag[np.newaxis]) for bag in bags], repeat=3)
+
+    print(f'per message, {len(queries)} room queries:')
+    print(f'tokenize and lemmatize: {cold / len(queries) * 1e6:.0f}us')
+    print(f'with the lemma cache: {lemmas / len(queries) * 1e6:.0f}us, {warm_lemmas.cache_stats["lemmas"]}')
+    print(f'with the message cache: {messages / len(queries) * 1e6:.0f}us, {chatbot.cache_stats["messages"]}')
+    print(f'forward pass: {inference / len(queries) * 1e6:.0f}us')
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from services.profiles import SQLiteProfileStore
+
+N_THREADS: int = 8
+N_RATINGS: int = 20000
+N_USERS: int = 1000
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'profiles.db')
+        store = SQLiteProfileStore(path)
+        latencies = [[] for _ in range(N_THREADS)]
+
+        def rate(thread: int) -> None:
+            rng = np.random.default_rng(thread)
+            for _ in range(N_RATINGS // N_THREADS):
+                user_id = int(rng.integers(N_USERS))
+                start = time.perf_counter()
+                with store.lock(user_id):
+                    store.rate(user_id, int(rng.integers(1, 10 ** 7)), int(rng.integers(6)))
+                latencies[thread].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=rate, args=(thread,)) for thread in range(N_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        accepted = time.perf_counter() - start
+        store.close()
+        persisted = time.perf_counter() - start
+
+        with sqlite3.connect(path) as connection:
+            n_rows = connection.execute('SELECT COUNT(*) FROM ratings').fetchone()[0]
+        latencies = np.concatenate(latencies) * 1e6
+        print(f'{N_RATINGS} ratings from {N_THREADS} threads, {n_rows} distinct ratings persisted')
+        print(f'accepted at {N_RATINGS / accepted:.0f} ratings/s, rate() p50 {np.percentile(latencies, 50):.0f}us, '
+              f'p99 {np.percentile(latencies, 99):.0f}us')
+        print(f'persisted at {N_RATINGS / persisted:.0f} ratings/s')
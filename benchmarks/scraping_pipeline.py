@@ -0,0 +1,41 @@
+import asyncio
+import os
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from benchmarks.html_extraction import room_page
+from services.scraping.crawler import Crawler
+from services.scraping.pipeline import ScrapingPipeline
+
+
+async def scrape(pages: list[str], workers: int, backend: str) -> dict:
+    """ Scrape pages served by a local server
+    :param pages: the html of the pages, served at /rooms/{index}
+    :param workers: the number of parsing processes, 0 to parse in the event loop
+    :param backend: the extraction backend
+    :return: the metrics of the pipeline
+    """
+    async def room(request: web.Request) -> web.Response:
+        return web.Response(text=pages[int(request.match_info['room_id'])], content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/rooms/{room_id}', room)
+    async with TestServer(app) as server:
+        crawler = Crawler(url_template=f'http://{server.host}:{server.port}/rooms/{{room_id}}', rate=None,
+                          backend=backend)
+        pipeline = ScrapingPipeline(crawler, workers=workers, chunk_size=8)
+        async for _ in pipeline.run(range(len(pages))):
+            pass
+        return pipeline.metrics
+
+
+if __name__ == '__main__':
+    room_pages = [room_page(seed) for seed in range(16)] * 8
+    print(f'{len(room_pages)} pages, {os.cpu_count()} cores')
+    for extraction_backend in ('html.parser', 'stream'):
+        for n_workers in sorted({0, 1, 2, os.cpu_count() or 1}):
+            metrics = asyncio.run(scrape(room_pages, n_workers, extraction_backend))
+            print(f'{extraction_backend}, {n_workers} workers: {metrics["pages_per_second"]:.1f} pages/s, '
+                  f'fetch {metrics["fetch"]["seconds"]:.2f}s (blocked {metrics["fetch"]["blocked"]:.2f}s), '
+                  f'parse {metrics["parse"]["seconds"]:.2f}s of cpu (blocked {metrics["parse"]["blocked"]:.2f}s)')
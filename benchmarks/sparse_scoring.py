@@ -0,0 +1,22 @@
+import numpy as np
+
+from benchmarks import load_benchmark_store, timeit
+from services.recommendation.scoring import ScoringEngine, SparseScoringEngine
+
+if __name__ == '__main__':
+    store = load_benchmark_store()
+    features = np.asarray(store.features)
+    dense, sparse = ScoringEngine(store.ids, features), SparseScoringEngine(store.ids, features)
+    user_vector = features[np.random.default_rng(0).choice(len(features), 5)].mean(axis=0)
+    candidates = np.flatnonzero(np.asarray(store.columns['price']) < 150)
+
+    print(f'{len(store)} rooms, {store.features.shape[1]} features, {len(sparse.data)} non-zero values')
+    print(f"{'backend':<8}{'memory':>12}{'top 1':>12}{'top 1 of candidates':>22}")
+    for name, engine in (('dense', dense), ('sparse', sparse)):
+        print(f'{name:<8}{engine.nbytes / 2 ** 20:>10.2f}MB'
+              f'{timeit(lambda: engine.top_n(user_vector, n=1)) * 1000:>10.3f}ms'
+              f'{timeit(lambda: engine.top_n(user_vector, rows=candidates, n=1)) * 1000:>20.3f}ms')
+
+    dense_ids = [room_id for room_id, _ in dense.top_n(user_vector, n=10)]
+    sparse_ids = [room_id for room_id, _ in sparse.top_n(user_vector, n=10)]
+    print(f'Same top 10: {dense_ids == sparse_ids}')
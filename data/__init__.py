@@ -1,3 +1,39 @@
 import pandas as pd
 
-df: pd.DataFrame = pd.read_csv('./data/New_York_Airbnb_4_dec_2021_final.csv')
+from data.room_catalog import RoomCatalog
+from data.room_store import RoomStore, load_store
+
+CSV_PATH: str = './data/New_York_Airbnb_4_dec_2021_final.csv'
+# Built from CSV_PATH with `python -m data.build_store`, the csv is only read when it is missing
+STORE_PATH: str = './data/New_York_Airbnb_4_dec_2021_final'
+
+_loaded: dict = {}
+_loaders: dict = {
+    'store': lambda: load_store(STORE_PATH, CSV_PATH),
+    'catalog': lambda: RoomCatalog(__getattr__('store')),
+    'df': lambda: __getattr__('store').to_frame(),
+}
+
+
+def __getattr__(name: str):
+    """ Load the room profiles on first access of data.store, data.catalog or data.df
+    :param name: the attribute
+    :return: the room store, the room catalog or the room profiles dataframe
+    """
+    if name not in _loaders:
+        raise AttributeError(f"module 'data' has no attribute '{name}'")
+    if name not in _loaded:
+        _loaded[name] = _loaders[name]()
+    return _loaded[name]
+
+
+def reload() -> None:
+    """ Forget the loaded room profiles, they are loaded again on next access
+    :return: None
+    """
+    _loaded.clear()
+
+
+store: RoomStore
+catalog: RoomCatalog
+df: pd.DataFrame
@@ -0,0 +1,10 @@
+import sys
+
+from data import CSV_PATH, STORE_PATH
+from data.room_store import build_store
+
+if __name__ == '__main__':
+    # python -m data.build_store [csv_path store_path]
+    csv_path, store_path = sys.argv[1:3] if len(sys.argv) >= 3 else (CSV_PATH, STORE_PATH)
+    store = build_store(csv_path, store_path)
+    print(f'{len(store)} rooms and {len(store.feature_columns)} features written to {store_path}')
@@ -0,0 +1,63 @@
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from data.room_store import METADATA_COLUMNS, RoomStore
+
+
+class RoomCatalog:
+    def __init__(self, store: RoomStore) -> None:
+        """ Room lookups by id, shared by the bot and the recommender.
+        :param store: the room store
+        """
+        self.store: RoomStore = store
+        self.id_positions: dict[int, int] = {room_id: index for index, room_id in enumerate(store.ids.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __contains__(self, room_id: int) -> bool:
+        return room_id in self.id_positions
+
+    def position(self, room_id: int) -> Optional[int]:
+        """ Get the row of a room
+        :param room_id: int
+        :return: the row, None if the room is unknown
+        """
+        return self.id_positions.get(room_id)
+
+    def positions(self, room_ids: Iterable[int]) -> np.ndarray:
+        """ Get the rows of some rooms, skipping unknown ones
+        :param room_ids: the room ids
+        :return: the rows, in the order of room_ids
+        """
+        return np.array([self.id_positions[room_id] for room_id in room_ids if room_id in self.id_positions],
+                        dtype=np.intp)
+
+    def get_rows(self, room_ids: Iterable[int], with_features: bool = False) -> pd.DataFrame:
+        """ Get the metadata of some rooms, skipping unknown ones
+        :param room_ids: the room ids
+        :param with_features: whether to add the room vectors after the metadata, like in the final csv
+        :return: one row per known room, in the order of room_ids
+        """
+        positions = self.positions(room_ids)
+        rows = pd.DataFrame({
+            column: self.store.columns[column][positions] if column in self.store.columns
+            else [self.store.strings[column][position] for position in positions]
+            for column in METADATA_COLUMNS
+        })
+        if with_features:
+            rows = pd.concat([rows, pd.DataFrame(self.store.features[positions], columns=self.store.feature_columns)],
+                             axis=1)
+        return rows
+
+    def get_vector(self, room_id: int) -> Optional[np.ndarray]:
+        """ Get the vector of a room
+        :param room_id: int
+        :return: the room vector, None if the room is unknown
+        """
+        position = self.id_positions.get(room_id)
+        if position is None:
+            return None
+        return self.store.features[position]
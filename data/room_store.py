@@ -0,0 +1,160 @@
+import json
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION: int = 1
+METADATA_COLUMNS: list[str] = ['id', 'name', 'price', 'minimum_nights', 'rating', 'images']
+NUMERICAL_COLUMNS: list[str] = ['id', 'price', 'minimum_nights', 'rating']
+STRING_COLUMNS: list[str] = ['name', 'images']
+
+
+class StringColumn:
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, missing: np.ndarray) -> None:
+        """ Column of strings stored as one utf-8 buffer, so that it can be memory-mapped.
+        :param blob: the utf-8 bytes of every string, one after the other
+        :param offsets: the start of each string in blob, followed by the end of the last one
+        :param missing: whether each value is missing
+        """
+        self.blob: np.ndarray = blob
+        self.offsets: np.ndarray = offsets
+        self.missing: np.ndarray = missing
+
+    @classmethod
+    def from_values(cls, values: Iterable) -> 'StringColumn':
+        """ Encode a column of strings.
+        :param values: the strings, None or NaN for missing values
+        :return: the string column
+        """
+        values = list(values)
+        missing = np.array([not isinstance(value, str) for value in values], dtype=bool)
+        encoded = [value.encode('utf-8') if isinstance(value, str) else b'' for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets, missing)
+
+    def __len__(self) -> int:
+        return len(self.missing)
+
+    def __getitem__(self, position: int) -> Optional[str]:
+        if self.missing[position]:
+            return None
+        return self.blob[self.offsets[position]:self.offsets[position + 1]].tobytes().decode('utf-8')
+
+    def tolist(self) -> list[Optional[str]]:
+        return [self[position] for position in range(len(self))]
+
+
+class RoomStore:
+    def __init__(self, columns: dict[str, np.ndarray], strings: dict[str, StringColumn], features: np.ndarray,
+                 feature_columns: list[str]) -> None:
+        """ Columnar room profiles: metadata columns and the float32 room vectors.
+        :param columns: the numerical metadata columns
+        :param strings: the string metadata columns
+        :param features: the room vectors
+        :param feature_columns: the name of each feature
+        """
+        self.columns: dict[str, np.ndarray] = columns
+        self.strings: dict[str, StringColumn] = strings
+        self.features: np.ndarray = features
+        self.feature_columns: list[str] = feature_columns
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.columns['id']
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'RoomStore':
+        """ Convert the final room profiles dataframe.
+        :param frame: the room profiles, with the metadata columns first and the room vectors after
+        :return: the room store
+        """
+        if list(frame.columns[:len(METADATA_COLUMNS)]) != METADATA_COLUMNS:
+            raise ValueError(f'The first columns must be {METADATA_COLUMNS}')
+        feature_columns = list(frame.columns[len(METADATA_COLUMNS):])
+        return cls(
+            columns={column: frame[column].to_numpy() for column in NUMERICAL_COLUMNS},
+            strings={column: StringColumn.from_values(frame[column]) for column in STRING_COLUMNS},
+            features=np.ascontiguousarray(frame[feature_columns].to_numpy(dtype=np.float32)),
+            feature_columns=feature_columns
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """ Build the room profiles dataframe, with the same columns as the final csv.
+        :return: the room profiles
+        """
+        metadata = pd.DataFrame({
+            column: self.columns[column] if column in self.columns else self.strings[column].tolist()
+            for column in METADATA_COLUMNS
+        })
+        features = pd.DataFrame(self.features, columns=self.feature_columns)
+        return pd.concat([metadata, features], axis=1)
+
+    def save(self, directory: str) -> None:
+        """ Write the store as one .npy file per array.
+        :param directory: the directory of the store
+        :return: None
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'features.npy'), self.features)
+        for column, values in self.columns.items():
+            np.save(os.path.join(directory, f'{column}.npy'), values)
+        for column, values in self.strings.items():
+            np.save(os.path.join(directory, f'{column}.npy'), values.blob)
+            np.save(os.path.join(directory, f'{column}_offsets.npy'), values.offsets)
+            np.save(os.path.join(directory, f'{column}_missing.npy'), values.missing)
+        with open(os.path.join(directory, 'meta.json'), 'w') as meta_file:
+            json.dump({'version': STORE_VERSION, 'feature_columns': self.feature_columns}, meta_file)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'RoomStore':
+        """ Load a store written by save, memory-mapping its arrays.
+        :param directory: the directory of the store
+        :param mmap_mode: the numpy memory-map mode, None to read the arrays in memory
+        :return: the room store
+        """
+        with open(os.path.join(directory, 'meta.json')) as meta_file:
+            meta: dict = json.load(meta_file)
+        if meta['version'] != STORE_VERSION:
+            raise ValueError(f"Room store version {meta['version']} is not supported, rebuild it")
+
+        def load_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+
+        return cls(
+            columns={column: load_array(column) for column in NUMERICAL_COLUMNS},
+            strings={
+                column: StringColumn(load_array(column), load_array(f'{column}_offsets'),
+                                     load_array(f'{column}_missing'))
+                for column in STRING_COLUMNS
+            },
+            features=load_array('features'),
+            feature_columns=meta['feature_columns']
+        )
+
+
+def load_store(store_path: str, csv_path: str) -> RoomStore:
+    """ Load the room store, falling back on the csv when it has not been built.
+    :param store_path: the directory of the binary store
+    :param csv_path: the final room profiles csv
+    :return: the room store
+    """
+    if os.path.exists(os.path.join(store_path, 'meta.json')):
+        return RoomStore.load(store_path)
+    return RoomStore.from_frame(pd.read_csv(csv_path))
+
+
+def build_store(csv_path: str, store_path: str) -> RoomStore:
+    """ Convert the final room profiles csv into a binary store.
+    :param csv_path: the final room profiles csv
+    :param store_path: the directory of the binary store
+    :return: the room store
+    """
+    store = RoomStore.from_frame(pd.read_csv(csv_path))
+    store.save(store_path)
+    return store
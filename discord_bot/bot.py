@@ -1,5 +1,10 @@
 # 3rd party imports
 import asyncio
+import atexit
+import concurrent.futures
+import importlib
+import os
+import time
 # Built-in imports
 from datetime import datetime
 from typing import Optional
@@ -9,16 +14,47 @@ import pandas as pd
 from discord.ext.commands import Bot
 
 # Local imports
-from data import df
-from services.nlp import Chatbot
+import data
+from services.nlp import BatcherClosed, Chatbot, PredictionBatcher
+from services.profiles import MemoryProfileStore, ProfileStore, SQLiteProfileStore
 from services.recommendation.get_recommendation import recommend_room
+from services.recommendation.user_vector import UserVector
 from services.scraping import get_url, get_id_from_url
-from services.utils import emoji_to_number, number_emojis
+from services.utils import LRUCache, MessageRooms, emoji_to_number, number_emojis
+from services.utils.offload import Busy, Offloader
 
 bot: Bot = Bot(command_prefix='')
 
-users_profiles: dict = {}
-messages_sent: dict = {}
+# With PROFILE_STORE=sqlite the profiles are saved in PROFILE_DB_PATH, otherwise they are lost when the bot stops
+profile_store: ProfileStore = SQLiteProfileStore(
+    os.getenv('PROFILE_DB_PATH', 'profiles.db')
+) if os.getenv('PROFILE_STORE', 'memory') == 'sqlite' else MemoryProfileStore()
+atexit.register(profile_store.close)
+# User vectors kept up to date when the users rate a room, so that they are not rebuilt from the ratings
+user_vectors: LRUCache = LRUCache(maxsize=int(os.getenv('PROFILE_CACHE_SIZE', '10000')))
+# Room id of the most recent room messages sent, so that rating them does not fetch the message
+messages_sent: MessageRooms = MessageRooms(maxsize=int(os.getenv('MESSAGE_CACHE_SIZE', '10000')))
+
+BUSY_RESPONSE: dict = {
+    'title': 'I am busy right now, try again in a moment ⏳',
+    'description': ''
+}
+# The intent methods run in these threads, off the event loop, and are rejected when too many are pending
+handler_offloader: Offloader = Offloader(
+    kind='thread',
+    max_workers=int(os.getenv('HANDLER_WORKERS', '4')),
+    max_pending=int(os.getenv('HANDLER_MAX_PENDING', '64')),
+    timeout=float(os.getenv('HANDLER_TIMEOUT', '10'))
+)
+# With RECOMMENDATION_EXECUTOR=process, the recommendations run in worker processes that load the catalog at start
+recommendation_offloader: Optional[Offloader] = Offloader(
+    kind='process',
+    max_workers=int(os.getenv('RECOMMENDATION_WORKERS', '2')),
+    max_pending=int(os.getenv('HANDLER_MAX_PENDING', '64')),
+    timeout=float(os.getenv('HANDLER_TIMEOUT', '10')),
+    initializer=importlib.import_module,
+    initargs=('services.recommendation.get_recommendation',)
+) if os.getenv('RECOMMENDATION_EXECUTOR', 'thread') == 'process' else None
 
 
 def get_messages_for_help() -> str:
@@ -58,17 +94,19 @@ def save_user_profile(user_id: int, data: dict) -> None:
     :param data: dict
     :return: None
     """
-    if user_id not in users_profiles:
-        users_profiles[user_id] = data
-    for key, value in data.items():
-        if value is not None:
-            users_profiles[user_id][key] = value
-    if (data.get('max_price') or data.get('price')) and data['min_price'] is None:
-        users_profiles[user_id]['min_price'] = None
-    if (data.get('min_price') or data.get('price')) and data['max_price'] is None:
-        users_profiles[user_id]['max_price'] = None
-    if 'price' not in data and users_profiles[user_id].get('price'):
-        users_profiles[user_id]['price'] = None
+    with profile_store.lock(user_id):
+        profile: Optional[dict] = profile_store.get(user_id)
+        fields: dict = dict(data) if profile is None else {}
+        for key, value in data.items():
+            if value is not None:
+                fields[key] = value
+        if (data.get('max_price') or data.get('price')) and data['min_price'] is None:
+            fields['min_price'] = None
+        if (data.get('min_price') or data.get('price')) and data['max_price'] is None:
+            fields['max_price'] = None
+        if 'price' not in data and profile and profile.get('price'):
+            fields['price'] = None
+        profile_store.update(user_id, fields)
 
 
 def hello(user_id: int) -> dict:
@@ -77,8 +115,9 @@ def hello(user_id: int) -> dict:
     :return: dict
     """
     name: str = ''
-    if user_id in users_profiles and 'name' in users_profiles[user_id]:
-        name = users_profiles[user_id]['name']
+    profile: Optional[dict] = profile_store.get(user_id)
+    if profile and 'name' in profile:
+        name = profile['name']
 
     return {
         'title': f'Hello {name}!',
@@ -102,6 +141,19 @@ def get_name(user_id: int, name: str = '') -> dict:
     }
 
 
+def recommend(user_profile: dict) -> tuple[int, bool]:
+    """ Recommend a room, in a worker process when they are configured
+    :param user_profile: dict
+    :return: tuple[int, bool]
+    """
+    if recommendation_offloader is None:
+        return recommend_room(user_profile)
+    # The user vector references the whole catalog, the worker rebuilds it from the ratings
+    return recommendation_offloader.call(
+        recommend_room, {key: value for key, value in user_profile.items() if key != 'user_vector'}
+    )
+
+
 def room(user_id: int, min_price: int = None, max_price: int = None, price: int = None, neighbourhood: str = None,
          room_type: str = None, minimum_nights: int = None, rating: int = None) -> dict:
     """ Get room
@@ -115,21 +167,26 @@ def room(user_id: int, min_price: int = None, max_price: int = None, price: int
     :param rating: int
     :return: dict
     """
-    save_user_profile(
-        user_id=user_id,
-        data={
-            'min_price': int(min_price) if min_price else None,
-            'max_price': int(max_price) if max_price else None,
-            'price': int(price) if price else None,
-            'neighbourhood': neighbourhood.title() if neighbourhood else None,
-            'room_type': room_type.title() if room_type else None,
-            'minimum_nights': int(minimum_nights) if minimum_nights else None,
-            'rating': float(rating) if rating else None
-        }
-    )
-
-    room_id, respects_criteria = recommend_room(users_profiles[user_id])
-    room: pd.Series = df[df['id'] == room_id].iloc[0]
+    # The recommendation of a user is computed while holding their lock, so that a rating cannot change it midway
+    with profile_store.lock(user_id):
+        save_user_profile(
+            user_id=user_id,
+            data={
+                'min_price': int(min_price) if min_price else None,
+                'max_price': int(max_price) if max_price else None,
+                'price': int(price) if price else None,
+                'neighbourhood': neighbourhood.title() if neighbourhood else None,
+                'room_type': room_type.title() if room_type else None,
+                'minimum_nights': int(minimum_nights) if minimum_nights else None,
+                'rating': float(rating) if rating else None
+            }
+        )
+        profile: dict = profile_store.get(user_id)
+        user_vector: Optional[UserVector] = user_vectors.get(user_id)
+        if user_vector is not None:
+            profile['user_vector'] = user_vector
+        room_id, respects_criteria = recommend(profile)
+    room: pd.Series = data.catalog.get_rows([room_id]).iloc[0]
 
     image: str = ''
     if room['images']:
@@ -138,13 +195,13 @@ def room(user_id: int, min_price: int = None, max_price: int = None, price: int
     description = f"{'**We did not find any room that meets all your criteria.**' if not respects_criteria else ''}\n" \
                   f"Price: {room['price']}€\nRating: {room['rating']}" \
                   f"\n\nYour criteria:\n" \
-                  f"Neighbourhood: {users_profiles[user_id]['neighbourhood'] if users_profiles[user_id]['neighbourhood'] else ''}\n" \
-                  f"Room type: {users_profiles[user_id]['room_type'] if users_profiles[user_id]['room_type'] else ''}\n" \
-                  f"Minimum nights: {str(users_profiles[user_id]['minimum_nights']) if users_profiles[user_id]['minimum_nights'] else ''}\n" \
-                  f"Minimum price: {str(users_profiles[user_id]['min_price']) if users_profiles[user_id]['min_price'] else ''}\n" \
-                  f"Maximum price: {str(users_profiles[user_id]['max_price']) if users_profiles[user_id]['max_price'] else ''}\n" \
-                  f"Mean Price: {str(users_profiles[user_id]['price']) if users_profiles[user_id]['price'] and not users_profiles[user_id]['max_price'] and not users_profiles[user_id]['max_price'] else ''}\n" \
-                  f"Min Rating: {str(users_profiles[user_id]['rating']) if users_profiles[user_id]['rating'] else ''}"
+                  f"Neighbourhood: {profile.get('neighbourhood') if profile.get('neighbourhood') else ''}\n" \
+                  f"Room type: {profile.get('room_type') if profile.get('room_type') else ''}\n" \
+                  f"Minimum nights: {str(profile.get('minimum_nights')) if profile.get('minimum_nights') else ''}\n" \
+                  f"Minimum price: {str(profile.get('min_price')) if profile.get('min_price') else ''}\n" \
+                  f"Maximum price: {str(profile.get('max_price')) if profile.get('max_price') else ''}\n" \
+                  f"Mean Price: {str(profile.get('price')) if profile.get('price') and not profile.get('max_price') and not profile.get('max_price') else ''}\n" \
+                  f"Min Rating: {str(profile.get('rating')) if profile.get('rating') else ''}"
 
     return {
         'title': f"Room {room['id']}: {room['name']}",
@@ -161,11 +218,12 @@ def saved_rooms(user_id: int) -> dict:
     :return: dict
     """
     fields: dict = {}
-    if user_id in users_profiles and 'ratings' in users_profiles[user_id]:
-        sorted_ratings = {k: v for k, v in sorted(users_profiles[user_id]['ratings'].items(), key=lambda item: item[1], reverse=True)}
-        for room_id, rating in sorted_ratings.items():
-            room: pd.Series = df[df['id'] == room_id].iloc[0]
-            fields[f"{room['name']}"] = f"[Rating of {rating}]({get_url(room_id=room_id)})"
+    profile: Optional[dict] = profile_store.get(user_id)
+    if profile and profile['ratings']:
+        sorted_ratings = {k: v for k, v in sorted(profile['ratings'].items(), key=lambda item: item[1], reverse=True)}
+        rooms: pd.DataFrame = data.catalog.get_rows(sorted_ratings.keys())
+        for room_id, name in zip(rooms['id'], rooms['name']):
+            fields[f"{name}"] = f"[Rating of {sorted_ratings[room_id]}]({get_url(room_id=room_id)})"
 
     return {
         'title': 'Here are the rooms you saved 🛏✅:',
@@ -179,8 +237,9 @@ def reset_filters(user_id: int) -> dict:
     :param user_id: int
     :return: dict
     """
-    if user_id in users_profiles:
-        del users_profiles[user_id]
+    with profile_store.lock(user_id):
+        profile_store.delete(user_id)
+        user_vectors.pop(user_id)
 
     return {
         'title': 'Filters reset!',
@@ -199,7 +258,16 @@ chatbot: Chatbot = Chatbot(
         'reset': reset_filters
     }
 )
-chatbot.train_model()
+startup_time: float = time.perf_counter()
+model_loaded: bool = chatbot.load_or_train()
+print(f"Intent model {'loaded' if model_loaded else 'trained'} in {time.perf_counter() - startup_time:.1f}s")
+# Messages arriving within PREDICTION_BATCH_WAIT seconds are classified together
+prediction_batcher: PredictionBatcher = PredictionBatcher(
+    chatbot,
+    max_batch_size=int(os.getenv('PREDICTION_BATCH_SIZE', '32')),
+    max_wait=float(os.getenv('PREDICTION_BATCH_WAIT', '0.005')),
+    max_pending=int(os.getenv('HANDLER_MAX_PENDING', '64'))
+)
 
 
 def get_embed_from_dict(data: dict) -> discord.Embed:
@@ -231,6 +299,16 @@ async def react_with_emojis(message: discord.Message) -> None:
     ])
 
 
+def remember_room(message_sent: discord.Message, message_dict: dict) -> None:
+    """ Remember the room of a message sent
+    :param message_sent: discord.Message
+    :param message_dict: dict
+    :return: None
+    """
+    if message_dict.get('url'):
+        messages_sent.remember(message_sent.id, get_id_from_url(message_dict['url']))
+
+
 async def send_message(channel: discord.TextChannel, message_dict: dict, with_reactions: bool = True) -> None:
     """ Send message
     :param channel: discord.TextChannel
@@ -240,6 +318,7 @@ async def send_message(channel: discord.TextChannel, message_dict: dict, with_re
     """
     embed: discord.Embed = get_embed_from_dict(data=message_dict)
     message_sent: discord.Message = await channel.send(embed=embed)
+    remember_room(message_sent=message_sent, message_dict=message_dict)
     if with_reactions:
         await react_with_emojis(message=message_sent)
 
@@ -252,20 +331,50 @@ async def reply(message: discord.Message, message_dict: dict, with_reactions: bo
     :return: None
     """
     message_sent: discord.Message = await message.reply(embed=get_embed_from_dict(data=message_dict))
+    remember_room(message_sent=message_sent, message_dict=message_dict)
     if with_reactions:
         await react_with_emojis(message=message_sent)
 
 
 async def get_room_from_message(message_id: int, channel_id: int) -> Optional[int]:
-    """ Get room from message
+    """ Get room from message, fetching the message only when it is not in messages_sent
     :param message_id: int
     :param channel_id: int
     :return: int
     """
-    channel: discord.TextChannel = bot.get_channel(channel_id)
-    message: discord.Message = await channel.fetch_message(message_id)
-    embed: discord.Embed = message.embeds[0]
-    return get_id_from_url(embed.url)
+    async def fetch_room_id() -> int:
+        channel: discord.TextChannel = bot.get_channel(channel_id)
+        message: discord.Message = await channel.fetch_message(message_id)
+        embed: discord.Embed = message.embeds[0]
+        return get_id_from_url(embed.url)
+
+    return await messages_sent.get(message_id, fetch_room_id)
+
+
+def store_rating(user_id: int, room_id: int, rating: int) -> None:
+    """ Store rating, the SQLite store writes it behind so this does not wait for the disk
+    :param user_id: int
+    :param room_id: int
+    :param rating: int
+    :return: None
+    """
+    with profile_store.lock(user_id):
+        if profile_store.get(user_id) is None:
+            profile_store.update(user_id, {
+                'neighbourhood': None,
+                'room_type': None,
+                'minimum_nights': None,
+                'min_price': None,
+                'max_price': None,
+                'price': None,
+                'rating': None
+            })
+        profile_store.rate(user_id=user_id, room_id=room_id, rating=rating)
+        user_vector: Optional[UserVector] = user_vectors.get(user_id)
+        if user_vector is None:
+            user_vectors.put(user_id, UserVector(data.catalog, profile_store.get(user_id)['ratings']))
+        else:
+            user_vector.rate(room_id=room_id, rating=rating)
 
 
 async def save_rating(user_id: int, message_id: int, channel_id: int, rating_emoji: str) -> None:
@@ -279,19 +388,7 @@ async def save_rating(user_id: int, message_id: int, channel_id: int, rating_emo
     rating: int = emoji_to_number(emoji=rating_emoji)
     room_id: int = await get_room_from_message(message_id=message_id, channel_id=channel_id)
     if room_id:
-        if user_id not in users_profiles:
-            users_profiles[user_id] = {
-                'neighbourhood': None,
-                'room_type': None,
-                'minimum_nights': None,
-                'min_price': None,
-                'max_price': None,
-                'price': None,
-                'rating': None
-            }
-        if 'ratings' not in users_profiles[user_id]:
-            users_profiles[user_id]['ratings'] = {}
-        users_profiles[user_id]['ratings'][room_id] = rating
+        await handler_offloader.run(store_rating, user_id=user_id, room_id=room_id, rating=rating)
 
 
 @bot.event
@@ -314,7 +411,14 @@ async def on_message(message: discord.Message) -> None:
     """
     if message.author == bot.user:
         return
-    intent, message_dict = chatbot.request(user_id=message.author.id, message=message.content)
+    try:
+        intents: list[dict] = await asyncio.wait_for(prediction_batcher.predict(message.content),
+                                                     timeout=handler_offloader.timeout)
+        intent, message_dict = await handler_offloader.run(
+            chatbot.respond, message=message.content, intents=intents, user_id=message.author.id
+        )
+    except (Busy, BatcherClosed, asyncio.TimeoutError, concurrent.futures.TimeoutError):
+        intent, message_dict = 'busy', BUSY_RESPONSE
     with_reactions: bool = intent == 'room'
     await reply(message=message, message_dict=message_dict, with_reactions=with_reactions)
 
@@ -328,10 +432,16 @@ async def on_raw_reaction_add(payload: discord.RawReactionActionEvent) -> None:
     if payload.user_id == bot.user.id:
         return
     if payload.emoji.name in number_emojis:
-        await save_rating(user_id=payload.user_id, message_id=payload.message_id,
-                          channel_id=payload.channel_id, rating_emoji=payload.emoji.name)
+        try:
+            await save_rating(user_id=payload.user_id, message_id=payload.message_id,
+                              channel_id=payload.channel_id, rating_emoji=payload.emoji.name)
+            message_dict: dict = await handler_offloader.run(room, user_id=payload.user_id)
+        except (Busy, asyncio.TimeoutError, concurrent.futures.TimeoutError):
+            message_dict, with_reactions = BUSY_RESPONSE, False
+        else:
+            with_reactions = True
         await send_message(
             channel=bot.get_channel(payload.channel_id),
-            message_dict=room(user_id=payload.user_id),
-            with_reactions=True
+            message_dict=message_dict,
+            with_reactions=with_reactions
         )
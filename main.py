@@ -4,9 +4,11 @@ from dotenv import load_dotenv
 # Built-in imports
 import os
 
+# The .env file also configures the services, so it is loaded before importing them
+load_dotenv()
+
 # local imports
 from discord_bot import bot
 
 if __name__ == '__main__':
-    load_dotenv()
     bot.run(os.getenv('DISCORD_TOKEN'))
@@ -1 +1,2 @@
 from .chatbot import Chatbot
+from .batching import BatcherClosed, PredictionBatcher
@@ -0,0 +1,148 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Optional
+
+from services.nlp.chatbot import Chatbot
+from services.utils.offload import Busy
+
+# Maximum number of messages classified by one forward pass
+MAX_BATCH_SIZE: int = 32
+# Time in seconds a message waits for others to be classified with
+MAX_WAIT: float = 0.005
+
+
+class BatcherClosed(Exception):
+    """ Raised to the callers whose message was not classified when the batcher was closed.
+    """
+
+
+class PredictionBatcher:
+    def __init__(self, chatbot: Chatbot, max_batch_size: int = MAX_BATCH_SIZE, max_wait: float = MAX_WAIT,
+                 executor: Optional[Executor] = None, max_pending: Optional[int] = None) -> None:
+        """ Classify the messages arriving together with one forward pass of the chatbot model.
+        The first message of a batch waits up to max_wait seconds for others, unless max_batch_size are queued.
+        The forward pass runs in the executor, so that the event loop keeps serving while it runs.
+        :param chatbot: The trained chatbot.
+        :param max_batch_size: The maximum number of messages of a batch.
+        :param max_wait: The time in seconds a batch waits for messages, 0 to only batch the queued ones.
+        :param executor: The executor of the forward passes, the default executor of the event loop if None.
+        :param max_pending: The maximum number of queued messages, a new message is rejected with Busy beyond it,
+        None for no limit.
+        :return: None
+        """
+        self.chatbot: Chatbot = chatbot
+        self.max_batch_size: int = max_batch_size
+        self.max_wait: float = max_wait
+        self.executor: Optional[Executor] = executor
+        self.max_pending: Optional[int] = max_pending
+        self.batches: int = 0
+        self.rejected: int = 0
+        self.messages: int = 0
+        self.largest_batch: int = 0
+        # Created in the event loop of the first request
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Messages taken from the queue by the worker and not classified yet
+        self._batch: list[tuple] = []
+
+    @property
+    def metrics(self) -> dict:
+        """ Get the batching metrics.
+        :return: The number of queued messages, of batches, of messages and of rejected messages, and the mean and
+        largest batch sizes.
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'batches': self.batches,
+            'messages': self.messages,
+            'rejected': self.rejected,
+            'mean_batch_size': self.messages / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch
+        }
+
+    async def predict(self, message: str) -> list[dict]:
+        """ Predict the classes of a message, batched with the concurrent ones.
+        :param message: The message to predict the class of.
+        :return: The predicted classes, like Chatbot._predict_class.
+        :raise Busy: If max_pending messages are queued.
+        :raise BatcherClosed: If the batcher is closed before the message is classified.
+        """
+        if self._worker is None or self._worker.done():
+            # The messages left by a stopped worker would never be classified
+            self._drain()
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        if self.max_pending is not None and self._queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise Busy(f'{self._queue.qsize()} messages are waiting to be classified')
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((message, future))
+        return await future
+
+    async def request(self, message: str, user_id: Optional[int] = None) -> tuple[str, dict]:
+        """ Request the response, like Chatbot.request.
+        :param message: The message to request the response for.
+        :param user_id: The user id.
+        :return: The response.
+        """
+        return self.chatbot.respond(message=message, intents=await self.predict(message), user_id=user_id)
+
+    async def close(self) -> None:
+        """ Stop the worker, the messages not classified yet fail with BatcherClosed.
+        :return: None
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._drain()
+        self._queue = None
+
+    def _drain(self) -> None:
+        """ Fail the messages of the current batch and of the queue, so that their callers do not wait forever.
+        :return: None
+        """
+        pending, self._batch = self._batch, []
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(BatcherClosed('The batcher was closed before the message was classified'))
+
+    async def _run(self) -> None:
+        """ Classify the queued messages batch by batch.
+        :return: None
+        """
+        while True:
+            self._batch = [await self._queue.get()]
+            if self.max_wait > 0 and self._queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(self._batch) < self.max_batch_size and not self._queue.empty():
+                self._batch.append(self._queue.get_nowait())
+            await self._predict(self._batch)
+            self._batch = []
+
+    async def _predict(self, batch: list[tuple]) -> None:
+        """ Classify a batch and resolve the future of each message.
+        :param batch: The (message, future) tuples.
+        :return: None
+        """
+        self.batches += 1
+        self.messages += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            predictions: list[list[dict]] = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.chatbot._predict_classes, [message for message, _ in batch]
+            )
+        except Exception as exception:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+        for (_, future), intents in zip(batch, predictions):
+            if not future.done():
+                future.set_result(intents)
@@ -1,62 +1,122 @@
+import hashlib
 import json
 import os
 import pickle
 import random
-import re
 import warnings
-from typing import Optional, Union
+from types import MappingProxyType
+from typing import NamedTuple, Optional, Union
 
-import nltk
 import numpy as np
-from nltk.stem import WordNetLemmatizer
-from tensorflow.keras.layers import Dense, Dropout
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.models import load_model
-from tensorflow.keras.optimizers import SGD
 
-from services.utils.utils import find_element_of_list_of_dict_where_key_is_value
-
-nltk.download('punkt', quiet=True)
-nltk.download('wordnet', quiet=True)
-nltk.download('omw-1.4', quiet=True)
+from services.nlp.entities import EntityExtractor
+from services.nlp.featurizer import BagOfWords
+from services.nlp.inference import NumpyIntentModel
+from services.nlp.preprocessing import tokenize
+from services.nlp.resources import ensure_resource
+from services.utils.cache import LRUCache
 
 # Disable Tensorflow debugging information
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 warnings.filterwarnings("ignore")
 
+INTENTS_PATH: str = './services/nlp/intents.json'
+# Trained models are cached there, under a name depending on the intents and the hyperparameters
+MODEL_DIRECTORY: str = './models'
+# Part of the name of the cached models, to be increased when the saved files change, so that older ones are not loaded
+ARTIFACT_VERSION: int = 2
+ARTIFACT_SUFFIXES: tuple[str, ...] = ('.h5', '.npz', '_featurizer.json', '_classes.pkl')
+# Written once every file of a cached model is in place
+COMPLETE_MARKER: str = '.complete'
+DEFAULT_HYPERPARAMETERS: dict = {
+    'hidden_layers': [128, 64],
+    'dropout': 0.5,
+    'learning_rate': 0.01,
+    'decay': 1e-6,
+    'momentum': 0.9,
+    'nesterov': True,
+    'epochs': 200,
+    'batch_size': 5
+}
+
+
+class IntentSpec(NamedTuple):
+    tag: str
+    # Index of the intent in the model output, None until the model is trained or loaded
+    index: Optional[int]
+    entities: MappingProxyType
+    responses: tuple[str, ...]
+    extractor: EntityExtractor
+
 
 class Chatbot:
     def __init__(self, intent_methods: dict = None, model_name: str = "assistant_model",
-                 default_response=None, min_probability: float = 0.8) -> None:
+                 default_response=None, min_probability: float = 0.8, hyperparameters: dict = None,
+                 lemma_cache_size: int = 10000, message_cache_size: int = 1024) -> None:
         """ Initialize the Chatbot object.
         :param intent_methods: The methods to be used for the intents.
         :param model_name: The name of the model.
         :param default_response: The default response.
         :param min_probability: The minimum probability for the intents.
+        :param hyperparameters: The hyperparameters overriding DEFAULT_HYPERPARAMETERS.
+        :param lemma_cache_size: The number of lemmatized words cached.
+        :param message_cache_size: The number of cleaned up messages cached, 0 to disable the message cache.
         :return: None
         """
         if default_response is None:
             default_response = {"title": "I don't understand."}
 
         self.intents: dict = self.load_json_intents()
+        # The intents by tag, and by index in the model output once it is trained or loaded
+        self.registry: MappingProxyType = MappingProxyType({
+            intent['tag']: IntentSpec(
+                tag=intent['tag'],
+                index=None,
+                entities=MappingProxyType(intent['entities']),
+                responses=tuple(intent['responses']),
+                extractor=EntityExtractor(intent['entities'])
+            )
+            for intent in self.intents['intents']
+        })
+        self.class_intents: tuple[IntentSpec, ...] = ()
         self.intent_methods: dict = intent_methods if intent_methods else {}
         self.model_name: str = model_name
-        self.lemmatizer: WordNetLemmatizer = WordNetLemmatizer()
+        # Created on the first lemmatization, once the WordNet resources are found
+        self.lemmatizer = None
+        self.lemma_cache: LRUCache = LRUCache(maxsize=lemma_cache_size)
+        self.message_cache: LRUCache = LRUCache(maxsize=message_cache_size)
         self.default_response: dict = default_response
 
-        self.words: list[str] = []
+        self.featurizer: BagOfWords = BagOfWords([])
         self.classes: list[str] = []
-        self.model: Sequential = None
+        # The Keras model exists only after training, predictions are made by its NumPy export
+        self.keras_model = None
+        self.model: Optional[NumpyIntentModel] = None
 
         self.MIN_PROBABILITY: float = min_probability
+        self.hyperparameters: dict = {**DEFAULT_HYPERPARAMETERS, **(hyperparameters or {})}
+
+    @property
+    def words(self) -> list[str]:
+        return self.featurizer.words
+
+    def _index_registry(self) -> None:
+        """ Set the index of the intents in the output of the trained or loaded model.
+        :return: None
+        """
+        class_indices: dict[str, int] = {tag: index for index, tag in enumerate(self.classes)}
+        self.registry = MappingProxyType({
+            tag: intent._replace(index=class_indices.get(tag)) for tag, intent in self.registry.items()
+        })
+        self.class_intents = tuple(self.registry[tag] for tag in self.classes)
 
     @staticmethod
     def load_json_intents() -> dict:
         """ Load the intents from a json file.
         :return: The intents.
         """
-        with open('./services/nlp/intents.json') as json_data:
+        with open(INTENTS_PATH) as json_data:
             intents: dict = json.load(json_data)
         return intents
 
@@ -64,55 +124,55 @@ class Chatbot:
         """ Train the model.
         :return: None
         """
-        self.words = []
+        # Tensorflow is only needed to train, a process loading a saved model never imports it
+        from tensorflow.keras.layers import Dense, Dropout
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.optimizers import SGD
+
+        words: list[str] = []
         self.classes = []
         documents: list[tuple] = []
         ignore_letters: list[str] = ['!', '?', ',', '.']
 
         for intent in self.intents['intents']:
             for pattern in intent['patterns']:
-                words: list[str] = nltk.word_tokenize(pattern)
-                self.words.extend(words)
-                documents.append((words, intent['tag']))
+                pattern_words: list[str] = tokenize(pattern)
+                words.extend(pattern_words)
+                documents.append((pattern_words, intent['tag']))
                 if intent['tag'] not in self.classes:
                     self.classes.append(intent['tag'])
 
-        self.words = [self.lemmatizer.lemmatize(word.lower()) for word in self.words if word not in ignore_letters]
-        self.words = sorted(list(set(self.words)))
+        words = [self._lemmatize(word) for word in words if word not in ignore_letters]
+        self.featurizer = BagOfWords(sorted(list(set(words))))
 
         self.classes = sorted(list(set(self.classes)))
-
-        training: list[list] = []
-        output_empty: list[int] = [0] * len(self.classes)
-
-        for document in documents:
-            bag: list = []
-            tuple_word_patterns: tuple = document[0]
-            word_patterns: list[str] = [self.lemmatizer.lemmatize(word.lower()) for word in tuple_word_patterns]
-            for word in self.words:
-                bag.append(1) if word in word_patterns else bag.append(0)
-
-            output_row: list[int] = list(output_empty)
-            output_row[self.classes.index(document[1])] = 1
-            training.append([bag, output_row])
-
-        random.shuffle(training)
-        training: np.ndarray = np.array(training, dtype=object)
-
-        train_x: list[list[int]] = list(training[:, 0])
-        train_y: list[list[int]] = list(training[:, 1])
-
-        self.model = Sequential()
-        self.model.add(Dense(128, input_shape=(len(train_x[0]),), activation='relu'))
-        self.model.add(Dropout(0.5))
-        self.model.add(Dense(64, activation='relu'))
-        self.model.add(Dropout(0.5))
-        self.model.add(Dense(len(train_y[0]), activation='softmax'))
-
-        sgd: SGD = SGD(lr=0.01, decay=1e-6, momentum=0.9, nesterov=True)
-        self.model.compile(loss='categorical_crossentropy', optimizer=sgd, metrics=['accuracy'])
-
-        self.hist = self.model.fit(np.array(train_x), np.array(train_y), epochs=200, batch_size=5, verbose=0)
+        class_indices: dict[str, int] = {tag: index for index, tag in enumerate(self.classes)}
+
+        random.shuffle(documents)
+        train_x: np.ndarray = self.featurizer.transform_batch([
+            [self._lemmatize(word) for word in pattern_words] for pattern_words, _ in documents
+        ])
+        train_y: np.ndarray = np.zeros((len(documents), len(self.classes)), dtype=np.float32)
+        train_y[np.arange(len(documents)), [class_indices[tag] for _, tag in documents]] = 1
+        self._index_registry()
+
+        hyperparameters: dict = self.hyperparameters
+        self.keras_model = Sequential()
+        for index, units in enumerate(hyperparameters['hidden_layers']):
+            if index == 0:
+                self.keras_model.add(Dense(units, input_shape=(len(train_x[0]),), activation='relu'))
+            else:
+                self.keras_model.add(Dense(units, activation='relu'))
+            self.keras_model.add(Dropout(hyperparameters['dropout']))
+        self.keras_model.add(Dense(len(train_y[0]), activation='softmax'))
+
+        sgd: SGD = SGD(lr=hyperparameters['learning_rate'], decay=hyperparameters['decay'],
+                       momentum=hyperparameters['momentum'], nesterov=hyperparameters['nesterov'])
+        self.keras_model.compile(loss='categorical_crossentropy', optimizer=sgd, metrics=['accuracy'])
+
+        self.hist = self.keras_model.fit(train_x, train_y, epochs=hyperparameters['epochs'],
+                                         batch_size=hyperparameters['batch_size'], verbose=0)
+        self.model = NumpyIntentModel.from_keras(self.keras_model)
 
     def save_model(self, model_name: str = None) -> None:
         """ Save the model.
@@ -121,68 +181,152 @@ class Chatbot:
         """
         if model_name is None:
             model_name = self.model_name
-        self.model.save(f"{model_name}.h5", self.hist)
-        pickle.dump(self.words, open(f'{model_name}_words.pkl', 'wb'))
+        if self.keras_model is not None:
+            self.keras_model.save(f"{model_name}.h5")
+        self.model.save(f"{model_name}.npz")
+        self.featurizer.save(f'{model_name}_featurizer.json')
         pickle.dump(self.classes, open(f'{model_name}_classes.pkl', 'wb'))
 
     def load_model(self, model_name: str = None) -> None:
-        """ Load the model.
+        """ Load the model, from its NumPy export when there is one.
         :param model_name: The name of the model.
         :return: None
         """
         if model_name is None:
             model_name = self.model_name
-        self.words = pickle.load(open(f'{model_name}_words.pkl', 'rb'))
+        if os.path.exists(f'{model_name}_featurizer.json'):
+            self.featurizer = BagOfWords.load(f'{model_name}_featurizer.json')
+        else:
+            self.featurizer = BagOfWords(pickle.load(open(f'{model_name}_words.pkl', 'rb')))
         self.classes = pickle.load(open(f'{model_name}_classes.pkl', 'rb'))
-        self.model = load_model(f'{model_name}.h5')
+        self._index_registry()
+        if os.path.exists(f'{model_name}.npz'):
+            self.model = NumpyIntentModel.load(f'{model_name}.npz')
+        else:
+            from tensorflow.keras.models import load_model
+
+            self.keras_model = load_model(f'{model_name}.h5')
+            self.model = NumpyIntentModel.from_keras(self.keras_model)
+
+    def artifact_hash(self) -> str:
+        """ Hash the artifact version, the intents file and the hyperparameters, which determine the trained model.
+        :return: The hash.
+        """
+        digest = hashlib.sha256()
+        digest.update(f'version {ARTIFACT_VERSION}\n'.encode('utf-8'))
+        with open(INTENTS_PATH, 'rb') as intents_file:
+            digest.update(intents_file.read())
+        digest.update(json.dumps(self.hyperparameters, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def load_or_train(self, directory: str = MODEL_DIRECTORY) -> bool:
+        """ Load the cached model of the current intents and hyperparameters, or train and cache it.
+        :param directory: The directory of the cached models.
+        :return: Whether the model was loaded from the cache.
+        """
+        model_name: str = os.path.join(directory, f"{self.model_name}-{self.artifact_hash()}")
+        if os.path.exists(f"{model_name}{COMPLETE_MARKER}"):
+            self.load_model(model_name)
+            return True
+        self.train_model()
+        os.makedirs(directory, exist_ok=True)
+        # Saved under a temporary name then renamed, and marked complete last, so that a model whose save was
+        # interrupted, or which another process is saving, is never loaded
+        temporary_name: str = f"{model_name}.{os.getpid()}.tmp"
+        try:
+            self.save_model(temporary_name)
+            for suffix in ARTIFACT_SUFFIXES:
+                if os.path.exists(f"{temporary_name}{suffix}"):
+                    os.replace(f"{temporary_name}{suffix}", f"{model_name}{suffix}")
+        finally:
+            for suffix in ARTIFACT_SUFFIXES:
+                if os.path.exists(f"{temporary_name}{suffix}"):
+                    os.remove(f"{temporary_name}{suffix}")
+        open(f"{model_name}{COMPLETE_MARKER}", 'w').close()
+        return False
 
     def _clean_up_sentence(self, message: str) -> list[str]:
         """ Clean up the message.
         :param message: The message to clean up.
         :return: The cleaned up message.
         """
-        sentence_words: list[str] = nltk.word_tokenize(message)
-        sentence_words = [self.lemmatizer.lemmatize(word.lower()) for word in sentence_words]
+        if self.message_cache.maxsize:
+            cached: Optional[tuple] = self.message_cache.get(message)
+            if cached is not None:
+                return list(cached)
+        sentence_words: list[str] = tokenize(message)
+        sentence_words = [self._lemmatize(word) for word in sentence_words]
+        if self.message_cache.maxsize:
+            self.message_cache.put(message, tuple(sentence_words))
         return sentence_words
 
-    def _bag_of_words(self, message: str, words: list[str]) -> np.ndarray:
+    def _lemmatize(self, word: str) -> str:
+        """ Lemmatize a lowercased word, through the lemma cache.
+        :param word: The word to lemmatize.
+        :return: The lemma.
+        """
+        word = word.lower()
+        lemma: Optional[str] = self.lemma_cache.get(word)
+        if lemma is None:
+            if self.lemmatizer is None:
+                ensure_resource('wordnet')
+                ensure_resource('omw-1.4')
+                from nltk.stem import WordNetLemmatizer
+
+                self.lemmatizer = WordNetLemmatizer()
+            lemma = self.lemmatizer.lemmatize(word)
+            self.lemma_cache.put(word, lemma)
+        return lemma
+
+    @property
+    def cache_stats(self) -> dict:
+        """ Get the statistics of the preprocessing caches.
+        :return: The statistics of the lemma and message caches.
+        """
+        return {
+            'lemmas': self.lemma_cache.stats,
+            'messages': self.message_cache.stats
+        }
+
+    def _bag_of_words(self, message: str) -> np.ndarray:
         """ Create the bag of words.
         :param message: The message to create the bag of words for.
-        :param words: The words to create the bag of words for.
         :return: The bag of words.
         """
-        sentence_words: list[str] = self._clean_up_sentence(message)
-        bag: list[int] = [0] * len(words)
-        for sentence_word in sentence_words:
-            for index, word in enumerate(words):
-                if word == sentence_word:
-                    bag[index] = 1
-        return np.array(bag)
+        return self.featurizer.transform(self._clean_up_sentence(message))
 
     def _predict_class(self, message: str) -> list[dict[str: int, str: str]]:
         """ Predict the class of the message.
         :param message: The message to predict the class of.
         :return: The predicted class.
         """
-        p: np.ndarray = self._bag_of_words(message, self.words)
-        res: list[float] = self.model.predict(np.array([p]))[0]
+        return self._predict_classes([message])[0]
+
+    def _predict_classes(self, messages: list[str]) -> list[list[dict[str: int, str: str]]]:
+        """ Predict the classes of several messages with one forward pass.
+        :param messages: The messages to predict the class of.
+        :return: The predicted classes of each message.
+        """
+        bags: np.ndarray = self.featurizer.transform_batch([self._clean_up_sentence(message) for message in messages])
+        return [self._intents_from_probabilities(res) for res in self.model.predict(bags)]
+
+    def _intents_from_probabilities(self, res: np.ndarray) -> list[dict[str: int, str: str]]:
+        """ Keep the classes above the minimum probability.
+        :param res: The probability of each class.
+        :return: The predicted classes, by decreasing probability.
+        """
         ERROR_THRESHOLD: float = self.MIN_PROBABILITY
 
-        results: list[list[int, float]] = [[index, result] for index, result in enumerate(res) if
-                                           result >= ERROR_THRESHOLD]
-        results.sort(key=lambda x: x[1], reverse=True)
+        results: np.ndarray = np.flatnonzero(res >= ERROR_THRESHOLD)
+        results = results[np.argsort(-res[results], kind='stable')]
 
         return [
             {
-                'tag': self.classes[result[0]],
-                'entities': find_element_of_list_of_dict_where_key_is_value(
-                    list_to_search=self.intents['intents'],
-                    key='tag',
-                    value=self.classes[result[0]]
-                )['entities'],
-                'probability': str(result[1])
+                'tag': self.class_intents[index].tag,
+                'entities': self.class_intents[index].entities,
+                'probability': str(res[index])
             }
-            for result in results
+            for index in results
         ]
 
     def _get_response(self, intents: list[dict]) -> tuple[str, dict]:
@@ -193,36 +337,24 @@ class Chatbot:
         response: Optional[Union[dict, str]] = None
         try:
             tag: str = intents[0]['tag']
-            list_of_intents: list[dict] = self.intents['intents']
-            for intent in list_of_intents:    
-                if intent['tag'] == tag:    
-                    response = {    
-                        'title': random.choice(intent['responses']),    
-                        'description': ''    
-                    }    
-                    break    
-        except IndexError:    
-            tag = 'no_intent'    
-            response = self.default_response    
-        return tag, response    
-
-    @staticmethod
-    def _get_entities(message: str, intent: dict) -> dict:
+            intent: Optional[IntentSpec] = self.registry.get(tag)
+            if intent is not None:
+                response = {
+                    'title': random.choice(intent.responses),
+                    'description': ''
+                }
+        except IndexError:
+            tag = 'no_intent'
+            response = self.default_response
+        return tag, response
+
+    def _get_entities(self, message: str, intent: dict) -> dict:
         """ Get the entities.
         :param message: The message to get the entities for.
         :param intent: The intent to get the entities for.
         :return: The entities.
         """
-        entities_to_find: dict[str: str] = intent['entities']
-        entities: dict = {}
-        for entity, regexes in entities_to_find.items():
-            for regex in regexes:
-                regex = r"{}".format(regex)
-                regex_match: re.Match = re.search(regex, message, re.IGNORECASE)
-                if regex_match:
-                    entities[entity] = regex_match.group(entity)
-                    break
-        return entities
+        return self.registry[intent['tag']].extractor.extract(message)
 
     def request(self, message: str, user_id: Optional[int] = None) -> tuple[str, dict]:
         """ Request the response.
@@ -230,8 +362,15 @@ class Chatbot:
         :param message: The message to request the response for.
         :return: The response.
         """
-        intents: list[dict] = self._predict_class(message=message)
+        return self.respond(message=message, intents=self._predict_class(message=message), user_id=user_id)
 
+    def respond(self, message: str, intents: list[dict], user_id: Optional[int] = None) -> tuple[str, dict]:
+        """ Respond to a message whose classes are predicted.
+        :param message: The message to respond to.
+        :param intents: The predicted classes of the message.
+        :param user_id: The user id.
+        :return: The response.
+        """
         if intents and intents[0]['tag'] in self.intent_methods.keys():
             entities: dict = self._get_entities(message=message, intent=intents[0])
             return intents[0]['tag'], self.intent_methods[intents[0]['tag']](user_id=user_id, **entities)
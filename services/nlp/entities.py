@@ -0,0 +1,127 @@
+import re
+from typing import Optional
+
+# Named groups are renamed per alternative when patterns are merged, as a pattern cannot reuse a group name
+GROUP_NAME: re.Pattern = re.compile(r'\(\?P<(\w+)>')
+BACKREFERENCE: re.Pattern = re.compile(r'\(\?P=|\\[1-9]')
+
+
+def has_top_level_alternation(pattern: str) -> bool:
+    """ Check whether a pattern has a | outside of any group.
+    :param pattern: The regex.
+    :return: Whether the pattern is an alternation.
+    """
+    depth: int = 0
+    in_class: bool = False
+    escaped: bool = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+    return False
+
+
+def is_mergeable(pattern: str, entity: str) -> bool:
+    """ Check whether a pattern can be merged with its neighbours without changing which pattern matches first.
+    A pattern starting with .* matches a single line message at its first position if it matches at all, so
+    trying the alternatives of a merged pattern at the first position keeps the order of the patterns.
+    :param pattern: The regex.
+    :param entity: The entity captured by the pattern.
+    :return: Whether the pattern can be merged.
+    """
+    return (pattern.startswith('.*') and pattern[2:3] not in ('?', '+')
+            and f'(?P<{entity}>' in pattern
+            and not has_top_level_alternation(pattern)
+            and not BACKREFERENCE.search(pattern))
+
+
+class EntityExtractor:
+    def __init__(self, entities: dict[str, list[str]], flags: int = re.IGNORECASE) -> None:
+        """ Extract the entities of an intent with precompiled patterns.
+        An entity takes the group of the first of its patterns matching the message. Consecutive patterns starting
+        with .* are merged into one alternation, each alternative wrapped in a group naming it, and only tried at the
+        first position of single line messages instead of at every position.
+        :param entities: The patterns of each entity, in the order they are tried.
+        :param flags: The flags of the patterns.
+        :return: None
+        """
+        self.entities: dict[str, list[str]] = entities
+        # The compiled patterns of each entity, searched one by one in multi-line messages
+        self.patterns: dict[str, list[re.Pattern]] = {
+            entity: [re.compile(pattern, flags) for pattern in patterns] for entity, patterns in entities.items()
+        }
+        # The searches of each entity, see _merge
+        self.searches: dict[str, list[tuple[re.Pattern, Optional[dict[str, str]], bool]]] = {
+            entity: self._merge(entity, patterns, flags) for entity, patterns in entities.items()
+        }
+
+    @staticmethod
+    def _merge(entity: str, patterns: list[str],
+               flags: int) -> list[tuple[re.Pattern, Optional[dict[str, str]], bool]]:
+        """ Merge the runs of consecutive mergeable patterns.
+        :param entity: The entity captured by the patterns.
+        :param patterns: The patterns of the entity.
+        :param flags: The flags of the patterns.
+        :return: The (pattern, entity group of each alternative, anchored) searches of the entity, the groups being
+        None for a single pattern, and anchored searches only being tried at the first position.
+        """
+        searches: list[tuple[re.Pattern, Optional[dict[str, str]], bool]] = []
+        run: list[str] = []
+
+        def close_run() -> None:
+            if len(run) == 1:
+                searches.append((re.compile(run[0], flags), None, True))
+            elif run:
+                alternatives: list[str] = []
+                groups: dict[str, str] = {}
+                for index, pattern in enumerate(run):
+                    alternative: str = f'alternative{index}'
+                    alternatives.append(f'(?P<{alternative}>' + GROUP_NAME.sub(
+                        lambda match: f'(?P<{match.group(1)}__{index}>', pattern
+                    ) + ')')
+                    groups[alternative] = f'{entity}__{index}'
+                searches.append((re.compile('|'.join(alternatives), flags), groups, True))
+            run.clear()
+
+        for pattern in patterns:
+            if is_mergeable(pattern, entity):
+                run.append(pattern)
+            else:
+                close_run()
+                searches.append((re.compile(pattern, flags), None, False))
+        close_run()
+        return searches
+
+    def extract(self, message: str) -> dict:
+        """ Extract the entities of a message.
+        :param message: The message.
+        :return: The entities found in the message.
+        """
+        entities: dict = {}
+        if '\n' in message:
+            for entity, patterns in self.patterns.items():
+                for pattern in patterns:
+                    regex_match: Optional[re.Match] = pattern.search(message)
+                    if regex_match:
+                        entities[entity] = regex_match.group(entity)
+                        break
+            return entities
+
+        for entity, searches in self.searches.items():
+            for pattern, groups, anchored in searches:
+                regex_match: Optional[re.Match] = pattern.match(message) if anchored else pattern.search(message)
+                if regex_match:
+                    entities[entity] = regex_match.group(groups[regex_match.lastgroup] if groups else entity)
+                    break
+        return entities
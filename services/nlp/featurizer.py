@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+
+
+class BagOfWords:
+    def __init__(self, words: list[str]) -> None:
+        """ Bag of words over a vocabulary, looking the tokens up in a word to index dict.
+        :param words: The vocabulary.
+        :return: None
+        """
+        self.words: list[str] = list(words)
+        self.index: dict[str, int] = {word: index for index, word in enumerate(self.words)}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def indices(self, tokens: list[str]) -> np.ndarray:
+        """ Find the vocabulary words present in the tokens.
+        :param tokens: The lemmatized tokens.
+        :return: The sorted indices of the words.
+        """
+        return np.array(sorted({self.index[token] for token in tokens if token in self.index}), dtype=np.intp)
+
+    def transform(self, tokens: list[str]) -> np.ndarray:
+        """ Create the bag of words of the tokens.
+        :param tokens: The lemmatized tokens.
+        :return: The bag of words, 1 for the words present in the tokens and 0 otherwise.
+        """
+        bag: np.ndarray = np.zeros(len(self.words), dtype=np.float32)
+        bag[self.indices(tokens)] = 1
+        return bag
+
+    def transform_batch(self, token_lists: list[list[str]]) -> np.ndarray:
+        """ Create the bags of words of several token lists, as the rows of one matrix.
+        :param token_lists: The lemmatized tokens of each message.
+        :return: The bags of words, one row per message.
+        """
+        bags: np.ndarray = np.zeros((len(token_lists), len(self.words)), dtype=np.float32)
+        for row, tokens in enumerate(token_lists):
+            bags[row, self.indices(tokens)] = 1
+        return bags
+
+    def save(self, path: str) -> None:
+        """ Save the vocabulary.
+        :param path: The json file.
+        :return: None
+        """
+        with open(path, 'w') as featurizer_file:
+            json.dump({'words': self.words}, featurizer_file)
+
+    @classmethod
+    def load(cls, path: str) -> 'BagOfWords':
+        """ Load a featurizer saved by save.
+        :param path: The json file.
+        :return: The featurizer.
+        """
+        with open(path) as featurizer_file:
+            return cls(json.load(featurizer_file)['words'])
@@ -0,0 +1,108 @@
+import numpy as np
+
+
+def relu(x: np.ndarray) -> np.ndarray:
+    """ Rectified linear unit.
+    :param x: The layer input.
+    :return: The activation.
+    """
+    return np.maximum(x, 0, out=x)
+
+
+def softmax(x: np.ndarray) -> np.ndarray:
+    """ Softmax over the last axis, shifted by the maximum for stability.
+    :param x: The layer input.
+    :return: The activation.
+    """
+    x = np.exp(x - x.max(axis=-1, keepdims=True))
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+def linear(x: np.ndarray) -> np.ndarray:
+    """ Identity activation.
+    :param x: The layer input.
+    :return: The activation.
+    """
+    return x
+
+
+ACTIVATIONS: dict = {
+    'relu': relu,
+    'softmax': softmax,
+    'linear': linear
+}
+
+
+class NumpyIntentModel:
+    def __init__(self, weights: list[np.ndarray], biases: list[np.ndarray], activations: list[str]) -> None:
+        """ Forward pass of a trained stack of Dense layers, without tensorflow.
+        Dropout layers are the identity at inference time and are not kept.
+        :param weights: The kernel of each Dense layer, of shape (inputs, units).
+        :param biases: The bias of each Dense layer.
+        :param activations: The activation name of each Dense layer.
+        :return: None
+        """
+        unknown: set = set(activations) - ACTIVATIONS.keys()
+        if unknown:
+            raise ValueError(f"Unsupported activations: {sorted(unknown)}")
+        self.weights: list[np.ndarray] = [np.ascontiguousarray(weight, dtype=np.float32) for weight in weights]
+        self.biases: list[np.ndarray] = [np.asarray(bias, dtype=np.float32) for bias in biases]
+        self.activations: list[str] = list(activations)
+
+    @property
+    def n_inputs(self) -> int:
+        return self.weights[0].shape[0]
+
+    @property
+    def n_outputs(self) -> int:
+        return self.weights[-1].shape[1]
+
+    @classmethod
+    def from_keras(cls, model) -> 'NumpyIntentModel':
+        """ Export the Dense layers of a Keras model.
+        :param model: The trained Keras model.
+        :return: The NumPy model.
+        """
+        weights, biases, activations = [], [], []
+        for layer in model.layers:
+            layer_weights: list = layer.get_weights()
+            if not layer_weights:
+                continue
+            weight, bias = layer_weights
+            weights.append(weight)
+            biases.append(bias)
+            activations.append(layer.get_config()['activation'])
+        return cls(weights, biases, activations)
+
+    def save(self, path: str) -> None:
+        """ Save the weights.
+        :param path: The .npz file.
+        :return: None
+        """
+        arrays: dict = {'activations': np.array(self.activations)}
+        for index, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'weight_{index}'] = weight
+            arrays[f'bias_{index}'] = bias
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyIntentModel':
+        """ Load weights saved by save.
+        :param path: The .npz file.
+        :return: The NumPy model.
+        """
+        with np.load(path) as arrays:
+            activations: list[str] = arrays['activations'].tolist()
+            return cls([arrays[f'weight_{index}'] for index in range(len(activations))],
+                       [arrays[f'bias_{index}'] for index in range(len(activations))],
+                       activations)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """ Run the forward pass, like the predict method of Keras.
+        :param x: The inputs, one row per sample.
+        :return: The outputs, one row per sample.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        for weight, bias, activation in zip(self.weights, self.biases, self.activations):
+            x = ACTIVATIONS[activation](x @ weight + bias)
+        return x
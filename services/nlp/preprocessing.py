@@ -0,0 +1,23 @@
+import re
+
+from services.nlp.resources import ensure_resource
+
+# Messages made of ASCII words separated by single spaces, which word_tokenize splits on the spaces
+SIMPLE_MESSAGE: re.Pattern = re.compile(r'[A-Za-z0-9]+(?: [A-Za-z0-9]+)*')
+# Words that word_tokenize splits in two, like "cannot" into "can" and "not"
+SPLIT_WORDS: frozenset = frozenset(['cannot', 'gimme', 'gonna', 'gotta', 'lemme', 'wanna'])
+
+
+def tokenize(message: str) -> list[str]:
+    """ Tokenize a message like nltk.word_tokenize, splitting simple messages on spaces without nltk.
+    :param message: The message to tokenize.
+    :return: The tokens.
+    """
+    if SIMPLE_MESSAGE.fullmatch(message):
+        tokens: list[str] = message.split(' ')
+        if not any(token.lower() in SPLIT_WORDS for token in tokens):
+            return tokens
+    ensure_resource('punkt')
+    import nltk
+
+    return nltk.word_tokenize(message)
@@ -0,0 +1,45 @@
+# The NLTK resources used by the chatbot and their path in the NLTK data directories
+NLTK_RESOURCES: dict[str, str] = {
+    'punkt': 'tokenizers/punkt',
+    'wordnet': 'corpora/wordnet',
+    'omw-1.4': 'corpora/omw-1.4'
+}
+
+# Resources already found by this process
+_found: set[str] = set()
+
+
+def ensure_resource(name: str) -> None:
+    """ Check that an NLTK resource is installed, looking it up once per process.
+    :param name: The name of the resource, a key of NLTK_RESOURCES.
+    :return: None
+    :raises LookupError: If the resource is not installed.
+    """
+    if name in _found:
+        return
+    import nltk
+
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+    except LookupError:
+        raise LookupError(
+            f"The NLTK resource '{name}' is not installed, download it with: python -m services.nlp.resources"
+        ) from None
+    _found.add(name)
+
+
+def download_resources() -> None:
+    """ Download the NLTK resources used by the chatbot.
+    :return: None
+    """
+    import nltk
+
+    for name in NLTK_RESOURCES:
+        nltk.download(name, quiet=True)
+
+
+if __name__ == '__main__':
+    download_resources()
+    for resource in NLTK_RESOURCES:
+        ensure_resource(resource)
+    print(f"NLTK resources installed: {', '.join(NLTK_RESOURCES)}")
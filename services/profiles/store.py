@@ -0,0 +1,304 @@
+import abc
+import json
+import logging
+import sqlite3
+import threading
+import weakref
+from typing import Optional
+
+from services.utils.cache import LRUCache
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id INTEGER PRIMARY KEY,
+    fields TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    user_id INTEGER NOT NULL,
+    room_id INTEGER NOT NULL,
+    rating INTEGER NOT NULL,
+    PRIMARY KEY (user_id, room_id)
+) WITHOUT ROWID;
+"""
+# sqlite3 prepares each statement once and reuses it from its statement cache
+SELECT_PROFILE: str = 'SELECT fields FROM profiles WHERE user_id = ?'
+SELECT_RATINGS: str = 'SELECT room_id, rating FROM ratings WHERE user_id = ?'
+INSERT_PROFILE: str = "INSERT OR IGNORE INTO profiles (user_id, fields) VALUES (?, '{}')"
+UPSERT_PROFILE: str = ('INSERT INTO profiles (user_id, fields) VALUES (?, ?) '
+                       'ON CONFLICT (user_id) DO UPDATE SET fields = excluded.fields')
+UPSERT_RATING: str = ('INSERT INTO ratings (user_id, room_id, rating) VALUES (?, ?, ?) '
+                      'ON CONFLICT (user_id, room_id) DO UPDATE SET rating = excluded.rating')
+DELETE_PROFILE: str = 'DELETE FROM profiles WHERE user_id = ?'
+DELETE_RATINGS: str = 'DELETE FROM ratings WHERE user_id = ?'
+
+
+def copy_profile(profile: dict) -> dict:
+    """
+    Copies a profile, so that the caller cannot modify the stored one.
+    :param profile: the profile
+    :return: the copy
+    """
+    return {**profile, 'ratings': dict(profile['ratings'])}
+
+
+class ProfileStore(abc.ABC):
+    def __init__(self) -> None:
+        """
+        Stores the user profiles: their criteria fields and their room ratings. A read-modify-write of a profile is
+        made while holding the lock of its user, so that concurrent updates of a user cannot interleave.
+        """
+        # A lock is dropped once no thread holds or waits for it
+        self._user_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._user_locks_lock: threading.Lock = threading.Lock()
+
+    def lock(self, user_id: int) -> threading.RLock:
+        """
+        Gets the lock of a user.
+        :param user_id: the user id
+        :return: the lock
+        """
+        with self._user_locks_lock:
+            user_lock = self._user_locks.get(user_id)
+            if user_lock is None:
+                user_lock = self._user_locks[user_id] = threading.RLock()
+            return user_lock
+
+    @abc.abstractmethod
+    def get(self, user_id: int) -> Optional[dict]:
+        """
+        Gets a profile.
+        :param user_id: the user id
+        :return: a copy of the fields of the profile and of its 'ratings', None if the user has no profile
+        """
+
+    @abc.abstractmethod
+    def update(self, user_id: int, fields: dict) -> None:
+        """
+        Sets fields of a profile, creating it if needed.
+        :param user_id: the user id
+        :param fields: the fields to set
+        :return: None
+        """
+
+    @abc.abstractmethod
+    def rate(self, user_id: int, room_id: int, rating: int) -> None:
+        """
+        Saves the rating of a room, creating the profile if needed.
+        :param user_id: the user id
+        :param room_id: the room id
+        :param rating: the rating
+        :return: None
+        """
+
+    @abc.abstractmethod
+    def delete(self, user_id: int) -> None:
+        """
+        Deletes a profile and its ratings.
+        :param user_id: the user id
+        :return: None
+        """
+
+    def flush(self) -> None:
+        """
+        Writes the pending changes.
+        :return: None
+        """
+
+    def close(self) -> None:
+        """
+        Writes the pending changes and releases the resources of the store.
+        :return: None
+        """
+        self.flush()
+
+
+class MemoryProfileStore(ProfileStore):
+    def __init__(self) -> None:
+        """
+        Keeps the profiles in a dict, they are lost when the process stops.
+        """
+        super().__init__()
+        self.profiles: dict[int, dict] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            profile = self.profiles.get(user_id)
+            return copy_profile(profile) if profile is not None else None
+
+    def update(self, user_id: int, fields: dict) -> None:
+        with self._lock:
+            self.profiles.setdefault(user_id, {'ratings': {}}).update(
+                {key: value for key, value in fields.items() if key != 'ratings'}
+            )
+
+    def rate(self, user_id: int, room_id: int, rating: int) -> None:
+        with self._lock:
+            self.profiles.setdefault(user_id, {'ratings': {}})['ratings'][room_id] = rating
+
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self.profiles.pop(user_id, None)
+
+
+class SQLiteProfileStore(ProfileStore):
+    def __init__(self, path: str, flush_interval: float = 0.5, batch_size: int = 1000,
+                 cache_size: int = 10000) -> None:
+        """
+        Keeps the profiles in an SQLite database in WAL mode. Reads go through an LRU cache of profiles, and the
+        changes are written behind: a background thread writes them in one transaction every flush_interval seconds,
+        or as soon as batch_size ratings are pending.
+        :param path: the database file
+        :param flush_interval: the time in seconds between two writes of the pending changes
+        :param batch_size: the number of pending ratings that triggers a write
+        :param cache_size: the number of cached profiles
+        """
+        super().__init__()
+        self.path: str = path
+        self.flush_interval: float = flush_interval
+        self.batch_size: int = batch_size
+        self.cache: LRUCache = LRUCache(maxsize=cache_size)
+        self.connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        # Changes not written yet: the fields of each profile, and the ratings by (user_id, room_id)
+        self.pending_profiles: dict[int, dict] = {}
+        self.pending_ratings: dict[tuple[int, int], int] = {}
+        # _db_lock serializes the use of the connection, and is always acquired before _lock
+        self._db_lock: threading.Lock = threading.Lock()
+        self._lock: threading.Lock = threading.Lock()
+        self._wake: threading.Event = threading.Event()
+        self._closed: bool = False
+        self._flusher: threading.Thread = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        """
+        Writes the pending changes until the store is closed.
+        :return: None
+        """
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The changes stay pending and are written by the next flush
+                logger.exception('Could not write the pending profile changes to %s', self.path)
+
+    def flush(self) -> None:
+        with self._db_lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Writes the pending changes in one transaction, while holding _db_lock. If the transaction fails, the changes
+        are pending again.
+        :return: None
+        """
+        with self._lock:
+            profiles, self.pending_profiles = self.pending_profiles, {}
+            ratings, self.pending_ratings = self.pending_ratings, {}
+        if not profiles and not ratings:
+            return
+        try:
+            with self.connection:
+                self.connection.executemany(INSERT_PROFILE, [(user_id,) for user_id in {key[0] for key in ratings}])
+                self.connection.executemany(UPSERT_PROFILE, [(user_id, json.dumps(fields))
+                                                             for user_id, fields in profiles.items()])
+                self.connection.executemany(UPSERT_RATING, [(user_id, room_id, rating)
+                                                            for (user_id, room_id), rating in ratings.items()])
+        except BaseException:
+            with self._lock:
+                # The changes made during the transaction are more recent than the ones written
+                self.pending_profiles = {**profiles, **self.pending_profiles}
+                self.pending_ratings = {**ratings, **self.pending_ratings}
+            raise
+
+    def _load(self, user_id: int) -> Optional[dict]:
+        """
+        Gets a cached profile, reading it from the database on a miss.
+        :param user_id: the user id
+        :return: the cached profile, None if the user has no profile
+        """
+        with self._lock:
+            profile = self.cache.get(user_id)
+        if profile is not None:
+            return profile
+        with self._db_lock:
+            # No flush runs while _db_lock is held: the database has every change that is not pending, and the pending
+            # ones are applied to the profile below, so that a read does not write them
+            row = self.connection.execute(SELECT_PROFILE, (user_id,)).fetchone()
+            ratings = dict(self.connection.execute(SELECT_RATINGS, (user_id,)).fetchall())
+            with self._lock:
+                profile = self.cache.get(user_id)
+                if profile is not None:
+                    return profile
+                if row is not None:
+                    profile = {**json.loads(row[0]), 'ratings': ratings}
+                profile = self._apply_pending(user_id, profile)
+                if profile is not None:
+                    self.cache.put(user_id, profile)
+                return profile
+
+    def _apply_pending(self, user_id: int, profile: Optional[dict]) -> Optional[dict]:
+        """
+        Applies the pending changes of a user to a profile that is not cached, while holding _lock.
+        :param user_id: the user id
+        :param profile: the profile, None if the user has no profile
+        :return: the updated profile
+        """
+        ratings: dict = profile['ratings'] if profile is not None else {}
+        if user_id in self.pending_profiles:
+            profile = {**self.pending_profiles[user_id], 'ratings': ratings}
+        for (rating_user_id, room_id), rating in self.pending_ratings.items():
+            if rating_user_id == user_id:
+                profile = profile or {'ratings': ratings}
+                profile['ratings'][room_id] = rating
+        return profile
+
+    def get(self, user_id: int) -> Optional[dict]:
+        profile = self._load(user_id)
+        if profile is None:
+            return None
+        with self._lock:
+            return copy_profile(profile)
+
+    def update(self, user_id: int, fields: dict) -> None:
+        loaded = self._load(user_id)
+        with self._lock:
+            profile = self.cache.get(user_id)
+            if profile is None:
+                # The profile was evicted since it was loaded, or the user has no profile yet
+                profile = self._apply_pending(user_id, loaded) or {'ratings': {}}
+            profile.update({key: value for key, value in fields.items() if key != 'ratings'})
+            self.cache.put(user_id, profile)
+            self.pending_profiles[user_id] = {key: value for key, value in profile.items() if key != 'ratings'}
+
+    def rate(self, user_id: int, room_id: int, rating: int) -> None:
+        with self._lock:
+            profile = self.cache.get(user_id)
+            if profile is not None:
+                profile['ratings'][room_id] = rating
+            self.pending_ratings[(user_id, room_id)] = rating
+            if len(self.pending_ratings) >= self.batch_size:
+                self._wake.set()
+
+    def delete(self, user_id: int) -> None:
+        with self._db_lock:
+            self._flush()
+            with self._lock:
+                self.cache.pop(user_id)
+            with self.connection:
+                self.connection.execute(DELETE_RATINGS, (user_id,))
+                self.connection.execute(DELETE_PROFILE, (user_id,))
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        self.connection.close()
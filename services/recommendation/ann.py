@@ -0,0 +1,185 @@
+import hashlib
+import os
+from typing import Optional
+
+import numpy as np
+
+from services.recommendation.scoring import ScoringEngine
+
+# Name of the index file, written in the directory of the room store
+INDEX_FILE: str = 'ivf.npz'
+
+
+class StaleIndex(ValueError):
+    """
+    Raised when an index file was built on other rooms than the ones of the store.
+    """
+
+
+def ids_fingerprint(ids: np.ndarray) -> str:
+    """
+    Hashes room ids, so that an index can be matched with the rooms it was built on.
+    :param ids: the room ids, in row order
+    :return: the sha256 of the ids
+    """
+    return hashlib.sha256(np.ascontiguousarray(ids, dtype=np.int64).tobytes()).hexdigest()
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scales vectors to a unit norm, leaving the vectors without norm at zero.
+    :param vectors: the vectors, one per row
+    :return: the normalized vectors
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray) -> None:
+        """
+        Inverted file index over the room vectors: the rooms are partitioned by spherical k-means, and a search only
+        scores the rooms of the partitions whose centroid is the closest to the user vector.
+        :param centroids: the unit centroid of each partition
+        :param assignments: the partition of each room
+        """
+        self.centroids: np.ndarray = np.asarray(centroids, dtype=np.float32)
+        self.assignments: np.ndarray = np.asarray(assignments, dtype=np.int32)
+        # Rooms sorted by partition, the rooms of partition i being members[indptr[i]:indptr[i + 1]]
+        self.members: np.ndarray = np.argsort(self.assignments, kind='stable')
+        self.indptr: np.ndarray = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.assignments, minlength=len(self.centroids)), out=self.indptr[1:])
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, features: np.ndarray, n_lists: Optional[int] = None, n_iter: int = 10,
+              seed: int = 0) -> 'IVFIndex':
+        """
+        Partitions the room vectors with spherical k-means.
+        :param features: the room vectors, one per row
+        :param n_lists: the number of partitions, about the square root of the number of rooms if None
+        :param n_iter: the number of k-means iterations
+        :param seed: the random seed of the initial centroids
+        :return: the index
+        """
+        vectors = normalize_rows(features)
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+        assignments = np.zeros(len(vectors), dtype=np.int32)
+        for _ in range(n_iter):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            empty = np.flatnonzero(np.bincount(assignments, minlength=n_lists) == 0)
+            # Empty partitions are moved onto random rooms
+            sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+            centroids = normalize_rows(sums)
+        return cls(centroids, np.argmax(vectors @ centroids.T, axis=1))
+
+    def save(self, path: str, ids: np.ndarray) -> None:
+        """
+        Writes the index, with the number of rooms and the fingerprint of their ids.
+        :param path: the .npz file of the index
+        :param ids: the ids of the rooms the index was built on, in row order
+        :return: None
+        """
+        if len(ids) != len(self.assignments):
+            raise ValueError(f'{len(ids)} room ids for an index of {len(self.assignments)} rooms')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, centroids=self.centroids, assignments=self.assignments, n_rooms=len(ids),
+                 fingerprint=ids_fingerprint(ids))
+
+    @classmethod
+    def load(cls, path: str, ids: np.ndarray) -> 'IVFIndex':
+        """
+        Reads an index written by save.
+        :param path: the .npz file of the index
+        :param ids: the ids of the rooms the index is used for, in row order
+        :return: the index
+        :raise StaleIndex: if the index was built on other rooms
+        """
+        with np.load(path) as arrays:
+            if 'fingerprint' not in arrays.files:
+                raise StaleIndex(f'{path} has no room fingerprint')
+            if int(arrays['n_rooms']) != len(ids) or str(arrays['fingerprint']) != ids_fingerprint(ids):
+                raise StaleIndex(f'{path} was built on {int(arrays["n_rooms"])} other rooms than the {len(ids)} given')
+            return cls(arrays['centroids'], arrays['assignments'])
+
+    def candidates(self, user_vector, rows: Optional[np.ndarray] = None, n: int = 5,
+                   n_probe: int = 8) -> np.ndarray:
+        """
+        Finds the rooms of the partitions closest to the user vector. The filtered rooms are applied before probing,
+        and more partitions are probed until there are at least n candidates.
+        :param user_vector: the user vector
+        :param rows: positions of the filtered rooms, all the rooms if None
+        :param n: the minimum number of candidates
+        :param n_probe: the number of partitions to probe
+        :return: positions of the candidate rooms, in room order
+        """
+        allowed = None
+        if rows is not None:
+            allowed = np.zeros(len(self.assignments), dtype=bool)
+            allowed[rows] = True
+        order = np.argsort(-(self.centroids @ np.asarray(user_vector, dtype=np.float32)), kind='stable')
+        found, n_found = [], 0
+        for probed, partition in enumerate(order):
+            if probed >= n_probe and n_found >= n:
+                break
+            members = self.members[self.indptr[partition]:self.indptr[partition + 1]]
+            if allowed is not None:
+                members = members[allowed[members]]
+            found.append(members)
+            n_found += len(members)
+        return np.sort(np.concatenate(found)) if found else np.zeros(0, dtype=np.intp)
+
+    def search(self, scoring_engine: ScoringEngine, user_vector, rows: Optional[np.ndarray] = None, n: int = 5,
+               n_probe: int = 8) -> list[tuple]:
+        """
+        Finds approximately the n rooms most similar to the user vector.
+        :param scoring_engine: the scoring engine of the rooms the index was built on
+        :param user_vector: the user vector
+        :param rows: positions of the filtered rooms, all the rooms if None
+        :param n: the number of rooms to find
+        :param n_probe: the number of partitions to probe
+        :return: (room_id, score) tuples sorted by decreasing score
+        """
+        return scoring_engine.top_n(user_vector, rows=self.candidates(user_vector, rows, n, n_probe), n=n)
+
+
+def recall_at_k(scoring_engine: ScoringEngine, index: IVFIndex, user_vectors: np.ndarray, k: int = 10,
+                n_probe: int = 8, rows: Optional[np.ndarray] = None) -> float:
+    """
+    Measures the share of the exact top k rooms found by the approximate search.
+    :param scoring_engine: the scoring engine of the rooms
+    :param index: the index built on the same rooms
+    :param user_vectors: the user vectors to search for, one per row
+    :param k: the number of rooms to find
+    :param n_probe: the number of partitions to probe
+    :param rows: positions of the filtered rooms, all the rooms if None
+    :return: the mean recall
+    """
+    recalls = []
+    for user_vector in user_vectors:
+        exact = {room_id for room_id, _ in scoring_engine.top_n(user_vector, rows=rows, n=k)}
+        if exact:
+            approximate = {room_id for room_id, _ in index.search(scoring_engine, user_vector, rows, k, n_probe)}
+            recalls.append(len(exact & approximate) / len(exact))
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+if __name__ == '__main__':
+    from data import STORE_PATH, store
+
+    engine = ScoringEngine(store.ids, store.features)
+    ivf_index = IVFIndex.build(engine.matrix)
+    ivf_index.save(os.path.join(STORE_PATH, INDEX_FILE), store.ids)
+    sample = np.random.default_rng(0).choice(len(engine), (100, 5))
+    queries = np.stack([engine.matrix[rooms].mean(axis=0) for rooms in sample])
+    print(f'{ivf_index.n_lists} partitions written to {os.path.join(STORE_PATH, INDEX_FILE)}')
+    for probes in (1, 4, 8, 16):
+        print(f'recall@10 with {probes} probes: {recall_at_k(engine, ivf_index, queries, 10, probes):.3f}')
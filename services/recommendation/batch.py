@@ -0,0 +1,122 @@
+from collections import defaultdict
+from typing import Optional
+
+import numpy as np
+
+from data.room_catalog import RoomCatalog
+from services.recommendation.filter_index import FilterIndex, criteria_key, excluded_columns
+from services.recommendation.scoring import ScoringEngine
+from services.recommendation.user_vector import UserVector
+
+# Number of users scored by one matrix product, bounding the size of the score matrix
+BLOCK_SIZE: int = 512
+
+
+class BatchRecommender:
+    def __init__(self, scoring_engine: ScoringEngine, filter_index: FilterIndex, room_catalog: RoomCatalog,
+                 block_size: int = BLOCK_SIZE, seed: Optional[int] = None) -> None:
+        """
+        Recommends rooms to many users at once: users sharing the same criteria are filtered once and scored
+        together with one matrix-matrix product per block of users.
+        :param scoring_engine: the scoring engine of the catalog
+        :param filter_index: the filter index of the catalog
+        :param room_catalog: the room catalog
+        :param block_size: the number of users scored by one matrix product
+        :param seed: the seed of the random recommendations of users without ratings
+        """
+        self.scoring_engine: ScoringEngine = scoring_engine
+        self.filter_index: FilterIndex = filter_index
+        self.room_catalog: RoomCatalog = room_catalog
+        self.block_size: int = block_size
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
+    def recommend(self, users: list[dict], n: int = 1) -> list[list[tuple]]:
+        """
+        Finds the n most recommendable rooms of each user, like recommend_room does for one user.
+        :param users: the user profiles, with their criteria and ratings
+        :param n: the number of rooms to recommend to each user
+        :return: for each user, a list of (room_id, score, respects_criteria) tuples, the score being None for the
+        random recommendations of users without ratings
+        """
+        recommendations: list[list[tuple]] = [[] for _ in users]
+        groups: dict[tuple, list[int]] = defaultdict(list)
+        for index, user in enumerate(users):
+            groups[criteria_key(user)].append(index)
+
+        # Users whose criteria match no room they have not rated yet get recommendations from the whole catalog
+        fallback_users: list[int] = []
+        for key, members in groups.items():
+            candidates = self.filter_index.filter_criteria(key)
+            is_candidate = np.zeros(len(self.filter_index), dtype=bool)
+            is_candidate[candidates] = True
+            group_users = []
+            for index in members:
+                rated = self.room_catalog.positions(users[index].get('ratings', {}).keys())
+                if np.count_nonzero(is_candidate[rated]) == len(candidates):
+                    fallback_users.append(index)
+                else:
+                    group_users.append(index)
+            self._recommend_group(users, group_users, candidates, n, True, recommendations)
+        self._recommend_group(users, fallback_users, np.arange(len(self.filter_index)), n, False, recommendations)
+        return recommendations
+
+    def _recommend_group(self, users: list[dict], members: list[int], candidates: np.ndarray, n: int,
+                         respects_criteria: bool, recommendations: list[list[tuple]]) -> None:
+        """
+        Recommends rooms to users sharing the same candidate rooms.
+        :param users: the user profiles
+        :param members: the indices of the users of the group
+        :param candidates: positions of the candidate rooms, in room order
+        :param n: the number of rooms to recommend to each user
+        :param respects_criteria: whether the candidates respect the criteria of the users
+        :param recommendations: the recommendations of each user, filled by this method
+        :return: None
+        """
+        scored_users: list[int] = []
+        user_vectors: list[np.ndarray] = []
+        for index in members:
+            user_vector = users[index].get('user_vector')
+            if user_vector is None:
+                user_vector = UserVector(self.room_catalog, users[index].get('ratings'))
+            if len(user_vector) == 0:
+                available = self._available(users[index], candidates, respects_criteria)
+                room_ids = self.rng.choice(self.filter_index.ids[available], size=min(n, len(available)),
+                                           replace=False)
+                recommendations[index] = [(room_id, None, respects_criteria) for room_id in room_ids.tolist()]
+            else:
+                scored_users.append(index)
+                user_vectors.append(user_vector.vector)
+
+        for start in range(0, len(scored_users), self.block_size):
+            block_vectors = np.stack(user_vectors[start:start + self.block_size])
+            scores = self.scoring_engine.scores_many(block_vectors, candidates)
+            for user_scores, index in zip(scores, scored_users[start:start + self.block_size]):
+                if respects_criteria:
+                    user_scores[self._rated_columns(users[index], candidates)] = np.nan
+                is_number = ~np.isnan(user_scores)
+                recommendations[index] = [
+                    (room_id, score, respects_criteria)
+                    for room_id, score in self.scoring_engine.select_top_n(candidates[is_number],
+                                                                           user_scores[is_number], n)
+                ]
+
+    def _rated_columns(self, user: dict, candidates: np.ndarray) -> np.ndarray:
+        """
+        Finds the candidate rooms rated by the user.
+        :param user: the user profile
+        :param candidates: positions of the candidate rooms, in room order
+        :return: the indices of the rated rooms in candidates
+        """
+        return excluded_columns(candidates, self.room_catalog.positions(user.get('ratings', {}).keys()))
+
+    def _available(self, user: dict, candidates: np.ndarray, respects_criteria: bool) -> np.ndarray:
+        """
+        Removes the rooms rated by the user from the candidates, unless the group is the fallback on all the rooms.
+        :param user: the user profile
+        :param candidates: positions of the candidate rooms, in room order
+        :param respects_criteria: whether the candidates respect the criteria of the user
+        :return: positions of the rooms that can be recommended to the user
+        """
+        if not respects_criteria:
+            return candidates
+        return np.delete(candidates, self._rated_columns(user, candidates))
@@ -0,0 +1,207 @@
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.recommendation.user_profile import clean_neighbourhood_group, clean_room_type
+
+NEIGHBOURHOOD_GROUPS: list[str] = ['Bronx', 'Brooklyn', 'Manhattan', 'Queens', 'Staten Island']
+ROOM_TYPES: list[str] = ['Entire home/apt', 'Hotel room', 'Private room', 'Shared room']
+# Criteria of a user profile and the filter parameter they set
+USER_CRITERIA: dict[str, str] = {
+    'min_price': 'min_price',
+    'max_price': 'max_price',
+    'price': 'price',
+    'neighbourhood': 'neighbourhood_group',
+    'room_type': 'room_type',
+    'minimum_nights': 'min_nights',
+    'rating': 'rating',
+}
+
+
+def criteria_key(user: dict) -> tuple:
+    """
+    Normalizes the filter criteria of a user profile like FilterIndex.filter does, so that users whose criteria
+    filter the same rooms share the same key.
+    :param user: the user profile
+    :return: the value of each criterion of USER_CRITERIA, None when it is not set or not used
+    """
+    min_price, max_price, price = (_clean_number(user.get(key)) for key in ('min_price', 'max_price', 'price'))
+    if min_price and max_price and min_price > max_price:
+        min_price, max_price = max_price, min_price
+    if min_price is not None or max_price is not None:
+        # The price is only used without a price range
+        price = None
+    return (
+        min_price,
+        max_price,
+        price,
+        clean_neighbourhood_group(user.get('neighbourhood') or None),
+        clean_room_type(user.get('room_type')),
+        _clean_number(user.get('minimum_nights')) or None,
+        _clean_number(user.get('rating')) or None,
+    )
+
+
+def _clean_number(value) -> Optional[float]:
+    """
+    Converts a numerical criterion, so that equal values of different types share the same key.
+    :param value: the value of the criterion
+    :return: the value as a float, None when it is not set
+    """
+    return float(value) if value is not None else None
+
+
+def exclude_positions(candidates: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Removes some rooms from filtered rooms.
+    :param candidates: positions of the filtered rooms, in room order
+    :param positions: positions of the rooms to remove
+    :return: the positions of the remaining rooms, in room order
+    """
+    if len(positions) == 0:
+        return candidates
+    return np.delete(candidates, excluded_columns(candidates, positions))
+
+
+def excluded_columns(candidates: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Finds some rooms in filtered rooms.
+    :param candidates: positions of the filtered rooms, in room order
+    :param positions: positions of the rooms to find
+    :return: the indices in candidates of the rooms found
+    """
+    columns = np.searchsorted(candidates, positions)
+    is_inside = columns < len(candidates)
+    columns, positions = columns[is_inside], positions[is_inside]
+    return columns[candidates[columns] == positions]
+
+
+class SortedColumn:
+    def __init__(self, values: np.ndarray) -> None:
+        """
+        Keeps a numerical column sorted so that range lookups are two binary searches.
+        :param values: the values of the column, in room order
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.order: np.ndarray = np.argsort(values, kind='stable')
+        self.sorted: np.ndarray = values[self.order]
+        # NaN are sorted last and never satisfy a comparison
+        self.n_valid: int = int(np.count_nonzero(~np.isnan(values)))
+
+    def between(self, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """
+        Finds the rooms whose value is in [low, high].
+        :param low: the lower bound, no bound if None
+        :param high: the upper bound, no bound if None
+        :return: the boolean mask of the rooms in the range
+        """
+        valid = self.sorted[:self.n_valid]
+        start = 0 if low is None else np.searchsorted(valid, low, side='left')
+        end = self.n_valid if high is None else np.searchsorted(valid, high, side='right')
+        mask = np.zeros(len(self.sorted), dtype=bool)
+        mask[self.order[start:end]] = True
+        return mask
+
+
+class FilterIndex:
+    def __init__(self, ids: np.ndarray, price: np.ndarray, minimum_nights: np.ndarray, rating: np.ndarray,
+                 features: np.ndarray, feature_columns: Iterable[str],
+                 id_positions: Optional[dict[int, int]] = None) -> None:
+        """
+        Index built once over the room profiles to apply the filterBy criteria without copying the dataframe.
+        :param ids: the room ids
+        :param price: the price of each room
+        :param minimum_nights: the minimum number of nights of each room
+        :param rating: the rating of each room
+        :param features: the room vectors, one column per feature
+        :param feature_columns: the name of each feature column
+        :param id_positions: the row of each room id, built from ids if None
+        """
+        self.ids: np.ndarray = np.asarray(ids)
+        self.price: SortedColumn = SortedColumn(price)
+        self.minimum_nights: SortedColumn = SortedColumn(minimum_nights)
+        self.rating: SortedColumn = SortedColumn(rating)
+        self.features: np.ndarray = features
+        self.feature_positions: dict[str, int] = {column: index for index, column in enumerate(feature_columns)}
+        if id_positions is None:
+            id_positions = {room_id: index for index, room_id in enumerate(self.ids.tolist())}
+        self.id_positions: dict[int, int] = id_positions
+        self.column_masks: dict[str, np.ndarray] = {}
+        for column in NEIGHBOURHOOD_GROUPS + ROOM_TYPES:
+            if column in self.feature_positions:
+                self.column_mask(column)
+
+    @classmethod
+    def from_frame(cls, room_profiles: pd.DataFrame, feature_columns,
+                   features: Optional[np.ndarray] = None) -> 'FilterIndex':
+        """
+        Builds the index from a room profiles dataframe.
+        :param room_profiles: dataframe containing the room profiles
+        :param feature_columns: the columns holding the room vectors
+        :param features: the room vectors if they are already extracted from the dataframe
+        :return: the filter index
+        """
+        if features is None:
+            features = room_profiles[feature_columns].to_numpy()
+        return cls(room_profiles.id.to_numpy(), room_profiles.price.to_numpy(),
+                   room_profiles.minimum_nights.to_numpy(), room_profiles.rating.to_numpy(), features,
+                   feature_columns)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def column_mask(self, column: str) -> np.ndarray:
+        """
+        Finds the rooms having a non-zero value for a one-hot encoded feature.
+        :param column: the feature column
+        :return: the boolean mask of the rooms
+        """
+        if column not in self.column_masks:
+            if column not in self.feature_positions:
+                raise KeyError(column)
+            self.column_masks[column] = self.features[:, self.feature_positions[column]] != 0.0
+        return self.column_masks[column]
+
+    def filter(self, price=None, min_price=None, max_price=None, rating=None, neighbourhood_group=None,
+               room_type=None, min_nights=None, rooms_to_exclude=None) -> np.ndarray:
+        """
+        Filters the rooms like filterBy, by intersecting precomputed masks.
+        :param price: a price from which we will find the room of this price ± 20€
+        :param min_price: minimum price for a room
+        :param max_price: maximum price for a room
+        :param rating: minimum rating for a room
+        :param neighbourhood_group: filters by neighbourhood_group
+        :param room_type: filters by room_type
+        :param min_nights: minimum number of nights for the room
+        :param rooms_to_exclude: ids of the rooms to remove
+        :return: the positions of the filtered rooms, in room order
+        """
+        if min_price and max_price and min_price > max_price:
+            min_price, max_price = max_price, min_price
+        mask = np.ones(len(self), dtype=bool)
+        if min_price is not None or max_price is not None:
+            mask &= self.price.between(min_price, max_price)
+        if price is not None and min_price is None and max_price is None:
+            mask &= self.price.between(price - 20, price + 20)
+        if rating:
+            mask &= self.rating.between(low=rating)
+        if neighbourhood_group:
+            mask &= self.column_mask(clean_neighbourhood_group(neighbourhood_group))
+        if room_type := clean_room_type(room_type):
+            mask &= self.column_mask(room_type)
+        if min_nights:
+            mask &= self.minimum_nights.between(low=min_nights)
+        if rooms_to_exclude:
+            positions = [self.id_positions[room_id] for room_id in rooms_to_exclude if room_id in self.id_positions]
+            mask[positions] = False
+        return np.flatnonzero(mask)
+
+    def filter_criteria(self, key: tuple, rooms_to_exclude=None) -> np.ndarray:
+        """
+        Filters the rooms with the criteria of a criteria_key.
+        :param key: the criteria key of a user profile
+        :param rooms_to_exclude: ids of the rooms to remove
+        :return: the positions of the filtered rooms, in room order
+        """
+        return self.filter(**dict(zip(USER_CRITERIA.values(), key)), rooms_to_exclude=rooms_to_exclude)
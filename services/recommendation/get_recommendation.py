@@ -1,50 +1,97 @@
+import os
+from typing import Optional
+
 import numpy as np
-import pandas as pd
 
-from data import df
-from services.recommendation.similarity import cosine_similarity
-from services.recommendation.user_profile import filterBy
+import data
+from data import STORE_PATH
+from data.room_catalog import RoomCatalog
+from data.room_store import RoomStore
+from services.recommendation.ann import INDEX_FILE, IVFIndex, StaleIndex
+from services.recommendation.batch import BatchRecommender
+from services.recommendation.filter_index import FilterIndex, criteria_key, exclude_positions
+from services.recommendation.scoring import ScoringEngine, make_scoring_engine
+from services.recommendation.user_vector import UserVector
+from services.utils import LRUCache
+
+# 'dense' float32 matrix or 'sparse' CSR room vectors
+RECOMMENDATION_BACKEND: str = os.getenv('RECOMMENDATION_BACKEND', 'dense')
+# 'exact' scores every filtered room, 'approximate' only the rooms of the closest partitions of the IVF index
+RECOMMENDATION_MODE: str = os.getenv('RECOMMENDATION_MODE', 'exact')
+ANN_PROBES: int = int(os.getenv('ANN_PROBES', '8'))
+# Filtered rooms of the most recent criteria, before removing the rooms rated by the user
+CANDIDATE_CACHE_SIZE: int = int(os.getenv('CANDIDATE_CACHE_SIZE', '1024'))
+CANDIDATE_CACHE_TTL: float = float(os.getenv('CANDIDATE_CACHE_TTL', '3600'))
 
+candidate_cache: LRUCache = LRUCache(maxsize=CANDIDATE_CACHE_SIZE, ttl=CANDIDATE_CACHE_TTL)
 
-def normalize_df(df, cols_to_norm):
-    df = df.copy()
-    for col in cols_to_norm:
-        df[col] = df[col] * df.rating / 5
-    return df
+store: RoomStore
+catalog: RoomCatalog
+scoring_engine: ScoringEngine
+filter_index: FilterIndex
+ann_index: Optional[IVFIndex]
 
 
-def create_user_profile(room_profiles, user_ratings):
+def load_ann_index() -> Optional[IVFIndex]:
     """
-    We create the user profile from the ratings they gave on some rooms.
-    :param room_profiles: dataframe with the room profiles
-    :param user_ratings: dictionnary of room_id and the rating the user gave to the room
-    :return: A dataframe containing only the rooms the user liked with their rating
+    Loads the IVF index built by `python -m services.recommendation.ann` when the approximate mode is configured. The
+    index is built again if the file is missing or was built on other rooms than the ones of the store.
+    :return: the index, None in exact mode
     """
-    user_profile = pd.DataFrame()
-    for room_id, rating in user_ratings.items():
-        row = room_profiles.loc[room_profiles.id == room_id]
-        row.loc[:, 'rating'] = rating
-        user_profile = pd.concat([user_profile, row], ignore_index=True)
-    return user_profile
+    if RECOMMENDATION_MODE == 'exact':
+        return None
+    if RECOMMENDATION_MODE != 'approximate':
+        raise ValueError(f'Unknown recommendation mode: {RECOMMENDATION_MODE}')
+    index_path = os.path.join(STORE_PATH, INDEX_FILE)
+    if not os.path.exists(index_path):
+        print(f'{index_path} not found, building the IVF index')
+        return IVFIndex.build(store.features)
+    try:
+        return IVFIndex.load(index_path, store.ids)
+    except StaleIndex as error:
+        print(f'{error}, building the IVF index')
+        return IVFIndex.build(store.features)
 
 
-def proceed_room_recommendation(room_profiles_norm, user_vector: pd.Series, n: int = 5) -> list:
+def load_catalog() -> None:
     """
-    Finds the n most recommendable rooms to the user with the given user_id.
-    :param room_profiles_norm: dataframe containing the room profiles
-    :param user_vector: the user vector
-    :param n: the number of recommendable rooms to find
-    :return: the n most recommendable rooms to the user with the given user_id
+    Builds the scoring engine and the indexes of data.store, and invalidates the candidate cache.
+    :return: None
+    """
+    global store, catalog, scoring_engine, filter_index, ann_index
+    store, catalog = data.store, data.catalog
+    scoring_engine = make_scoring_engine(store.ids, store.features, backend=RECOMMENDATION_BACKEND)
+    filter_index = FilterIndex(store.ids, store.columns['price'], store.columns['minimum_nights'],
+                               store.columns['rating'], store.features, store.feature_columns,
+                               id_positions=catalog.id_positions)
+    ann_index = load_ann_index()
+    candidate_cache.clear()
+
+
+def reload_catalog() -> None:
+    """
+    Reloads the room profiles, after the store has been rebuilt.
+    :return: None
+    """
+    data.reload()
+    load_catalog()
+
+
+load_catalog()
+
+
+def filter_candidates(key: tuple) -> np.ndarray:
+    """
+    Filters the rooms with the criteria of a user, reusing the result of the previous users with the same criteria.
+    :param key: the criteria key of the user profile
+    :return: the positions of the filtered rooms, read-only
     """
-    cols = df.columns[6:]
-    similarity_scores = []
-    for index, row in room_profiles_norm.iterrows():
-        room_id = row.id
-        room_vector = list(room_profiles_norm.loc[room_profiles_norm.id == room_id][cols].values[0])
-        similarity_scores.append((room_id, cosine_similarity(user_vector, room_vector)))
-    similarity_scores = [x for x in similarity_scores if not np.isnan(x[1])]
-    similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
-    return similarity_scores[:n]
+    candidates = candidate_cache.get(key)
+    if candidates is None:
+        candidates = filter_index.filter_criteria(key)
+        candidates.setflags(write=False)
+        candidate_cache.put(key, candidates)
+    return candidates
 
 
 def recommend_room(user: dict) -> tuple[int, bool]:
@@ -53,29 +100,33 @@ def recommend_room(user: dict) -> tuple[int, bool]:
     :param user: the user profile
     :return: the n most recommendable rooms to the user with the given user_id
     """
-    print(f"Criteria: {user}")
-    df_copy = df.copy()
-    user_profile = create_user_profile(df_copy, user.get('ratings', {}))
+    # The bot keeps the user vector up to date when a rating is saved, otherwise it is built from the ratings
+    user_vector: Optional[UserVector] = user.get('user_vector')
+    if user_vector is None or user_vector.room_catalog is not catalog:
+        user_vector = UserVector(catalog, user.get('ratings', {}))
     respects_criteria: bool = True
-    filtered_rooms = filterBy(
-        df_copy,
-        min_price=user.get("min_price"),
-        max_price=user.get("max_price"),
-        price=user.get("price"),
-        neighbourhood_group=user.get("neighbourhood"),
-        room_type=user.get("room_type"),
-        min_nights=user.get("minimum_nights"),
-        rating=user.get("rating"),
-        rooms_to_exclude=user.get('ratings', {}).keys()
-    )
+    filtered_rooms = exclude_positions(filter_candidates(criteria_key(user)),
+                                       catalog.positions(user.get('ratings', {}).keys()))
     if len(filtered_rooms) == 0:
         respects_criteria = False
-        filtered_rooms = df_copy
+        filtered_rooms = np.arange(len(filter_index))
 
-    if len(user_profile) > 0:
-        user_profile = normalize_df(user_profile, filtered_rooms.columns[6:])
-        user_vector = user_profile[filtered_rooms.columns[6:]].mean()
-        recommended_rooms = proceed_room_recommendation(filtered_rooms, user_vector, n=1)
+    if len(user_vector) > 0:
+        if ann_index is not None:
+            recommended_rooms = ann_index.search(scoring_engine, user_vector.vector, rows=filtered_rooms, n=1,
+                                                 n_probe=ANN_PROBES)
+        else:
+            recommended_rooms = scoring_engine.top_n(user_vector.vector, rows=filtered_rooms, n=1)
         return recommended_rooms[0][0], respects_criteria
 
-    return np.random.choice(filtered_rooms.id), respects_criteria
+    return filter_index.ids[np.random.choice(filtered_rooms)], respects_criteria
+
+
+def recommend_rooms(users: list[dict], n: int = 1) -> list[list[tuple]]:
+    """
+    Finds the n most recommendable rooms to each of many users, grouping the users that share the same criteria.
+    :param users: the user profiles
+    :param n: the number of rooms to recommend to each user
+    :return: for each user, a list of (room_id, score, respects_criteria) tuples
+    """
+    return BatchRecommender(scoring_engine, filter_index, catalog).recommend(users, n=n)
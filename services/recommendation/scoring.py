@@ -0,0 +1,232 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SCORE_DECIMALS: int = 6
+
+
+class ScoringEngine:
+    def __init__(self, ids: np.ndarray, features: np.ndarray) -> None:
+        """
+        Keeps the room vectors as one contiguous float32 matrix with their precomputed norms, so that a user vector
+        can be scored against every candidate room with a single matrix-vector product.
+        :param ids: the room ids, one per row of features
+        :param features: the room vectors
+        """
+        self.ids: np.ndarray = np.asarray(ids)
+        self.matrix: np.ndarray = np.ascontiguousarray(features, dtype=np.float32)
+        self.norms: np.ndarray = np.linalg.norm(self.matrix, axis=1)
+        self.n_features: int = self.matrix.shape[1]
+        if len(self.ids) != len(self.matrix):
+            raise ValueError('There must be one id per room vector')
+
+    @classmethod
+    def from_frame(cls, room_profiles: pd.DataFrame, feature_columns) -> 'ScoringEngine':
+        """
+        Builds the engine from a room profiles dataframe.
+        :param room_profiles: dataframe containing the room profiles
+        :param feature_columns: the columns holding the room vectors
+        :return: the scoring engine
+        """
+        return cls(room_profiles.id.to_numpy(), room_profiles[feature_columns].to_numpy(dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.norms.nbytes
+
+    def get_vector(self, row: int) -> np.ndarray:
+        """
+        Gets the vector of a room.
+        :param row: the position of the room
+        :return: the room vector
+        """
+        return self.matrix[row]
+
+    def scores(self, user_vector, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculates the cosine similarity between the user vector and the rooms.
+        :param user_vector: the user vector
+        :param rows: positions of the candidate rooms, all the rooms if None
+        :return: the similarity of each candidate room, NaN where a vector has no norm
+        """
+        user_vector = self._to_dense(user_vector)
+        if rows is None:
+            dots, norms = self.matrix @ user_vector, self.norms
+        elif len(rows) > len(self) // 2:
+            # Scoring everything is cheaper than gathering most of the rows into a copy
+            dots, norms = (self.matrix @ user_vector)[rows], self.norms[rows]
+        else:
+            dots, norms = self.matrix[rows] @ user_vector, self.norms[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.abs(dots / (norms * np.linalg.norm(user_vector)))
+
+    def _to_dense(self, user_vector) -> np.ndarray:
+        """
+        Checks the user vector, scattering it if it is given as sparse (indices, values).
+        :param user_vector: the user vector, dense or sparse
+        :return: the dense float32 user vector
+        """
+        if isinstance(user_vector, tuple):
+            indices, values = user_vector
+            dense = np.zeros(self.n_features, dtype=np.float32)
+            dense[np.asarray(indices, dtype=np.intp)] = values
+            return dense
+        user_vector = np.asarray(user_vector, dtype=np.float32)
+        if user_vector.shape != (self.n_features,):
+            raise ValueError('Vectors must have the same length')
+        return user_vector
+
+    def dense_rows(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Gets the vectors of some rooms as a dense matrix.
+        :param rows: positions of the rooms, all the rooms if None
+        :return: the room vectors, one row per room
+        """
+        return self.matrix if rows is None else self.matrix[rows]
+
+    def scores_many(self, user_vectors: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculates the cosine similarity between several user vectors and the rooms with one matrix product.
+        :param user_vectors: the user vectors, one row per user
+        :param rows: positions of the candidate rooms, all the rooms if None
+        :return: the similarities, one row per user and one column per candidate room
+        """
+        user_vectors = np.asarray(user_vectors, dtype=np.float32)
+        if user_vectors.ndim != 2 or user_vectors.shape[1] != self.n_features:
+            raise ValueError('Vectors must have the same length')
+        norms = self.norms if rows is None else self.norms[rows]
+        dots = user_vectors @ self.dense_rows(rows).T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.abs(dots / np.outer(np.linalg.norm(user_vectors, axis=1), norms))
+
+    def top_n(self, user_vector, rows: Optional[np.ndarray] = None, n: int = 5) -> list[tuple]:
+        """
+        Finds the n rooms most similar to the user vector.
+        :param user_vector: the user vector
+        :param rows: positions of the candidate rooms, all the rooms if None
+        :param n: the number of rooms to find
+        :return: (room_id, score) tuples sorted by decreasing score, ties kept in candidate order
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.intp)
+        scores = self.scores(user_vector, rows)
+        is_number = ~np.isnan(scores)
+        rows, scores = rows[is_number], scores[is_number]
+        return self.select_top_n(rows, scores, n)
+
+    def select_top_n(self, rows: np.ndarray, scores: np.ndarray, n: int) -> list[tuple]:
+        """
+        Selects the n best scored rows without sorting all of them.
+        :param rows: positions of the scored rooms
+        :param scores: the score of each room, without NaN
+        :param n: the number of rooms to keep
+        :return: (room_id, score) tuples sorted by decreasing score, ties kept in candidate order
+        """
+        if n <= 0:
+            return []
+        # Rooms sharing the same features only differ by their rating scale, so their similarities are equal up to
+        # float32 rounding: rank on rounded scores to keep such ties in candidate order
+        ranks = np.round(scores, SCORE_DECIMALS)
+        if n < len(ranks):
+            nth_best = ranks[np.argpartition(-ranks, n - 1)[n - 1]]
+            # Keep every tie of the nth score so that the stable sort below picks the same rooms as a full sort
+            is_candidate = ranks >= nth_best
+            rows, scores, ranks = rows[is_candidate], scores[is_candidate], ranks[is_candidate]
+        best = np.argsort(-ranks, kind='stable')[:n]
+        return list(zip(self.ids[rows[best]].tolist(), scores[best].tolist()))
+
+
+class SparseScoringEngine(ScoringEngine):
+    def __init__(self, ids: np.ndarray, features: np.ndarray) -> None:
+        """
+        Keeps the one-hot room vectors in CSR form: only the few non-zero features of each room are stored and
+        scored, instead of the hundreds of dummies of the dense matrix. Only the engine is smaller: it is built from the
+        dense room vectors, which the room store still keeps, memory-mapped, and the filter index and room catalog
+        still read.
+        :param ids: the room ids, one per row of features
+        :param features: the dense room vectors
+        """
+        self.ids: np.ndarray = np.asarray(ids)
+        self.n_features: int = features.shape[1]
+        if len(self.ids) != features.shape[0]:
+            raise ValueError('There must be one id per room vector')
+        rows, indices = np.nonzero(features)
+        self.indices: np.ndarray = indices.astype(np.int32)
+        self.data: np.ndarray = np.asarray(features[rows, indices], dtype=np.float32)
+        self.indptr: np.ndarray = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.ids)), out=self.indptr[1:])
+        self.norms: np.ndarray = np.sqrt(np.bincount(rows, weights=self.data ** 2, minlength=len(self.ids)))
+        # Same values sorted by feature (CSC), so that a sparse user vector only reads the rooms sharing its features
+        by_feature = np.argsort(self.indices, kind='stable')
+        self.feature_rows: np.ndarray = rows[by_feature].astype(np.int32)
+        self.feature_data: np.ndarray = self.data[by_feature]
+        self.feature_indptr: np.ndarray = np.zeros(self.n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.n_features), out=self.feature_indptr[1:])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.indices, self.data, self.indptr, self.norms,
+                                              self.feature_rows, self.feature_data, self.feature_indptr))
+
+    def get_vector(self, row: int) -> np.ndarray:
+        """
+        Densifies the vector of a room.
+        :param row: the position of the room
+        :return: the dense room vector
+        """
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        start, end = self.indptr[row], self.indptr[row + 1]
+        vector[self.indices[start:end]] = self.data[start:end]
+        return vector
+
+    def dense_rows(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Densifies the vectors of some rooms.
+        :param rows: positions of the rooms, all the rooms if None
+        :return: the room vectors, one row per room
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.intp)
+        starts, lengths = self.indptr[rows], np.diff(self.indptr)[rows]
+        values = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        matrix = np.zeros((len(rows), self.n_features), dtype=np.float32)
+        matrix[np.repeat(np.arange(len(rows)), lengths), self.indices[values]] = self.data[values]
+        return matrix
+
+    def scores(self, user_vector, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculates the cosine similarity between the user vector and the rooms with a sparse dot product.
+        :param user_vector: the user vector, dense or sparse (indices, values)
+        :param rows: positions of the candidate rooms, all the rooms if None
+        :return: the similarity of each candidate room, NaN where a vector has no norm
+        """
+        user_vector = self._to_dense(user_vector)
+        features = np.flatnonzero(user_vector)
+        starts, ends = self.feature_indptr[features], self.feature_indptr[features + 1]
+        lengths = ends - starts
+        # Positions of the stored values of the user features, concatenated
+        values = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        weights = self.feature_data[values] * np.repeat(user_vector[features], lengths)
+        dots = np.bincount(self.feature_rows[values], weights=weights, minlength=len(self))
+        norms = self.norms
+        if rows is not None:
+            dots, norms = dots[rows], norms[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.abs(dots / (norms * np.linalg.norm(user_vector)))
+
+
+def make_scoring_engine(ids: np.ndarray, features: np.ndarray, backend: str = 'dense') -> ScoringEngine:
+    """
+    Builds the scoring engine of the given backend.
+    :param ids: the room ids, one per row of features
+    :param features: the room vectors
+    :param backend: 'dense' or 'sparse'
+    :return: the scoring engine
+    """
+    if backend == 'dense':
+        return ScoringEngine(ids, features)
+    if backend == 'sparse':
+        return SparseScoringEngine(ids, features)
+    raise ValueError(f'Unknown scoring backend: {backend}')
@@ -11,6 +11,12 @@ def clean_room_type(room_type):
         return "Shared room"
 
 
+def clean_neighbourhood_group(neighbourhood_group):
+    if neighbourhood_group == 'Staten':
+        return 'Staten Island'
+    return neighbourhood_group
+
+
 def filterBy(room_profiles, price=None, min_price=None, max_price=None, rating=None, neighbourhood_group=None,
              room_type=None, min_nights=None, rooms_to_exclude=None):
     """
@@ -0,0 +1,53 @@
+from typing import Optional
+
+import numpy as np
+
+from data.room_catalog import RoomCatalog
+
+
+class UserVector:
+    def __init__(self, room_catalog: RoomCatalog, user_ratings: Optional[dict] = None) -> None:
+        """
+        Running mean of the room vectors rated by a user, each weighted by its rating / 5, so that recording a rating
+        costs O(features) instead of rebuilding the user profile from all the ratings.
+        :param room_catalog: the room catalog
+        :param user_ratings: dictionnary of room_id and the rating the user gave to the room
+        """
+        self.room_catalog: RoomCatalog = room_catalog
+        self.total: np.ndarray = np.zeros(len(room_catalog.store.feature_columns), dtype=np.float64)
+        # Ratings of the rooms of the catalog, the other ones are not part of the user profile
+        self.ratings: dict[int, float] = {}
+        for room_id, rating in (user_ratings or {}).items():
+            self.rate(room_id, rating)
+
+    def __repr__(self) -> str:
+        return f'UserVector({len(self)} ratings)'
+
+    def __len__(self) -> int:
+        return len(self.ratings)
+
+    def rate(self, room_id: int, rating: float) -> None:
+        """
+        Adds the rating of a room, replacing the previous rating of the user for this room.
+        :param room_id: the room id
+        :param rating: the rating the user gave to the room
+        :return: None
+        """
+        room_vector = self.room_catalog.get_vector(room_id)
+        if room_vector is None:
+            return
+        room_vector = room_vector.astype(np.float64)
+        if room_id in self.ratings:
+            self.total -= room_vector * self.ratings[room_id] / 5
+        self.total += room_vector * rating / 5
+        self.ratings[room_id] = rating
+
+    @property
+    def vector(self) -> Optional[np.ndarray]:
+        """
+        The user vector, equal to the mean of the normalized user profile.
+        :return: the user vector, None if the user did not rate any room of the catalog
+        """
+        if not self.ratings:
+            return None
+        return self.total / len(self.ratings)
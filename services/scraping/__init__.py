@@ -1 +1,5 @@
 from .scrape import get_url, get_id_from_url
+from .crawler import Crawler, crawl
+from .results import ResultStore, enrich, compact
+from .pipeline import ScrapingPipeline
+from .cache import HTMLCache, OfflineMiss
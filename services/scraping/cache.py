@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# The cache is only used when HTML_CACHE_PATH is set
+HTML_CACHE_PATH: str = os.getenv('HTML_CACHE_PATH', '')
+# The time in seconds a page is served from the cache, 0 for no limit
+HTML_CACHE_TTL: float = float(os.getenv('HTML_CACHE_TTL', '2592000'))
+# The size in bytes of the compressed pages kept
+HTML_CACHE_SIZE: int = int(os.getenv('HTML_CACHE_SIZE', '1073741824'))
+# Whether the pages are only read from the cache, never fetched
+HTML_CACHE_OFFLINE: bool = os.getenv('HTML_CACHE_OFFLINE', '') == '1'
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+SELECT_PAGE: str = 'SELECT digest, stored_at FROM pages WHERE url = ?'
+TOUCH_PAGE: str = 'UPDATE pages SET accessed_at = ? WHERE url = ?'
+UPSERT_PAGE: str = ('INSERT INTO pages (url, digest, stored_at, accessed_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (url) DO UPDATE SET digest = excluded.digest, stored_at = excluded.stored_at, '
+                    'accessed_at = excluded.accessed_at')
+INSERT_BLOB: str = 'INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)'
+SELECT_SIZE: str = 'SELECT COALESCE(SUM(size), 0) FROM blobs'
+SELECT_LEAST_RECENT: str = 'SELECT url, digest FROM pages ORDER BY accessed_at, rowid LIMIT 1'
+DELETE_PAGE: str = 'DELETE FROM pages WHERE url = ?'
+SELECT_REFERENCED: str = 'SELECT 1 FROM pages WHERE digest = ? LIMIT 1'
+SELECT_BLOB_SIZE: str = 'SELECT size FROM blobs WHERE digest = ?'
+DELETE_BLOB: str = 'DELETE FROM blobs WHERE digest = ?'
+
+
+class OfflineMiss(LookupError):
+    """ Raised when a page is not in the cache of an offline scraper
+    """
+
+
+class HTMLCache:
+    def __init__(self, path: str, ttl: float = HTML_CACHE_TTL, max_size: int = HTML_CACHE_SIZE,
+                 offline: bool = False) -> None:
+        """ Keeps raw pages on disk, compressed with gzip. The files are named after the sha256 of their content, so
+        that identical pages are stored once, and an SQLite index maps each url to its file. When the files take more
+        than max_size bytes, the least recently read pages are removed.
+        :param path: str, the directory of the cache
+        :param ttl: float, the time in seconds a page is served, 0 for no limit, ignored offline
+        :param max_size: int, the size in bytes of the compressed pages kept
+        :param offline: bool, whether the pages are only read from the cache, the expired ones included
+        """
+        self.path: str = path
+        self.ttl: float = ttl
+        self.max_size: int = max_size
+        self.offline: bool = offline
+        os.makedirs(os.path.join(path, 'objects'), exist_ok=True)
+        self.connection: sqlite3.Connection = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+        self.size: int = self.connection.execute(SELECT_SIZE).fetchone()[0]
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._accessed_at: float = 0.0
+
+    @property
+    def stats(self) -> dict:
+        """ Gets the statistics of the cache
+        :return: dict, the size in bytes of the compressed pages, the number of hits, misses and evicted pages, and
+        the hit rate
+        """
+        lookups: int = self.hits + self.misses
+        return {
+            'size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def _blob_path(self, digest: str) -> str:
+        """ Gets the file of a page
+        :param digest: str, the sha256 of the page
+        :return: str, the path of the file
+        """
+        return os.path.join(self.path, 'objects', digest[:2], f'{digest[2:]}.gz')
+
+    def _access_time(self) -> float:
+        """ Gets the access time of a page, while holding _lock. The times are strictly increasing, so that pages read
+        within the resolution of the clock are still evicted in the order they were read
+        :return: float, the time in seconds since the epoch
+        """
+        self._accessed_at = max(time.time(), self._accessed_at + 1e-6)
+        return self._accessed_at
+
+    def get(self, url: str) -> Optional[str]:
+        """ Gets a page
+        :param url: str, the url of the page
+        :return: str, the html of the page, None if it is not cached or expired
+        """
+        now: float = time.time()
+        with self._lock:
+            row = self.connection.execute(SELECT_PAGE, (url,)).fetchone()
+            if row is None or (self.ttl and not self.offline and row[1] + self.ttl < now):
+                self.misses += 1
+                return None
+            try:
+                with open(self._blob_path(row[0]), 'rb') as file:
+                    html: str = gzip.decompress(file.read()).decode('utf-8')
+            except OSError:
+                # The file was removed by hand
+                self.misses += 1
+                return None
+            with self.connection:
+                self.connection.execute(TOUCH_PAGE, (self._access_time(), url))
+            self.hits += 1
+            return html
+
+    def put(self, url: str, html: str) -> None:
+        """ Saves a page, replacing the previous one of its url, then removes the least recently read pages if the
+        cache is full
+        :param url: str, the url of the page
+        :param html: str, the html of the page
+        """
+        content: bytes = html.encode('utf-8')
+        digest: str = hashlib.sha256(content).hexdigest()
+        path: str = self._blob_path(digest)
+        now: float = time.time()
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Written next to its final path then renamed, so that a reader never reads a partial file
+                temporary_path: str = f'{path}.{threading.get_ident()}.tmp'
+                with open(temporary_path, 'wb') as file:
+                    file.write(gzip.compress(content))
+                os.replace(temporary_path, path)
+            previous = self.connection.execute(SELECT_PAGE, (url,)).fetchone()
+            with self.connection:
+                inserted: int = self.connection.execute(INSERT_BLOB, (digest, os.path.getsize(path))).rowcount
+                self.connection.execute(UPSERT_PAGE, (url, digest, now, self._access_time()))
+            if inserted:
+                self.size += os.path.getsize(path)
+            if previous is not None and previous[0] != digest:
+                self._release(previous[0])
+            self._evict()
+
+    def _release(self, digest: str) -> None:
+        """ Removes the file of a page if no url has it anymore, while holding _lock
+        :param digest: str, the sha256 of the page
+        """
+        if self.connection.execute(SELECT_REFERENCED, (digest,)).fetchone() is not None:
+            return
+        row = self.connection.execute(SELECT_BLOB_SIZE, (digest,)).fetchone()
+        with self.connection:
+            self.connection.execute(DELETE_BLOB, (digest,))
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+        if row is not None:
+            self.size -= row[0]
+
+    def _evict(self) -> None:
+        """ Removes the least recently read pages until the files take at most max_size bytes, while holding _lock
+        """
+        while self.size > self.max_size:
+            row = self.connection.execute(SELECT_LEAST_RECENT).fetchone()
+            if row is None:
+                return
+            url, digest = row
+            with self.connection:
+                self.connection.execute(DELETE_PAGE, (url,))
+            self.evictions += 1
+            self._release(digest)
+
+    def close(self) -> None:
+        """ Closes the index
+        """
+        self.connection.close()
+
+
+_cache: Optional[HTMLCache] = None
+_cache_lock: threading.Lock = threading.Lock()
+
+
+def get_cache() -> Optional[HTMLCache]:
+    """ Gets the cache configured by the HTML_CACHE_* environment variables, opened on first use
+    :return: HTMLCache, the cache, None if HTML_CACHE_PATH is not set
+    """
+    global _cache
+    if not HTML_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTMLCache(HTML_CACHE_PATH, offline=HTML_CACHE_OFFLINE)
+        return _cache
@@ -0,0 +1,208 @@
+import asyncio
+import random
+from typing import AsyncIterator, Iterable, Optional, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .cache import HTMLCache, get_cache
+from .scrape import get_data, get_url
+
+# The url of a room, formatted with its room_id
+ROOM_URL: str = 'https://www.airbnb.com/rooms/{room_id}'
+# Status codes of the responses worth retrying
+RETRY_STATUSES: frozenset = frozenset({429, 500, 502, 503, 504})
+# Status codes of the pages that do not exist, the other errors, like a 403 of a blocked crawler, are failures
+GONE_STATUSES: frozenset = frozenset({404, 410})
+
+
+class RateLimiter:
+    def __init__(self, rate: Optional[float]) -> None:
+        """ Spaces the requests sent to each host.
+        :param rate: float, the maximum number of requests per second to a host, None for no limit
+        """
+        self.interval: float = 1 / rate if rate else 0.0
+        # The time at which each host can be requested again
+        self.next_times: dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        """ Waits until a host can be requested
+        :param host: str, the host
+        """
+        if not self.interval:
+            return
+        now: float = asyncio.get_running_loop().time()
+        time: float = max(now, self.next_times.get(host, now))
+        self.next_times[host] = time + self.interval
+        if time > now:
+            await asyncio.sleep(time - now)
+
+
+class Crawler:
+    def __init__(self, url_template: str = ROOM_URL, concurrency: int = 32, rate: Optional[float] = 10.0,
+                 retries: int = 3, backoff: float = 0.5, timeout: float = 30.0,
+                 headers: Optional[dict] = None, backend: str = 'html.parser',
+                 cache: Optional[HTMLCache] = None) -> None:
+        """ Fetches the pages of many rooms concurrently through one pooled session.
+        A request failing with a connection error, a timeout or a RETRY_STATUSES status is retried after
+        backoff * 2 ** attempt seconds, plus a random jitter of up to backoff seconds.
+        :param url_template: str, the url of a room, formatted with its room_id
+        :param concurrency: int, the maximum number of rooms fetched at the same time
+        :param rate: float, the maximum number of requests per second to a host, None for no limit
+        :param retries: int, the number of retries of a request
+        :param backoff: float, the time in seconds before the first retry
+        :param timeout: float, the time in seconds a request can take
+        :param headers: dict, the headers sent with every request
+        :param backend: str, the backend extracting the data of the rooms, see get_data
+        :param cache: HTMLCache, the cache of the pages, the one configured by the HTML_CACHE_* environment variables
+        if None
+        """
+        self.url_template: str = url_template
+        self.concurrency: int = concurrency
+        self.rate_limiter: RateLimiter = RateLimiter(rate)
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=timeout)
+        self.headers: Optional[dict] = headers
+        self.backend: str = backend
+        self.cache: Optional[HTMLCache] = cache or get_cache()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.requests: int = 0
+        self.retried: int = 0
+        self.fetched: int = 0
+        self.failed: int = 0
+
+    @property
+    def metrics(self) -> dict:
+        """ Gets the crawling metrics
+        :return: dict, the number of requests sent, of retries, and of rooms fetched and failed
+        """
+        return {
+            'requests': self.requests,
+            'retries': self.retried,
+            'fetched': self.fetched,
+            'failed': self.failed
+        }
+
+    async def __aenter__(self) -> 'Crawler':
+        await self.open()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """ Opens the session shared by the requests, its connector keeping the connections alive between them
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=self.headers)
+
+    async def close(self) -> None:
+        """ Closes the session
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def get_url(self, room_id: Union[int, str]) -> str:
+        """ Gets the url of a room from the url template
+        :param room_id: int, the room id
+        :return: str, the url, '' for an invalid room id
+        """
+        return self.url_template.format(room_id=room_id) if get_url(room_id) else ''
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """ Fetches a page through the cache, retrying the transient errors
+        :param url: str, the url of the page
+        :return: str, the html of the page, '' if the page does not exist (a GONE_STATUSES status), None if it could
+        not be fetched or is not cached offline
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        # The cache reads and writes files and its index, in the default executor so that the loop keeps fetching
+        if self.cache is not None:
+            html: Optional[str] = await loop.run_in_executor(None, self.cache.get, url)
+            # Offline, a page that is not cached is a failed fetch, retried by the next run
+            if html is not None or self.cache.offline:
+                return html
+        host: str = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1) + random.uniform(0, self.backoff))
+            await self.rate_limiter.wait(host)
+            self.requests += 1
+            try:
+                async with self.session.get(url) as response:
+                    if response.status == 200:
+                        html = await response.text()
+                        if self.cache is not None:
+                            await loop.run_in_executor(None, self.cache.put, url, html)
+                        return html
+                    if response.status in GONE_STATUSES:
+                        return ''
+                    if response.status not in RETRY_STATUSES:
+                        return None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+        return None
+
+    async def fetch_room(self, room_id: Union[int, str]) -> tuple[Union[int, str], Optional[str]]:
+        """ Fetches the page of a room
+        :param room_id: int, the room id
+        :return: tuple, the room id and the html of its page, None if it could not be fetched
+        """
+        url: str = self.get_url(room_id)
+        html: Optional[str] = await self.fetch(url) if url else None
+        if html is None:
+            self.failed += 1
+        else:
+            self.fetched += 1
+        return room_id, html
+
+    async def fetch_rooms(self, room_ids: Iterable) -> AsyncIterator[tuple[Union[int, str], Optional[str]]]:
+        """ Fetches the pages of rooms, at most concurrency at a time.
+        The pages are yielded as they are fetched, not in the order of the room ids, and no room is fetched while
+        the caller has not taken the fetched pages.
+        :param room_ids: iterable, the room ids
+        :return: async iterator, the room id and the html of its page, None if it could not be fetched
+        """
+        opened: bool = self.session is None
+        await self.open()
+        pending: set = set()
+        try:
+            for room_id in room_ids:
+                if len(pending) >= self.concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(self.fetch_room(room_id)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if opened:
+                await self.close()
+
+    async def crawl(self, room_ids: Iterable) -> AsyncIterator[dict]:
+        """ Gets the data of rooms, as they are fetched
+        :param room_ids: iterable, the room ids
+        :return: async iterator, the data of each room, like get_data
+        """
+        async for room_id, html in self.fetch_rooms(room_ids):
+            # An empty page has no title, which gives the data of a room that could not be scraped
+            yield get_data(room_id=room_id, response=html or '', backend=self.backend)
+
+
+async def crawl(room_ids: Iterable, **kwargs) -> list[dict]:
+    """ Gets the data of rooms
+    :param room_ids: iterable, the room ids
+    :param kwargs: the parameters of the Crawler
+    :return: list, the data of each room, like get_data, in the order they were fetched
+    """
+    async with Crawler(**kwargs) as crawler:
+        return [data async for data in crawler.crawl(room_ids)]
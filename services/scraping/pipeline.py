@@ -0,0 +1,157 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Iterable, Optional, Union
+
+from .crawler import Crawler
+from .scrape import get_data
+
+# The end of the chunks or of the parsed chunks
+DONE: None = None
+
+
+def extract_chunk(chunk: list[tuple[Union[int, str], Optional[str]]],
+                  backend: str) -> tuple[list[tuple[dict, bool]], float]:
+    """ Extracts the data of a chunk of fetched pages, in a worker process
+    :param chunk: list, the room id and the html of each page, None if it could not be fetched
+    :param backend: str, the backend extracting the data, see get_data
+    :return: tuple, the data of each room, like get_data, with whether its page was fetched, and the cpu time in
+    seconds the chunk took
+    """
+    start: float = time.process_time()
+    results: list[tuple[dict, bool]] = [
+        (get_data(room_id=room_id, response=html or '', backend=backend), html is not None) for room_id, html in chunk
+    ]
+    return results, time.process_time() - start
+
+
+class ScrapingPipeline:
+    def __init__(self, crawler: Optional[Crawler] = None, workers: int = 0, chunk_size: int = 16,
+                 queue_size: int = 4) -> None:
+        """ Scrapes rooms in two stages: the crawler fetches the pages in the event loop, and a process pool parses
+        them chunk by chunk on the other cores. The stages are joined by queues of queue_size chunks: the crawler
+        stops fetching when the parsers are behind, and the parsers stop when the caller does not take the results.
+        :param crawler: Crawler, the crawler fetching the pages, a default Crawler if None
+        :param workers: int, the number of parsing processes, 0 to parse in the event loop
+        :param chunk_size: int, the number of pages sent to a process at once
+        :param queue_size: int, the number of chunks waiting between two stages
+        """
+        self.crawler: Crawler = crawler or Crawler()
+        self.workers: int = workers
+        self.chunk_size: int = chunk_size
+        self.queue_size: int = queue_size
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        """ Resets the metrics of the stages
+        """
+        self.pages: int = 0
+        self.chunks: int = 0
+        # The time in seconds the fetch stage waited for the parse stage, and the parse stage for the processes or
+        # for the caller
+        self.fetch_blocked: float = 0.0
+        self.parse_blocked: float = 0.0
+        # The cpu time in seconds spent parsing, summed over the processes
+        self.parse_time: float = 0.0
+        # The time in seconds from the start of the run to the last fetched page and to the last parsed chunk
+        self.fetch_elapsed: float = 0.0
+        self.elapsed: float = 0.0
+
+    @property
+    def metrics(self) -> dict:
+        """ Gets the timing of the stages
+        :return: dict, the fetch and parse stages, with their pages, chunks, busy and blocked times and throughput, the
+        parse throughput being per process
+        """
+        return {
+            'fetch': {
+                'pages': self.pages,
+                'seconds': self.fetch_elapsed,
+                'blocked': self.fetch_blocked,
+                'pages_per_second': self.pages / self.fetch_elapsed if self.fetch_elapsed else 0.0
+            },
+            'parse': {
+                'chunks': self.chunks,
+                'seconds': self.parse_time,
+                'blocked': self.parse_blocked,
+                'pages_per_second': self.pages / self.parse_time if self.parse_time else 0.0
+            },
+            'seconds': self.elapsed,
+            'pages_per_second': self.pages / self.elapsed if self.elapsed else 0.0
+        }
+
+    async def run(self, room_ids: Iterable) -> AsyncIterator[tuple[dict, bool]]:
+        """ Scrapes rooms
+        :param room_ids: iterable, the room ids
+        :return: async iterator, the data of each room, like get_data, with whether its page was fetched, chunk by
+        chunk in the order they were fetched
+        """
+        self.reset_metrics()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        start: float = loop.time()
+        chunks: asyncio.Queue = asyncio.Queue(self.queue_size)
+        # The parsed queue holds the chunks being parsed too, so that every process has a chunk to parse
+        parsed: asyncio.Queue = asyncio.Queue(self.queue_size + self.workers)
+        executor: Optional[Executor] = ProcessPoolExecutor(self.workers) if self.workers else None
+
+        async def put(queue: asyncio.Queue, item) -> float:
+            # The time waited for room in the queue
+            wait_start: float = loop.time()
+            await queue.put(item)
+            return loop.time() - wait_start
+
+        async def fetch() -> None:
+            chunk: list = []
+            async for page in self.crawler.fetch_rooms(room_ids):
+                self.pages += 1
+                chunk.append(page)
+                if len(chunk) >= self.chunk_size:
+                    self.fetch_blocked += await put(chunks, chunk)
+                    chunk = []
+            self.fetch_elapsed = loop.time() - start
+            if chunk:
+                self.fetch_blocked += await put(chunks, chunk)
+            await chunks.put(DONE)
+
+        async def parse() -> None:
+            while (chunk := await chunks.get()) is not DONE:
+                self.chunks += 1
+                if executor is None:
+                    future: asyncio.Future = loop.create_future()
+                    future.set_result(extract_chunk(chunk, self.crawler.backend))
+                else:
+                    future = loop.run_in_executor(executor, extract_chunk, chunk, self.crawler.backend)
+                self.parse_blocked += await put(parsed, future)
+            await parsed.put(DONE)
+
+        stages: list[asyncio.Task] = [asyncio.ensure_future(fetch()), asyncio.ensure_future(parse())]
+        try:
+            while (future := await self._get(parsed, stages)) is not DONE:
+                results, duration = await future
+                self.parse_time += duration
+                self.elapsed = loop.time() - start
+                for result in results:
+                    yield result
+        finally:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    async def _get(queue: asyncio.Queue, stages: list[asyncio.Task]):
+        """ Gets an item of a queue, raising the exception of a stage that failed instead of waiting forever
+        :param queue: asyncio.Queue, the queue
+        :param stages: list, the tasks of the stages putting the items
+        :return: the item
+        """
+        getter: asyncio.Task = asyncio.ensure_future(queue.get())
+        while not getter.done():
+            await asyncio.wait([getter, *[stage for stage in stages if not stage.done()]],
+                               return_when=asyncio.FIRST_COMPLETED)
+            for stage in stages:
+                if stage.done() and not stage.cancelled() and stage.exception() is not None:
+                    getter.cancel()
+                    raise stage.exception()
+        return getter.result()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import sqlite3
+import sys
+import time
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from .crawler import Crawler
+from .pipeline import ScrapingPipeline
+
+# The page was fetched and its data scraped
+OK: str = 'ok'
+# The page was fetched but has no data, like the page of a room that is not listed anymore
+EMPTY: str = 'empty'
+# The page could not be fetched, the room is fetched again by the next run
+FAILED: str = 'failed'
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS results (
+    room_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    title TEXT NOT NULL,
+    images TEXT NOT NULL,
+    rating REAL,
+    fetched_at REAL NOT NULL
+);
+"""
+UPSERT_RESULT: str = ('INSERT INTO results (room_id, status, title, images, rating, fetched_at) '
+                      'VALUES (?, ?, ?, ?, ?, ?) '
+                      'ON CONFLICT (room_id) DO UPDATE SET status = excluded.status, title = excluded.title, '
+                      'images = excluded.images, rating = excluded.rating, fetched_at = excluded.fetched_at')
+SELECT_DONE: str = 'SELECT room_id FROM results WHERE status != ? AND fetched_at >= ?'
+SELECT_RESULTS: str = 'SELECT room_id, status, title, images, rating, fetched_at FROM results'
+
+
+def get_status(data: dict, fetched: bool) -> str:
+    """ Gets the fetch status of a room
+    :param data: dict, the data of the room, like get_data
+    :param fetched: bool, whether the page of the room was fetched
+    :return: str, OK, EMPTY or FAILED
+    """
+    if not fetched:
+        return FAILED
+    return OK if data['title'] else EMPTY
+
+
+class ResultStore:
+    def __init__(self, path: str) -> None:
+        """ Keeps the scraped data of the rooms in an SQLite database, with the status and the time of their fetch.
+        The results saved together are written in one transaction, so that an interrupted run keeps them.
+        :param path: str, the database file
+        """
+        self.path: str = path
+        self.connection: sqlite3.Connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def save(self, results: Iterable[tuple[dict, str]], fetched_at: Optional[float] = None) -> None:
+        """ Saves results, replacing the previous results of their rooms
+        :param results: iterable, the data of each room, like get_data, and its status
+        :param fetched_at: float, the time of the fetch, now if None
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.connection:
+            self.connection.executemany(UPSERT_RESULT, [
+                (int(data['id']), status, data['title'], json.dumps(data['images']), data['rating'], fetched_at)
+                for data, status in results
+            ])
+
+    def pending(self, room_ids: Iterable, refresh_days: Optional[float] = None) -> list:
+        """ Gets the rooms to fetch: the rooms never fetched, the failed ones, and the ones fetched more than
+        refresh_days ago
+        :param room_ids: iterable, the room ids
+        :param refresh_days: float, the age in days of the results fetched again, None to keep them
+        :return: list, the room ids to fetch, in the order of room_ids
+        """
+        oldest: float = time.time() - refresh_days * 86400 if refresh_days is not None else float('-inf')
+        done: set = {room_id for room_id, in self.connection.execute(SELECT_DONE, (FAILED, oldest))}
+        return [room_id for room_id in room_ids if int(room_id) not in done]
+
+    def to_frame(self) -> pd.DataFrame:
+        """ Gets the results
+        :return: pd.DataFrame, the id, status, title, images (separated by commas), rating and fetched_at columns
+        """
+        frame: pd.DataFrame = pd.read_sql_query(SELECT_RESULTS, self.connection).rename(columns={'room_id': 'id'})
+        frame['images'] = [','.join(json.loads(images)) for images in frame['images']]
+        return frame
+
+    def close(self) -> None:
+        """ Closes the database
+        """
+        self.connection.close()
+
+
+async def enrich(room_ids: Iterable, store: ResultStore, crawler: Optional[Crawler] = None,
+                 refresh_days: Optional[float] = None, checkpoint_size: int = 100, workers: int = 0) -> dict:
+    """ Scrapes the rooms that have no result yet, a failed one, or one older than refresh_days, and saves their
+    results every checkpoint_size rooms. Running it again after an interruption resumes where it stopped.
+    :param room_ids: iterable, the room ids
+    :param store: ResultStore, the store of the results
+    :param crawler: Crawler, the crawler fetching the pages, a default Crawler if None
+    :param refresh_days: float, the age in days of the results fetched again, None to keep them
+    :param checkpoint_size: int, the number of results saved together
+    :param workers: int, the number of processes parsing the pages, 0 to parse them in the event loop
+    :return: dict, the number of rooms of each status
+    """
+    pipeline: ScrapingPipeline = ScrapingPipeline(crawler, workers=workers)
+    counts: dict = {OK: 0, EMPTY: 0, FAILED: 0}
+    results: list = []
+    try:
+        async for data, fetched in pipeline.run(store.pending(room_ids, refresh_days)):
+            status: str = get_status(data, fetched)
+            counts[status] += 1
+            results.append((data, status))
+            if len(results) >= checkpoint_size:
+                store.save(results)
+                results.clear()
+    finally:
+        store.save(results)
+    return counts
+
+
+def compact(df: pd.DataFrame, store: ResultStore) -> pd.DataFrame:
+    """ Merges the scraped rating and images of the rooms into a dataset with one join. The rooms without a
+    successful result keep their values.
+    :param df: pd.DataFrame, the rooms, with an id column
+    :param store: ResultStore, the store of the results
+    :return: pd.DataFrame, the rooms with their rating and images columns
+    """
+    results: pd.DataFrame = store.to_frame()
+    results = results.loc[results['status'] == OK, ['id', 'rating', 'images']]
+    results = results.assign(images=results['images'].where(results['images'] != ''))
+    merged: pd.DataFrame = df.merge(results, on='id', how='left', suffixes=('', '_scraped'), validate='many_to_one')
+    for column in ('rating', 'images'):
+        if column in df.columns:
+            merged[column] = merged.pop(f'{column}_scraped').combine_first(merged[column])
+    return merged
+
+
+if __name__ == '__main__':
+    # python -m services.scraping.results csv_path output_path [database_path [refresh_days [workers]]]
+    csv_path, output_path = sys.argv[1:3]
+    result_store = ResultStore(sys.argv[3] if len(sys.argv) >= 4 else 'scraping.db')
+    refresh: Optional[float] = float(sys.argv[4]) if len(sys.argv) >= 5 else None
+    n_workers: int = int(sys.argv[5]) if len(sys.argv) >= 6 else 0
+    rooms: pd.DataFrame = pd.read_csv(csv_path, sep=',', header=0)
+    print(asyncio.run(enrich(rooms['id'], result_store, refresh_days=refresh, workers=n_workers)))
+    compact(rooms, result_store).to_csv(output_path, sep=',', index=False)
+    result_store.close()
@@ -1,9 +1,21 @@
 # 3rd party imports
-from typing import Union
+from html.parser import HTMLParser
+from typing import Callable, Optional, Union
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer, UnicodeDammit
 import requests
 
+from .cache import HTMLCache, OfflineMiss, get_cache
+
+# Time in seconds a page can take to be fetched
+TIMEOUT: float = 30.0
+# Shared by the requests, so that the connections to the website are kept alive between them
+session: requests.Session = requests.Session()
+# The class of the span holding the mean rating of the room
+RATING_CLASS: str = '_12si43g'
+# The only tags read by get_data
+STRAINER: SoupStrainer = SoupStrainer(['h1', 'img', 'span'])
+
 
 def get_id_from_url(url: str) -> int:
     """ Gets the room id from the url
@@ -22,12 +34,30 @@ def get_url(room_id: Union[int, str]) -> str:
     return f"https://www.airbnb.com/rooms/{room_id}"
 
 
+def fetch_html(url: str) -> str:
+    """ Fetches the html of the page, from the cache configured by the HTML_CACHE_* environment variables if any
+    :param url: str, the url of the page
+    :return: str, the html, decoded like BeautifulSoup decodes a page
+    """
+    cache: Optional[HTMLCache] = get_cache()
+    if cache is not None:
+        html: Optional[str] = cache.get(url)
+        if html is not None:
+            return html
+        if cache.offline:
+            raise OfflineMiss(f'{url} is not in the cache')
+    page = session.get(url, timeout=TIMEOUT)
+    html = UnicodeDammit(page.content, is_html=True).unicode_markup or ''
+    if cache is not None and page.status_code == 200:
+        cache.put(url, html)
+    return html
+
+
 def get_html(url: str) -> BeautifulSoup:
     """ Gets the html of the page
     :param url: str, the url of the page
     """
-    page = requests.get(url)
-    return BeautifulSoup(page.content, 'html.parser')
+    return BeautifulSoup(fetch_html(url), 'html.parser')
 
 
 def get_images(soup: BeautifulSoup) -> list:
@@ -48,29 +78,108 @@ def get_mean_ratings(soup: BeautifulSoup) -> float:
     """ Gets the mean ratings of the room
     :param soup: BeautifulSoup object, the html of the page
     """
-    return float(soup.find("span", {"class": "_12si43g"}).text.replace("·", ""))
+    return float(soup.find("span", {"class": RATING_CLASS}).text.replace("·", ""))
 
 
-def get_data(room_id: int, response: str = None) -> dict:
+def extract_from_soup(soup: BeautifulSoup) -> dict:
+    """ Extracts the data of the room from its parsed page
+    :param soup: BeautifulSoup object, the html of the page
+    :return: dict, the title, images and rating of the room
+    """
+    return {'title': get_title(soup), 'images': get_images(soup), 'rating': get_mean_ratings(soup)}
+
+
+class RoomParser(HTMLParser):
+    def __init__(self) -> None:
+        """ Reads the title, images and rating of a room while its page is parsed, without building a tree.
+        The text of the first h1 and of the first rating span are collected like BeautifulSoup.text, including the
+        text of their nested tags. The whole page is read, as the images are all the img tags of the page.
+        """
+        super().__init__(convert_charrefs=True)
+        self.images: list = []
+        # The text of the title and of the rating, None until their tag is found
+        self.title: Optional[list[str]] = None
+        self.rating: Optional[list[str]] = None
+        # The number of open h1 or span tags, from the one of the title or of the rating
+        self.title_depth: int = 0
+        self.rating_depth: int = 0
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag == 'img':
+            attributes: dict = dict(attrs)
+            # BeautifulSoup gives an empty value to an attribute without one
+            self.images.append(attributes['src'] or '' if 'src' in attributes else None)
+        elif tag == 'h1':
+            if self.title_depth:
+                self.title_depth += 1
+            elif self.title is None:
+                self.title, self.title_depth = [], 1
+        elif tag == 'span':
+            if self.rating_depth:
+                self.rating_depth += 1
+            elif self.rating is None and RATING_CLASS in (dict(attrs).get('class') or '').split():
+                self.rating, self.rating_depth = [], 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'h1' and self.title_depth:
+            self.title_depth -= 1
+        elif tag == 'span' and self.rating_depth:
+            self.rating_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self.title_depth:
+            self.title.append(data)
+        if self.rating_depth:
+            self.rating.append(data)
+
+
+def extract_with_parser(html: str) -> dict:
+    """ Extracts the data of the room with a RoomParser
+    :param html: str, the html of the page
+    :return: dict, the title, images and rating of the room
+    """
+    parser = RoomParser()
+    parser.feed(html)
+    parser.close()
+    if parser.title is None or parser.rating is None:
+        raise ValueError('The page has no title or no rating')
+    return {
+        'title': ''.join(parser.title),
+        'images': parser.images,
+        'rating': float(''.join(parser.rating).replace("·", ""))
+    }
+
+
+# The functions extracting the title, images and rating of a room from its page, raising if one is missing
+BACKENDS: dict[str, Callable[[str], dict]] = {
+    # The whole page is parsed into a tree
+    'html.parser': lambda html: extract_from_soup(BeautifulSoup(html, 'html.parser')),
+    # Same with the faster lxml parser, which has to be installed
+    'lxml': lambda html: extract_from_soup(BeautifulSoup(html, 'lxml')),
+    # Only the h1, img and span tags are kept in the tree
+    'strainer': lambda html: extract_from_soup(BeautifulSoup(html, 'html.parser', parse_only=STRAINER)),
+    # No tree is built
+    'stream': extract_with_parser
+}
+
+
+def get_data(room_id: int, response: str = None, backend: str = 'html.parser') -> dict:
     """ Gets the message_dict from the url
     :param room_id: int, the room id
     :param response: str, the html of the page
+    :param backend: str, the key of the BACKENDS function extracting the data from the page
     """
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown extraction backend: {backend}')
 
     url: str = get_url(room_id)
     if response is None:
-        soup = get_html(url=url)
-    else:
-        soup = BeautifulSoup(response, 'html.parser')
+        response = fetch_html(url=url)
 
     try:
-        return {
-            'id': room_id,
-            'url': url,
-            'title': get_title(soup),
-            'images': get_images(soup),
-            'rating': get_mean_ratings(soup)
-        }
+        return {'id': room_id, 'url': url, **BACKENDS[backend](response)}
+    except FeatureNotFound:
+        raise
     except Exception as e:
         return {
             'id': room_id,
@@ -79,4 +188,3 @@ def get_data(room_id: int, response: str = None) -> dict:
             'images': [],
             'rating': None
         }
-
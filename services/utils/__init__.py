@@ -1 +1,3 @@
+from .cache import LRUCache
+from .message_rooms import MessageRooms
 from .utils import emoji_to_number, number_emojis
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Marks a missing entry, as None can be cached
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        """ Bounded least-recently-used cache whose entries expire after a time to live
+        Args:
+            maxsize: maximum number of entries
+            ttl: time to live of an entry in seconds, None for no expiration
+        """
+        self.maxsize: int = maxsize
+        self.ttl: Optional[float] = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._get(key) is not _MISSING
+
+    def _get(self, key: Hashable) -> Any:
+        """ Get an entry without counting it, removing it if it expired
+        Args:
+            key: key of the entry
+
+        Returns:
+            value of the entry, _MISSING if there is none
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """ Get an entry
+        Args:
+            key: key of the entry
+            default: value returned when the entry is missing or expired
+
+        Returns:
+            value of the entry
+        """
+        with self._lock:
+            value = self._get(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """ Add or replace an entry, evicting the least recently used one when the cache is full
+        Args:
+            key: key of the entry
+            value: value of the entry
+        """
+        with self._lock:
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """ Remove an entry
+        Args:
+            key: key of the entry
+            default: value returned when the entry is missing
+
+        Returns:
+            value of the removed entry
+        """
+        with self._lock:
+            value = self._get(key)
+            if value is _MISSING:
+                return default
+            del self._entries[key]
+            return value
+
+    def clear(self) -> None:
+        """ Remove every entry, the statistics are kept
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        """ Statistics of the cache
+        Returns:
+            number of entries, hits, misses, evictions and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
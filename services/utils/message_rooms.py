@@ -0,0 +1,45 @@
+from typing import Awaitable, Callable, Hashable
+
+from .cache import LRUCache
+
+
+class MessageRooms:
+    def __init__(self, maxsize: int = 10000) -> None:
+        """ Room id of the most recent room messages sent, so that rating them does not fetch the message
+        Args:
+            maxsize: maximum number of messages remembered
+        """
+        self.cache: LRUCache = LRUCache(maxsize=maxsize)
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    @property
+    def stats(self) -> dict:
+        """ Statistics of the cache
+        Returns:
+            number of messages, hits, misses, evictions and hit rate
+        """
+        return self.cache.stats
+
+    def remember(self, message_id: Hashable, room_id: int) -> None:
+        """ Remember the room of a message
+        Args:
+            message_id: id of the message
+            room_id: id of the room of the message
+        """
+        self.cache.put(message_id, room_id)
+
+    async def get(self, message_id: Hashable, fetch_room_id: Callable[[], Awaitable[int]]) -> int:
+        """ Get the room of a message, fetching it only when the message is not remembered
+        Args:
+            message_id: id of the message
+            fetch_room_id: coroutine function reading the room of the message from the message itself
+        Returns:
+            id of the room of the message
+        """
+        room_id = self.cache.get(message_id)
+        if room_id is None:
+            room_id = await fetch_room_id()
+            self.cache.put(message_id, room_id)
+        return room_id
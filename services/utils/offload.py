@@ -0,0 +1,137 @@
+import asyncio
+import concurrent.futures
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+
+class Busy(Exception):
+    """ Raised when an offloader already has its maximum number of pending tasks
+    """
+
+
+class Offloader:
+    def __init__(self, kind: str = 'thread', max_workers: Optional[int] = None, max_pending: int = 64,
+                 timeout: Optional[float] = 10.0, initializer: Optional[Callable] = None,
+                 initargs: tuple = ()) -> None:
+        """ Run blocking functions in a thread or process pool, rejecting new tasks when too many are pending
+        Args:
+            kind: 'thread' or 'process'
+            max_workers: number of workers, the executor default if None
+            max_pending: maximum number of submitted tasks not finished yet
+            timeout: time in seconds a caller waits for a task, None to wait until it finishes
+            initializer: function run by each worker when it starts, to preload data in the worker processes
+            initargs: arguments of the initializer
+        """
+        if kind == 'thread':
+            self.executor: Executor = ThreadPoolExecutor(max_workers, initializer=initializer, initargs=initargs)
+        elif kind == 'process':
+            self.executor = ProcessPoolExecutor(max_workers, initializer=initializer, initargs=initargs)
+        else:
+            raise ValueError(f'Unknown executor kind: {kind}')
+        self.kind: str = kind
+        self.max_pending: int = max_pending
+        self.timeout: Optional[float] = timeout
+        self.pending: int = 0
+        self.completed: int = 0
+        self.rejected: int = 0
+        self.timeouts: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def metrics(self) -> dict:
+        """ Metrics of the offloader
+        Returns:
+            number of pending, completed, rejected and timed out tasks
+        """
+        return {
+            'pending': self.pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts
+        }
+
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        """ Submit a task, a task that timed out is pending until it actually finishes
+        Args:
+            function: function to run
+            *args: positional arguments of the function
+            **kwargs: keyword arguments of the function
+
+        Returns:
+            future of the result
+
+        Raises:
+            Busy: if max_pending tasks are pending
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise Busy(f'{self.pending} tasks are pending')
+            self.pending += 1
+        try:
+            future: Future = self.executor.submit(function, *args, **kwargs)
+        except Exception:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _: Optional[Future]) -> None:
+        """ Count a finished task
+        Args:
+            _: future of the task
+        """
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def call(self, function: Callable, *args, **kwargs) -> Any:
+        """ Run a task and wait for its result, from a thread that may block
+        Args:
+            function: function to run
+            *args: positional arguments of the function
+            **kwargs: keyword arguments of the function
+
+        Returns:
+            result of the function
+
+        Raises:
+            Busy: if max_pending tasks are pending
+            concurrent.futures.TimeoutError: if the task takes more than timeout seconds
+        """
+        future: Future = self.submit(function, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """ Run a task and wait for its result without blocking the event loop
+        Args:
+            function: function to run
+            *args: positional arguments of the function
+            **kwargs: keyword arguments of the function
+
+        Returns:
+            result of the function
+
+        Raises:
+            Busy: if max_pending tasks are pending
+            asyncio.TimeoutError: if the task takes more than timeout seconds
+        """
+        future: Future = self.submit(partial(function, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ Stop the workers
+        Args:
+            wait: whether to wait for the pending tasks
+        """
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+# Saved room pages, named after their room id
+PAGES_DIRECTORY: str = os.path.join(os.path.dirname(__file__), 'pages')
+
+NEIGHBOURHOOD_GROUPS: list[str] = ['Bronx', 'Brooklyn', 'Manhattan', 'Queens', 'Staten Island']
+ROOM_TYPES: list[str] = ['Entire home/apt', 'Hotel room', 'Private room', 'Shared room']
+NEIGHBOURHOODS: list[str] = ['Midtown', 'Harlem', 'Astoria', 'Williamsburg', 'Bedford-Stuyvesant']
+PRICE_RANGES: list[str] = ['0-49', '50-99', '100-149', '150-199', '200-249']
+
+
+def make_room_profiles(n_rooms: int = 200, seed: int = 0) -> pd.DataFrame:
+    """ Build a small room profiles dataframe shaped like data/New_York_Airbnb_4_dec_2021_final.csv
+    :param n_rooms: the number of rooms
+    :param seed: the random seed
+    :return: the room profiles, with the one-hot features normalized by the room rating
+    """
+    rng = np.random.default_rng(seed)
+    rating = np.round(rng.uniform(0, 5, n_rooms), 2)
+    rating[:3] = 0
+    frame = pd.DataFrame({
+        'id': rng.choice(np.arange(1000, 100000), n_rooms, replace=False),
+        'name': [f'Room {i}' for i in range(n_rooms)],
+        'price': rng.integers(10, 250, n_rooms),
+        'minimum_nights': rng.integers(1, 40, n_rooms),
+        'rating': rating,
+        'images': [f'https://example.com/{i}.jpg,https://example.com/{i}b.jpg' for i in range(n_rooms)],
+    })
+    for columns in (NEIGHBOURHOOD_GROUPS, ROOM_TYPES, NEIGHBOURHOODS, PRICE_RANGES):
+        picked = rng.integers(0, len(columns), n_rooms)
+        for index, column in enumerate(columns):
+            frame[column] = (picked == index) * rating / 5
+    return frame
+
+
+def read_page(room_id: int) -> str:
+    """ Read a saved room page
+    :param room_id: the room id
+    :return: the html of the page
+    """
+    with open(os.path.join(PAGES_DIRECTORY, f'{room_id}.html'), encoding='utf-8') as file:
+        return file.read()
+
+
+def make_stub_app(failures: dict = None, delays: dict = None, statuses: dict = None) -> tuple[web.Application, dict]:
+    """ Build an aiohttp application serving the saved room pages at /rooms/{room_id}, and 404 for the others
+    :param failures: the number of 503 responses sent for a room before its page
+    :param statuses: the status sent for a room instead of its page
+    :param delays: the time in seconds each room takes to be served
+    :return: the application, and its stats: the number of requests of each room in 'hits' and the most concurrent
+    requests in 'max_concurrency'
+    """
+    failures = dict(failures or {})
+    delays = delays or {}
+    statuses = statuses or {}
+    stats = {'hits': {}, 'concurrency': 0, 'max_concurrency': 0}
+
+    async def room(request: web.Request) -> web.Response:
+        room_id = int(request.match_info['room_id'])
+        stats['hits'][room_id] = stats['hits'].get(room_id, 0) + 1
+        stats['concurrency'] += 1
+        stats['max_concurrency'] = max(stats['max_concurrency'], stats['concurrency'])
+        try:
+            await asyncio.sleep(delays.get(room_id, 0))
+            if failures.get(room_id, 0) > 0:
+                failures[room_id] -= 1
+                return web.Response(status=503)
+            if room_id in statuses:
+                return web.Response(status=statuses[room_id])
+            if not os.path.exists(os.path.join(PAGES_DIRECTORY, f'{room_id}.html')):
+                return web.Response(status=404)
+            return web.Response(text=read_page(room_id), content_type='text/html')
+        finally:
+            stats['concurrency'] -= 1
+
+    app = web.Application()
+    app.router.add_get('/rooms/{room_id}', room)
+    return app, stats
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from services.recommendation.ann import IVFIndex, StaleIndex, recall_at_k
+from services.recommendation.scoring import ScoringEngine
+from test.fixtures import make_room_profiles
+
+
+class TestIVFIndex(unittest.TestCase):
+    def setUp(self):
+        room_profiles = make_room_profiles(n_rooms=600)
+        self.engine = ScoringEngine.from_frame(room_profiles, room_profiles.columns[6:])
+        self.index = IVFIndex.build(self.engine.matrix, n_lists=12)
+        rng = np.random.default_rng(0)
+        self.user_vectors = np.stack([self.engine.matrix[rng.choice(600, 4)].mean(axis=0) for _ in range(30)])
+
+    def test_every_room_is_in_one_partition(self):
+        self.assertEqual(sorted(self.index.members.tolist()), list(range(600)))
+        self.assertEqual(self.index.indptr[-1], 600)
+
+    def test_probing_every_partition_is_exact(self):
+        for user_vector in self.user_vectors:
+            self.assertEqual(self.index.search(self.engine, user_vector, n=10, n_probe=12),
+                             self.engine.top_n(user_vector, n=10))
+        self.assertEqual(recall_at_k(self.engine, self.index, self.user_vectors, k=10, n_probe=12), 1.0)
+
+    def test_recall_grows_with_probes(self):
+        recalls = [recall_at_k(self.engine, self.index, self.user_vectors, k=10, n_probe=probes)
+                   for probes in (1, 4, 8)]
+        self.assertEqual(recalls, sorted(recalls))
+        self.assertGreater(recalls[-1], 0.8)
+
+    def test_filtered_rooms(self):
+        rows = np.arange(0, 600, 5)
+        candidates = self.index.candidates(self.user_vectors[0], rows=rows, n=50, n_probe=1)
+        self.assertGreaterEqual(len(candidates), 50)
+        self.assertTrue(np.isin(candidates, rows).all())
+        found = self.index.search(self.engine, self.user_vectors[0], rows=rows, n=5, n_probe=1)
+        self.assertTrue(set(room_id for room_id, _ in found) <= set(self.engine.ids[rows].tolist()))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ivf.npz')
+            self.index.save(path, self.engine.ids)
+            loaded = IVFIndex.load(path, self.engine.ids)
+            # The rooms were rebuilt since the index was written
+            with self.assertRaises(StaleIndex):
+                IVFIndex.load(path, self.engine.ids[::-1])
+            with self.assertRaises(StaleIndex):
+                IVFIndex.load(path, self.engine.ids[:-1])
+        np.testing.assert_array_equal(loaded.centroids, self.index.centroids)
+        np.testing.assert_array_equal(loaded.members, self.index.members)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from data.room_catalog import RoomCatalog
+from data.room_store import RoomStore
+from services.recommendation.batch import BatchRecommender
+from services.recommendation.filter_index import FilterIndex
+from services.recommendation.scoring import ScoringEngine, SparseScoringEngine
+from services.recommendation.user_vector import UserVector
+from test.fixtures import make_room_profiles
+
+
+class TestBatchRecommender(unittest.TestCase):
+    def setUp(self):
+        store = RoomStore.from_frame(make_room_profiles(n_rooms=400))
+        self.catalog = RoomCatalog(store)
+        self.engine = ScoringEngine(store.ids, store.features)
+        self.filter_index = FilterIndex(store.ids, store.columns['price'], store.columns['minimum_nights'],
+                                        store.columns['rating'], store.features, store.feature_columns)
+        self.recommender = BatchRecommender(self.engine, self.filter_index, self.catalog, block_size=7, seed=0)
+        rng = np.random.default_rng(1)
+        room_ids = store.ids.tolist()
+        self.users = []
+        for index in range(60):
+            ratings = {room_ids[position]: int(rng.integers(1, 6))
+                       for position in rng.choice(len(room_ids), index % 4, replace=False)}
+            self.users.append({
+                'max_price': [None, 100, 200][index % 3],
+                'neighbourhood': [None, 'Manhattan'][index % 2],
+                'rating': [None, 4][index % 5 == 0],
+                'ratings': ratings
+            })
+        # A user that rated every room matching their criteria
+        self.users.append({'max_price': 11, 'ratings': {room_id: 3 for room_id in
+                                                        store.ids[store.columns['price'] <= 11].tolist()}})
+
+    def single_recommendation(self, user, n):
+        filtered_rooms = self.filter_index.filter(
+            min_price=user.get('min_price'), max_price=user.get('max_price'), price=user.get('price'),
+            neighbourhood_group=user.get('neighbourhood'), room_type=user.get('room_type'),
+            min_nights=user.get('minimum_nights'), rating=user.get('rating'),
+            rooms_to_exclude=user.get('ratings', {}).keys()
+        )
+        respects_criteria = len(filtered_rooms) > 0
+        if not respects_criteria:
+            filtered_rooms = np.arange(len(self.filter_index))
+        if not user['ratings']:
+            return [], respects_criteria, filtered_rooms
+        return self.engine.top_n(UserVector(self.catalog, user['ratings']).vector, rows=filtered_rooms, n=n), \
+            respects_criteria, filtered_rooms
+
+    def assertSameScores(self, expected, recommended_rooms):
+        # Rooms with equal similarities may be swapped by float rounding
+        np.testing.assert_allclose([score for _, score, _ in recommended_rooms],
+                                   [score for _, score in expected], rtol=1e-5)
+
+    def test_matches_single_user_recommendations(self):
+        recommendations = self.recommender.recommend(self.users, n=3)
+        self.assertEqual(len(recommendations), len(self.users))
+        for user, recommended_rooms in zip(self.users, recommendations):
+            expected, respects_criteria, filtered_rooms = self.single_recommendation(user, n=3)
+            if user['ratings']:
+                self.assertSameScores(expected, recommended_rooms)
+                self.assertTrue(set(room_id for room_id, _, _ in recommended_rooms)
+                                <= set(self.filter_index.ids[filtered_rooms].tolist()))
+            else:
+                self.assertTrue(set(room_id for room_id, _, _ in recommended_rooms)
+                                <= set(self.filter_index.ids[filtered_rooms].tolist()))
+                self.assertTrue(all(score is None for _, score, _ in recommended_rooms))
+            self.assertTrue(all(respects is respects_criteria for _, _, respects in recommended_rooms))
+        self.assertFalse(recommendations[-1][0][2])
+
+    def test_sparse_backend(self):
+        store = self.catalog.store
+        recommender = BatchRecommender(SparseScoringEngine(store.ids, store.features), self.filter_index,
+                                       self.catalog, seed=0)
+        for user, recommended_rooms in zip(self.users, recommender.recommend(self.users, n=2)):
+            self.assertSameScores(self.single_recommendation(user, n=2)[0],
+                                  [room for room in recommended_rooms if room[1] is not None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import unittest
+
+from services.nlp.batching import BatcherClosed, PredictionBatcher
+from services.utils.offload import Busy
+
+
+class FakeChatbot:
+    def __init__(self):
+        self.batch_sizes = []
+        self.threads = []
+
+    def _predict_classes(self, messages):
+        self.batch_sizes.append(len(messages))
+        self.threads.append(threading.get_ident())
+        if 'fail' in messages:
+            raise RuntimeError('prediction failed')
+        return [[{'tag': message.split()[0], 'entities': {}, 'probability': '0.9'}] for message in messages]
+
+    def respond(self, message, intents, user_id=None):
+        return intents[0]['tag'], {'message': message, 'user_id': user_id}
+
+
+class TestPredictionBatcher(unittest.TestCase):
+    def setUp(self):
+        self.chatbot = FakeChatbot()
+
+    def run_requests(self, batcher, messages):
+        async def run():
+            results = await asyncio.gather(*(batcher.request(message, user_id=index)
+                                             for index, message in enumerate(messages)), return_exceptions=True)
+            await batcher.close()
+            return results
+        return asyncio.run(run())
+
+    def test_concurrent_messages_share_a_forward_pass(self):
+        batcher = PredictionBatcher(self.chatbot, max_batch_size=32, max_wait=0.01)
+        messages = [f'greeting {index}' if index % 2 else f'room {index}' for index in range(10)]
+        results = self.run_requests(batcher, messages)
+        self.assertEqual(self.chatbot.batch_sizes, [10])
+        # The forward pass does not run on the event loop
+        self.assertNotIn(threading.get_ident(), self.chatbot.threads)
+        self.assertEqual(results, [(message.split()[0], {'message': message, 'user_id': index})
+                                   for index, message in enumerate(messages)])
+        self.assertEqual(batcher.metrics, {'queue_depth': 0, 'batches': 1, 'messages': 10, 'rejected': 0,
+                                           'mean_batch_size': 10.0, 'largest_batch': 10})
+
+    def test_max_batch_size(self):
+        batcher = PredictionBatcher(self.chatbot, max_batch_size=4, max_wait=0.01)
+        self.run_requests(batcher, [f'room {index}' for index in range(10)])
+        self.assertEqual(self.chatbot.batch_sizes, [4, 4, 2])
+
+    def test_errors_reach_every_caller_of_the_batch(self):
+        batcher = PredictionBatcher(self.chatbot, max_wait=0.01)
+        results = self.run_requests(batcher, ['room 1', 'fail'])
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(self.run_requests(batcher, ['room 2']), [('room', {'message': 'room 2', 'user_id': 0})])
+
+    def test_max_pending(self):
+        batcher = PredictionBatcher(self.chatbot, max_wait=0.01, max_pending=2)
+        results = self.run_requests(batcher, [f'room {index}' for index in range(3)])
+        self.assertEqual([type(result) for result in results], [tuple, tuple, Busy])
+        self.assertEqual(batcher.metrics['rejected'], 1)
+
+    def test_close_fails_pending_messages(self):
+        batcher = PredictionBatcher(self.chatbot, max_batch_size=32, max_wait=10)
+
+        async def run():
+            waiting = asyncio.create_task(batcher.predict('room 1'))
+            await asyncio.sleep(0.01)
+            queued = [asyncio.create_task(batcher.predict(f'room {index}')) for index in range(2, 4)]
+            await asyncio.sleep(0)
+            await batcher.close()
+            return await asyncio.gather(waiting, *queued, return_exceptions=True)
+
+        results = asyncio.run(asyncio.wait_for(run(), timeout=5))
+        self.assertTrue(all(isinstance(result, BatcherClosed) for result in results))
+        self.assertEqual(self.chatbot.batch_sizes, [])
+        self.assertEqual(batcher.metrics['queue_depth'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
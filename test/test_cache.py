@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+
+from services.utils import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('b', 0), 0)
+        self.assertEqual(cache.stats, {'size': 1, 'hits': 1, 'misses': 2, 'evictions': 0, 'hit_rate': 1 / 3})
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(maxsize=2, ttl=10)
+        with mock.patch('services.utils.cache.time.monotonic', return_value=100.0):
+            cache.put('a', None)
+            self.assertIn('a', cache)
+        with mock.patch('services.utils.cache.time.monotonic', return_value=111.0):
+            self.assertEqual(cache.get('a', 'expired'), 'expired')
+            self.assertEqual(len(cache), 0)
+
+    def test_clear_and_pop(self):
+        cache = LRUCache()
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.pop('a'))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
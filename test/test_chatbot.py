@@ -1,3 +1,4 @@
+import tempfile
 import unittest
 
 from services.nlp import Chatbot
@@ -16,7 +17,13 @@ chatbot = Chatbot(
         "name": get_kwargs
     }
 )
-chatbot.train_model()
+# Trained in a temporary directory, so that the tests do not write the cached models of the bot
+model_directory = tempfile.TemporaryDirectory()
+chatbot.load_or_train(directory=model_directory.name)
+
+
+def tearDownModule():
+    model_directory.cleanup()
 
 
 class TestChatbot(unittest.TestCase):
@@ -43,6 +50,12 @@ class TestChatbot(unittest.TestCase):
         self.assertEqual(intent, "room")
         self.assertEqual(entities, {"min_price": "100", "price": "100"})
 
+    def test_batched_predictions(self):
+        messages = ["Hello, how are you?", "Bye, have a good day!", "I want a room cheaper than 100€", "What?"]
+        for message, intents in zip(messages, chatbot._predict_classes(messages)):
+            self.assertEqual([intent['tag'] for intent in intents],
+                             [intent['tag'] for intent in chatbot._predict_class(message)])
+
 
 if __name__ == '__main__':
     unittest.main()
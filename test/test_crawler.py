@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+
+from aiohttp.test_utils import TestServer
+
+from services.scraping.crawler import Crawler, RateLimiter
+from services.scraping.scrape import get_data
+from test.fixtures import make_stub_app, read_page
+
+
+def crawl(app, room_ids, **kwargs):
+    async def run():
+        async with TestServer(app) as server:
+            crawler = Crawler(url_template=f'http://{server.host}:{server.port}/rooms/{{room_id}}', backoff=0.01,
+                              **kwargs)
+            async with crawler:
+                data = [room async for room in crawler.crawl(room_ids)]
+            return data, crawler.metrics
+    return asyncio.run(run())
+
+
+class TestCrawler(unittest.TestCase):
+    def test_crawl(self):
+        app, _ = make_stub_app()
+        data, metrics = crawl(app, [2595, 5136, 42, -1], rate=None)
+        by_id = {room['id']: room for room in data}
+        self.assertEqual(by_id[2595], get_data(room_id=2595, response=read_page(2595)))
+        self.assertEqual(by_id[2595]['title'], 'Skylit Midtown Castle')
+        self.assertEqual(by_id[2595]['rating'], 4.7)
+        for room_id in (5136, 42, -1):
+            self.assertEqual((by_id[room_id]['title'], by_id[room_id]['images'], by_id[room_id]['rating']),
+                             ('', [], None))
+        # -1 is not requested and 42 is not found, which is not retried
+        self.assertEqual(metrics, {'requests': 3, 'retries': 0, 'fetched': 3, 'failed': 1})
+
+    def test_retries(self):
+        app, stats = make_stub_app(failures={2595: 2, 5136: 10})
+        data, metrics = crawl(app, [2595, 5136], rate=None, retries=3)
+        by_id = {room['id']: room for room in data}
+        self.assertEqual(by_id[2595]['title'], 'Skylit Midtown Castle')
+        self.assertEqual(by_id[5136]['title'], '')
+        self.assertEqual(stats['hits'], {2595: 3, 5136: 4})
+        self.assertEqual(metrics['retries'], 5)
+        self.assertEqual(metrics['failed'], 1)
+
+    def test_timeout(self):
+        app, _ = make_stub_app(delays={2595: 1.0})
+        data, metrics = crawl(app, [2595], rate=None, retries=1, timeout=0.05)
+        self.assertEqual(data[0]['title'], '')
+        self.assertEqual(metrics['requests'], 2)
+
+    def test_streams_as_completed(self):
+        app, _ = make_stub_app(delays={2595: 0.2})
+        data, _ = crawl(app, [2595, 5136], rate=None)
+        self.assertEqual([room['id'] for room in data], [5136, 2595])
+
+    def test_bounded_concurrency(self):
+        app, stats = make_stub_app(delays={room_id: 0.02 for room_id in range(20)})
+        data, _ = crawl(app, range(20), rate=None, concurrency=4)
+        self.assertEqual(sorted(room['id'] for room in data), list(range(20)))
+        self.assertEqual(stats['max_concurrency'], 4)
+
+    def test_rate_limiter(self):
+        async def run():
+            limiter = RateLimiter(rate=50)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*[limiter.wait('a') for _ in range(6)], limiter.wait('b'))
+            return loop.time() - start
+        # The 6 requests to host a are spaced by 20 ms, the request to host b is not delayed
+        run_time = asyncio.run(run())
+        self.assertGreaterEqual(run_time, 0.09)
+        self.assertLess(run_time, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import re
+import unittest
+
+from services.nlp.entities import EntityExtractor, has_top_level_alternation, is_mergeable
+
+with open('./services/nlp/intents.json') as intents_file:
+    INTENTS = json.load(intents_file)['intents']
+
+MESSAGES = [
+    "I want to go to the room with a price cheaper than 100€",
+    "I want to go to the room with a price above 100€",
+    "Find me a room in Brooklyn between 50 and 120 for 3 nights",
+    "a private room near Manhattan under 80 with 4 stars",
+    "my max price is 200, min price is 30",
+    "Something more expensive than 300 close to Queens",
+    "budget of 150, rating at least 4",
+    "a hotel room around 90€ next to Bronx",
+    "I need a shared room for 40 nearby staten",
+    "price 70",
+    "Hello, how are you?",
+    "",
+    "My name is Yoan",
+    "I'm Alice and I am looking for a room",
+    "call me Bob",
+    "A HOME IN MANHATTAN FOR 2 NIGHTS BELOW 500",
+    "cheaper\nthan 100€ in Brooklyn",
+    "a room in\nQueens for 2 nights\nwith a budget of 90",
+]
+
+
+def reference_entities(message, intent):
+    entities = {}
+    for entity, regexes in intent['entities'].items():
+        for regex in regexes:
+            regex_match = re.search(regex, message, re.IGNORECASE)
+            if regex_match:
+                entities[entity] = regex_match.group(entity)
+                break
+    return entities
+
+
+class TestEntityExtractor(unittest.TestCase):
+    def test_same_entities_as_first_matching_pattern(self):
+        for intent in INTENTS:
+            extractor = EntityExtractor(intent['entities'])
+            for message in MESSAGES:
+                self.assertEqual(extractor.extract(message), reference_entities(message, intent), (intent['tag'],
+                                                                                                     message))
+
+    def test_merges_consecutive_patterns(self):
+        room = next(intent for intent in INTENTS if intent['tag'] == 'room')
+        searches = EntityExtractor(room['entities']).searches
+        self.assertEqual(len(searches['max_price']), 1)
+        # The second price pattern is an alternation and is searched alone
+        self.assertEqual([groups is None for _, groups, _ in searches['price']], [True, True, False])
+
+    def test_patterns_that_cannot_be_merged(self):
+        self.assertTrue(has_top_level_alternation(r'.*\s(?P<price>[0-9]+)€|$.*'))
+        self.assertFalse(has_top_level_alternation(r'.*(?P<room_type>home|hotel)[|].*'))
+        self.assertFalse(is_mergeable(r'(?P<price>[0-9]+)€', 'price'))
+        self.assertFalse(is_mergeable(r'.*(?P<price>[0-9]+)(?P=price)', 'price'))
+        self.assertTrue(is_mergeable(r'.*under\s*(?P<max_price>[0-9]+).*', 'max_price'))
+
+    def test_first_pattern_wins_over_earlier_position(self):
+        extractor = EntityExtractor({'price': [r'.*for\s*(?P<price>[0-9]+).*', r'.*around\s*(?P<price>[0-9]+).*']})
+        self.assertEqual(extractor.extract('around 10 for 20'), {'price': '20'})
+        self.assertEqual(extractor.extract('around 10'), {'price': '10'})
+
+
+if __name__ == '__main__':
+    unittest.main()
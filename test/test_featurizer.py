@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from services.nlp.featurizer import BagOfWords
+
+
+def nested_loop_bag(tokens, words):
+    bag = [0] * len(words)
+    for token in tokens:
+        for index, word in enumerate(words):
+            if word == token:
+                bag[index] = 1
+    return np.array(bag)
+
+
+class TestBagOfWords(unittest.TestCase):
+    def setUp(self):
+        self.words = sorted(['a', 'cheaper', 'hello', 'in', 'manhattan', 'room', 'star'])
+        self.featurizer = BagOfWords(self.words)
+        self.messages = [
+            ['hello'],
+            ['a', 'cheaper', 'room', 'in', 'manhattan', 'please'],
+            ['room', 'room', 'star'],
+            [],
+            ['unknown', 'words']
+        ]
+
+    def test_transform(self):
+        for tokens in self.messages:
+            np.testing.assert_array_equal(self.featurizer.transform(tokens), nested_loop_bag(tokens, self.words))
+
+    def test_indices(self):
+        np.testing.assert_array_equal(self.featurizer.indices(['star', 'room', 'room', 'please']), [5, 6])
+
+    def test_transform_batch(self):
+        bags = self.featurizer.transform_batch(self.messages)
+        self.assertEqual(bags.shape, (len(self.messages), len(self.words)))
+        for bag, tokens in zip(bags, self.messages):
+            np.testing.assert_array_equal(bag, nested_loop_bag(tokens, self.words))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'featurizer.json')
+            self.featurizer.save(path)
+            self.assertEqual(BagOfWords.load(path).words, self.words)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from services.recommendation.filter_index import USER_CRITERIA, FilterIndex, criteria_key
+from services.recommendation.user_profile import filterBy
+from test.fixtures import make_room_profiles
+
+
+class TestFilterIndex(unittest.TestCase):
+    def setUp(self):
+        self.room_profiles = make_room_profiles(n_rooms=500)
+        self.room_profiles.loc[7, 'price'] = np.nan
+        self.index = FilterIndex.from_frame(self.room_profiles, self.room_profiles.columns[6:])
+
+    def assertSameRooms(self, **criteria):
+        expected = filterBy(self.room_profiles, **criteria).id.tolist()
+        self.assertEqual(expected, self.index.ids[self.index.filter(**criteria)].tolist(), criteria)
+
+    def test_filter_matches_filter_by(self):
+        rooms_to_exclude = self.room_profiles.id.iloc[::7].tolist()
+        for criteria in [
+            {},
+            {'max_price': 100},
+            {'min_price': 100},
+            {'min_price': 150, 'max_price': 50},
+            {'price': 120},
+            {'price': 120, 'max_price': 200},
+            {'rating': 4},
+            {'neighbourhood_group': 'Manhattan'},
+            {'neighbourhood_group': 'Staten'},
+            {'neighbourhood_group': 'Harlem'},
+            {'room_type': 'hotel'},
+            {'min_nights': 10},
+            {'rooms_to_exclude': rooms_to_exclude},
+            {'min_price': 50, 'max_price': 200, 'rating': 2, 'neighbourhood_group': 'Brooklyn', 'min_nights': 5,
+             'rooms_to_exclude': rooms_to_exclude},
+        ]:
+            self.assertSameRooms(**criteria)
+
+    def test_criteria_key(self):
+        users = [
+            {'neighbourhood': 'Staten', 'minimum_nights': 2, 'max_price': 100, 'min_price': 150},
+            {'neighbourhood': 'Staten Island', 'minimum_nights': 2.0, 'min_price': 100.0, 'max_price': 150,
+             'price': 80, 'rating': 0},
+        ]
+        self.assertEqual(criteria_key(users[0]), criteria_key(users[1]))
+        for user in users + [{'price': 120, 'rating': 4, 'room_type': 'hotel'}, {}]:
+            criteria = {USER_CRITERIA[criterion]: value for criterion, value in user.items()}
+            np.testing.assert_array_equal(self.index.filter_criteria(criteria_key(user)),
+                                          self.index.filter(**criteria))
+
+    def test_filter_returns_positions(self):
+        positions = self.index.filter(max_price=100)
+        self.assertTrue(np.all(np.diff(positions) > 0))
+        self.assertTrue(np.all(self.room_profiles.price.to_numpy()[positions] <= 100))
+
+    def test_unknown_neighbourhood(self):
+        with self.assertRaises(KeyError):
+            self.index.filter(neighbourhood_group='Paris')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from aiohttp.test_utils import TestServer
+
+from services.scraping.cache import HTMLCache, OfflineMiss
+from services.scraping.crawler import Crawler
+from services.scraping.scrape import get_data, get_url
+from test.fixtures import make_stub_app, read_page
+
+
+class TestHTMLCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_cache(self, **kwargs):
+        cache = HTMLCache(self.directory.name, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def blobs(self):
+        return [os.path.join(directory, name)
+                for directory, _, names in os.walk(os.path.join(self.directory.name, 'objects')) for name in names]
+
+    def test_get_put(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get('https://a'))
+        cache.put('https://a', read_page(2595))
+        self.assertEqual(cache.get('https://a'), read_page(2595))
+        self.assertEqual(cache.stats['hits'], 1)
+        self.assertEqual(cache.stats['misses'], 1)
+        self.assertLess(cache.stats['size'], len(read_page(2595)))
+        # The pages are kept when the cache is opened again
+        self.assertEqual(HTMLCache(self.directory.name).get('https://a'), read_page(2595))
+
+    def test_content_addressed(self):
+        cache = self.make_cache()
+        cache.put('https://a', read_page(2595))
+        cache.put('https://b', read_page(2595))
+        self.assertEqual(len(self.blobs()), 1)
+        cache.put('https://a', read_page(5136))
+        cache.put('https://b', read_page(5136))
+        # The first page is not used by any url anymore
+        self.assertEqual(len(self.blobs()), 1)
+        self.assertEqual(cache.get('https://a'), read_page(5136))
+        self.assertEqual(cache.stats['size'], os.path.getsize(self.blobs()[0]))
+
+    def test_ttl(self):
+        cache = self.make_cache(ttl=60)
+        cache.put('https://a', 'page')
+        with cache.connection:
+            cache.connection.execute('UPDATE pages SET stored_at = stored_at - 120')
+        self.assertIsNone(cache.get('https://a'))
+        self.assertEqual(self.make_cache(ttl=60, offline=True).get('https://a'), 'page')
+
+    def test_lru_eviction(self):
+        pages = {url: f'<html>{url * 400}</html>' for url in 'abcd'}
+        cache = self.make_cache()
+        cache.put('a', pages['a'])
+        cache.max_size = cache.size * 3
+        for url in 'bc':
+            cache.put(url, pages[url])
+        cache.get('a')
+        cache.put('d', pages['d'])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([cache.get(url) for url in 'acd'], [pages[url] for url in 'acd'])
+        self.assertEqual(cache.stats['evictions'], 1)
+        self.assertEqual(len(self.blobs()), 3)
+        self.assertLessEqual(cache.size, cache.max_size)
+
+    def test_get_data(self):
+        cache = self.make_cache(offline=True)
+        cache.put(get_url(2595), read_page(2595))
+        with mock.patch('services.scraping.scrape.get_cache', return_value=cache):
+            self.assertEqual(get_data(room_id=2595), get_data(room_id=2595, response=read_page(2595)))
+            with self.assertRaises(OfflineMiss):
+                get_data(room_id=5136)
+
+    def test_crawler(self):
+        app, stats = make_stub_app()
+        cache = self.make_cache()
+        offline = self.make_cache(offline=True)
+        cache_threads = set()
+
+        def recorded(method):
+            def call(*args):
+                cache_threads.add(threading.get_ident())
+                return method(*args)
+            return call
+
+        cache.get, cache.put = recorded(cache.get), recorded(cache.put)
+
+        async def run():
+            async with TestServer(app) as server:
+                url_template = f'http://{server.host}:{server.port}/rooms/{{room_id}}'
+                titles = []
+                for crawler_cache in (cache, cache, offline):
+                    if crawler_cache is offline:
+                        with offline.connection:
+                            offline.connection.execute("DELETE FROM pages WHERE url LIKE '%5136'")
+                    crawler = Crawler(url_template=url_template, rate=None, retries=0, cache=crawler_cache)
+                    titles.append(sorted([data['title'] async for data in crawler.crawl([2595, 5136])]))
+                return titles
+
+        self.assertEqual(asyncio.run(run()), [['', 'Skylit Midtown Castle']] * 3)
+        # The pages are fetched once, and not at all offline
+        self.assertEqual(stats['hits'], {2595: 1, 5136: 1})
+        self.assertEqual(offline.stats['misses'], 1)
+        # The cache is not read nor written on the event loop
+        self.assertTrue(cache_threads)
+        self.assertNotIn(threading.get_ident(), cache_threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
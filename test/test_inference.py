@@ -0,0 +1,97 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from services.nlp.inference import NumpyIntentModel
+
+
+class FakeLayer:
+    def __init__(self, weights, activation=None):
+        self.weights = weights
+        self.activation = activation
+
+    def get_weights(self):
+        return self.weights
+
+    def get_config(self):
+        return {'activation': self.activation}
+
+
+class FakeModel:
+    def __init__(self, layers):
+        self.layers = layers
+
+
+def make_model(seed=0):
+    rng = np.random.default_rng(seed)
+    return FakeModel([
+        FakeLayer([rng.normal(size=(20, 8)).astype(np.float32), rng.normal(size=8).astype(np.float32)], 'relu'),
+        FakeLayer([]),
+        FakeLayer([rng.normal(size=(8, 4)).astype(np.float32), rng.normal(size=4).astype(np.float32)], 'relu'),
+        FakeLayer([]),
+        FakeLayer([rng.normal(size=(4, 3)).astype(np.float32), rng.normal(size=3).astype(np.float32)], 'softmax')
+    ])
+
+
+def reference_predict(model, x):
+    for layer in model.layers:
+        if layer.get_weights():
+            weight, bias = layer.get_weights()
+            x = x @ weight + bias
+            if layer.get_config()['activation'] == 'relu':
+                x = np.maximum(x, 0)
+            else:
+                x = np.exp(x) / np.exp(x).sum(axis=1, keepdims=True)
+    return x
+
+
+class TestNumpyIntentModel(unittest.TestCase):
+    def setUp(self):
+        self.keras_model = make_model()
+        self.x = np.random.default_rng(1).integers(0, 2, (10, 20))
+
+    def test_from_keras_skips_dropout(self):
+        model = NumpyIntentModel.from_keras(self.keras_model)
+        self.assertEqual(model.activations, ['relu', 'relu', 'softmax'])
+        self.assertEqual((model.n_inputs, model.n_outputs), (20, 3))
+
+    def test_predict(self):
+        model = NumpyIntentModel.from_keras(self.keras_model)
+        predictions = model.predict(self.x)
+        np.testing.assert_allclose(predictions, reference_predict(self.keras_model, self.x), rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(predictions.sum(axis=1), 1, rtol=1e-5)
+
+    def test_save_and_load(self):
+        model = NumpyIntentModel.from_keras(self.keras_model)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.npz')
+            model.save(path)
+            loaded = NumpyIntentModel.load(path)
+        self.assertEqual(loaded.activations, model.activations)
+        np.testing.assert_array_equal(loaded.predict(self.x), model.predict(self.x))
+
+    def test_unsupported_activation(self):
+        with self.assertRaises(ValueError):
+            NumpyIntentModel([np.ones((2, 2))], [np.zeros(2)], ['tanh'])
+
+    @unittest.skipUnless(importlib.util.find_spec('tensorflow'), 'tensorflow is not installed')
+    def test_matches_keras(self):
+        from tensorflow.keras.layers import Dense, Dropout
+        from tensorflow.keras.models import Sequential
+
+        keras_model = Sequential([
+            Dense(128, input_shape=(20,), activation='relu'),
+            Dropout(0.5),
+            Dense(64, activation='relu'),
+            Dropout(0.5),
+            Dense(5, activation='softmax')
+        ])
+        np.testing.assert_allclose(NumpyIntentModel.from_keras(keras_model).predict(self.x),
+                                   keras_model.predict(self.x), rtol=1e-5, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
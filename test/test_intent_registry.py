@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from services.nlp import Chatbot
+
+
+class TestIntentRegistry(unittest.TestCase):
+    def setUp(self):
+        self.chatbot = Chatbot()
+        self.chatbot.classes = sorted(intent['tag'] for intent in self.chatbot.intents['intents'])
+        self.chatbot._index_registry()
+
+    def test_registry(self):
+        for intent in self.chatbot.intents['intents']:
+            spec = self.chatbot.registry[intent['tag']]
+            self.assertEqual(spec.index, self.chatbot.classes.index(intent['tag']))
+            self.assertEqual(spec.responses, tuple(intent['responses']))
+            self.assertEqual(dict(spec.entities), intent['entities'])
+        self.assertEqual([spec.tag for spec in self.chatbot.class_intents], self.chatbot.classes)
+        with self.assertRaises(TypeError):
+            self.chatbot.registry['greeting'] = None
+
+    def test_intents_from_probabilities(self):
+        probabilities = np.zeros(len(self.chatbot.classes), dtype=np.float32)
+        greeting, room = self.chatbot.classes.index('greeting'), self.chatbot.classes.index('room')
+        probabilities[[greeting, room]] = [0.85, 0.9]
+        intents = self.chatbot._intents_from_probabilities(probabilities)
+        self.assertEqual([intent['tag'] for intent in intents], ['room', 'greeting'])
+        self.assertEqual(intents[0]['probability'], str(np.float32(0.9)))
+        self.assertEqual(intents[0]['entities'], self.chatbot.registry['room'].entities)
+
+    def test_get_response(self):
+        tag, response = self.chatbot._get_response([{'tag': 'greeting'}])
+        self.assertEqual(tag, 'greeting')
+        self.assertIn(response['title'], self.chatbot.registry['greeting'].responses)
+        self.assertEqual(self.chatbot._get_response([]), ('no_intent', self.chatbot.default_response))
+
+    def test_get_entities(self):
+        entities = self.chatbot._get_entities('a room in Brooklyn under 100', {'tag': 'room'})
+        self.assertEqual(entities['neighbourhood'], 'Brooklyn')
+        self.assertEqual(entities['max_price'], '100')
+
+
+if __name__ == '__main__':
+    unittest.main()
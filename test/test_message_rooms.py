@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+
+from services.utils import MessageRooms
+
+
+class TestMessageRooms(unittest.TestCase):
+    def setUp(self):
+        self.message_rooms = MessageRooms(maxsize=2)
+        self.fetched = []
+
+    def get_rooms(self, *message_ids):
+        async def run():
+            rooms = []
+            for message_id in message_ids:
+                async def fetch_room_id(message_id=message_id):
+                    self.fetched.append(message_id)
+                    return message_id * 10
+                rooms.append(await self.message_rooms.get(message_id, fetch_room_id))
+            return rooms
+        return asyncio.run(run())
+
+    def test_remembered_room_is_not_fetched(self):
+        self.message_rooms.remember(1, 2595)
+        self.assertEqual(self.get_rooms(1), [2595])
+        self.assertEqual(self.fetched, [])
+        self.assertEqual(self.message_rooms.stats['hits'], 1)
+        self.assertEqual(self.message_rooms.stats['misses'], 0)
+
+    def test_fetched_room_is_remembered(self):
+        self.assertEqual(self.get_rooms(2, 2), [20, 20])
+        self.assertEqual(self.fetched, [2])
+        self.assertEqual(self.message_rooms.stats['hits'], 1)
+        self.assertEqual(self.message_rooms.stats['misses'], 1)
+
+    def test_least_recent_message_is_evicted(self):
+        for message_id in range(1, 4):
+            self.message_rooms.remember(message_id, message_id * 10)
+        self.assertEqual(len(self.message_rooms), 2)
+        self.assertEqual(self.get_rooms(3, 2, 1), [30, 20, 10])
+        self.assertEqual(self.fetched, [1])
+        self.assertEqual(self.message_rooms.stats['evictions'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from services.nlp import Chatbot
+from services.nlp.featurizer import BagOfWords
+from services.nlp.inference import NumpyIntentModel
+
+
+class FakeTrainingChatbot(Chatbot):
+    def __init__(self):
+        super().__init__()
+        self.trainings = 0
+
+    def train_model(self):
+        self.trainings += 1
+        self.featurizer = BagOfWords(['hello', 'room'])
+        self.classes = ['greeting', 'room']
+        self._index_registry()
+        self.model = NumpyIntentModel([np.eye(2, dtype=np.float32)], [np.zeros(2, dtype=np.float32)], ['softmax'])
+
+
+class TestModelCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_load_or_train(self):
+        chatbot = FakeTrainingChatbot()
+        self.assertFalse(chatbot.load_or_train(self.directory.name))
+        loaded = FakeTrainingChatbot()
+        self.assertTrue(loaded.load_or_train(self.directory.name))
+        self.assertEqual(loaded.trainings, 0)
+        self.assertEqual(loaded.classes, chatbot.classes)
+        self.assertEqual(loaded.words, chatbot.words)
+        # Only the files of the model and its marker are left
+        self.assertEqual(len(os.listdir(self.directory.name)), 4)
+
+    def test_interrupted_save_is_not_loaded(self):
+        chatbot = FakeTrainingChatbot()
+        with mock.patch('services.nlp.chatbot.pickle.dump', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                chatbot.load_or_train(self.directory.name)
+        self.assertEqual(os.listdir(self.directory.name), [])
+        self.assertFalse(chatbot.load_or_train(self.directory.name))
+        self.assertEqual(chatbot.trainings, 2)
+
+    def test_artifact_version(self):
+        chatbot = FakeTrainingChatbot()
+        artifact_hash = chatbot.artifact_hash()
+        with mock.patch('services.nlp.chatbot.ARTIFACT_VERSION', 0):
+            self.assertNotEqual(chatbot.artifact_hash(), artifact_hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
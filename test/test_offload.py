@@ -0,0 +1,53 @@
+import asyncio
+import concurrent.futures
+import math
+import threading
+import unittest
+
+from services.utils.offload import Busy, Offloader
+
+
+class TestOffloader(unittest.TestCase):
+    def test_run(self):
+        offloader = Offloader(max_workers=2)
+        result = asyncio.run(offloader.run(math.factorial, 5))
+        self.assertEqual(result, 120)
+        self.assertEqual(offloader.metrics, {'pending': 0, 'completed': 1, 'rejected': 0, 'timeouts': 0})
+        offloader.shutdown()
+
+    def test_busy(self):
+        release = threading.Event()
+        offloader = Offloader(max_workers=1, max_pending=2)
+        futures = [offloader.submit(release.wait) for _ in range(2)]
+        with self.assertRaises(Busy):
+            offloader.call(math.factorial, 5)
+        release.set()
+        concurrent.futures.wait(futures)
+        self.assertEqual(offloader.call(math.factorial, 5), 120)
+        self.assertEqual(offloader.metrics['rejected'], 1)
+        offloader.shutdown()
+
+    def test_timeout(self):
+        release = threading.Event()
+        offloader = Offloader(max_workers=1, timeout=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(offloader.run(release.wait))
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            offloader.call(release.wait)
+        self.assertEqual(offloader.metrics['timeouts'], 2)
+        release.set()
+        offloader.shutdown()
+        self.assertEqual(offloader.metrics['pending'], 0)
+
+    def test_process_pool(self):
+        offloader = Offloader(kind='process', max_workers=1, initializer=math.factorial, initargs=(3,))
+        self.assertEqual(asyncio.run(offloader.run(math.factorial, 6)), 720)
+        offloader.shutdown()
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            Offloader(kind='fiber')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+
+from aiohttp.test_utils import TestServer
+
+from services.scraping.crawler import Crawler
+from services.scraping.pipeline import ScrapingPipeline, extract_chunk
+from services.scraping.scrape import get_data
+from test.fixtures import make_stub_app, read_page
+
+ROOM_IDS = [2595, 5136, 42] * 10
+
+
+def make_crawler(server, **kwargs):
+    return Crawler(url_template=f'http://{server.host}:{server.port}/rooms/{{room_id}}', rate=None, retries=0,
+                   **kwargs)
+
+
+class TestScrapingPipeline(unittest.TestCase):
+    def scrape(self, **kwargs):
+        app, _ = make_stub_app()
+
+        async def run():
+            async with TestServer(app) as server:
+                pipeline = ScrapingPipeline(make_crawler(server), **kwargs)
+                return [result async for result in pipeline.run(ROOM_IDS)], pipeline.metrics
+        return asyncio.run(run())
+
+    def test_extract_chunk(self):
+        results, duration = extract_chunk([(2595, read_page(2595)), (42, None)], 'stream')
+        self.assertEqual(results, [(get_data(room_id=2595, response=read_page(2595)), True),
+                                   (get_data(room_id=42, response=''), False)])
+        self.assertGreaterEqual(duration, 0)
+
+    def test_inline_and_processes(self):
+        expected = sorted((data['id'], data['title'], data['rating']) for data, _ in self.scrape()[0])
+        self.assertEqual(expected.count((2595, 'Skylit Midtown Castle', 4.7)), 10)
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results, metrics = self.scrape(workers=workers, chunk_size=4)
+                self.assertEqual(sorted((data['id'], data['title'], data['rating']) for data, _ in results), expected)
+                self.assertTrue(all(fetched for _, fetched in results))
+                self.assertEqual(metrics['fetch']['pages'], len(ROOM_IDS))
+                self.assertEqual(metrics['parse']['chunks'], 8)
+                self.assertGreaterEqual(metrics['parse']['seconds'], 0)
+                self.assertGreater(metrics['pages_per_second'], 0)
+
+    def test_backpressure(self):
+        app, stats = make_stub_app()
+
+        async def run():
+            async with TestServer(app) as server:
+                pipeline = ScrapingPipeline(make_crawler(server, concurrency=2), chunk_size=1, queue_size=1)
+                results = pipeline.run([2595] * 100)
+                await results.__anext__()
+                await asyncio.sleep(0.2)
+                fetched = stats['hits'][2595]
+                await results.aclose()
+                return fetched
+        # The stages stop when their queue is full, instead of fetching every page
+        self.assertLess(asyncio.run(run()), 10)
+
+    def test_failed_stage(self):
+        app, _ = make_stub_app()
+
+        async def run():
+            async with TestServer(app) as server:
+                crawler = make_crawler(server, backend='regex')
+                return [result async for result in ScrapingPipeline(crawler).run(ROOM_IDS)]
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
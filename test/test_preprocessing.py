@@ -0,0 +1,70 @@
+import unittest
+
+import nltk
+
+from services.nlp import Chatbot
+from services.nlp.preprocessing import SIMPLE_MESSAGE, tokenize
+
+
+def has_resource(path):
+    try:
+        nltk.data.find(path)
+        return True
+    except LookupError:
+        return False
+
+
+class CountingLemmatizer:
+    def __init__(self):
+        self.calls = 0
+
+    def lemmatize(self, word):
+        self.calls += 1
+        return word[:-1] if word.endswith('s') else word
+
+
+class TestTokenize(unittest.TestCase):
+    def test_simple_messages_are_split_on_spaces(self):
+        self.assertEqual(tokenize('a room in Manhattan with 4 stars'), ['a', 'room', 'in', 'Manhattan', 'with', '4',
+                                                                        'stars'])
+        self.assertIsNotNone(SIMPLE_MESSAGE.fullmatch('Hello'))
+        for message in ['Hello, how are you?', 'cheaper  than 100', ' room', 'room ', "I'm Bob", '100€', 'Café']:
+            self.assertIsNone(SIMPLE_MESSAGE.fullmatch(message))
+
+    @unittest.skipUnless(has_resource('tokenizers/punkt'), 'punkt is not installed')
+    def test_same_tokens_as_word_tokenize(self):
+        for message in ['a room in Manhattan with 4 stars', 'I cannot pay more than 100', 'gimme a room',
+                        'I wanna go to Brooklyn', 'Hello, how are you?', 'Hello']:
+            self.assertEqual(tokenize(message), nltk.word_tokenize(message))
+
+
+class TestChatbotCaches(unittest.TestCase):
+    def setUp(self):
+        self.chatbot = Chatbot(message_cache_size=2)
+        self.chatbot.lemmatizer = CountingLemmatizer()
+
+    def test_lemma_cache(self):
+        self.assertEqual(self.chatbot._clean_up_sentence('Rooms in Manhattan'), ['room', 'in', 'manhattan'])
+        self.assertEqual(self.chatbot._clean_up_sentence('cheaper rooms in Brooklyn'),
+                         ['cheaper', 'room', 'in', 'brooklyn'])
+        self.assertEqual(self.chatbot.lemmatizer.calls, 5)
+        self.assertEqual(self.chatbot.cache_stats['lemmas']['hits'], 2)
+
+    def test_message_cache(self):
+        tokens = self.chatbot._clean_up_sentence('room in Manhattan')
+        tokens.append('mutated')
+        self.assertEqual(self.chatbot._clean_up_sentence('room in Manhattan'), ['room', 'in', 'manhattan'])
+        self.assertEqual(self.chatbot.lemmatizer.calls, 3)
+        self.assertEqual(self.chatbot.cache_stats['messages']['hit_rate'], 0.5)
+
+    def test_message_cache_can_be_disabled(self):
+        chatbot = Chatbot(message_cache_size=0)
+        chatbot.lemmatizer = CountingLemmatizer()
+        chatbot._clean_up_sentence('room in Manhattan')
+        chatbot._clean_up_sentence('room in Manhattan')
+        self.assertEqual(len(chatbot.message_cache), 0)
+        self.assertEqual(chatbot.cache_stats['lemmas']['hits'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import abc
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from services.profiles import MemoryProfileStore, SQLiteProfileStore
+
+
+class ProfileStoreTests(abc.ABC):
+    @abc.abstractmethod
+    def make_store(self):
+        pass
+
+    def setUp(self):
+        self.store = self.make_store()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_update_and_rate(self):
+        self.assertIsNone(self.store.get(1))
+        self.store.update(1, {'name': 'Alice', 'max_price': 100})
+        self.store.rate(1, 42, 5)
+        self.store.update(1, {'max_price': None, 'neighbourhood': 'Queens'})
+        self.store.rate(1, 42, 3)
+        self.store.rate(1, 43, 4)
+        self.assertEqual(self.store.get(1), {'name': 'Alice', 'max_price': None, 'neighbourhood': 'Queens',
+                                             'ratings': {42: 3, 43: 4}})
+
+    def test_rating_creates_the_profile(self):
+        self.store.rate(2, 42, 1)
+        self.assertEqual(self.store.get(2), {'ratings': {42: 1}})
+
+    def test_get_returns_a_copy(self):
+        self.store.rate(1, 42, 5)
+        profile = self.store.get(1)
+        profile['ratings'][43] = 1
+        profile['name'] = 'Bob'
+        self.assertEqual(self.store.get(1), {'ratings': {42: 5}})
+
+    def test_delete(self):
+        self.store.update(1, {'name': 'Alice'})
+        self.store.rate(1, 42, 5)
+        self.store.delete(1)
+        self.assertIsNone(self.store.get(1))
+        self.store.rate(1, 43, 2)
+        self.assertEqual(self.store.get(1), {'ratings': {43: 2}})
+
+    def test_user_locks_are_dropped(self):
+        user_lock = self.store.lock(1)
+        self.assertIs(self.store.lock(1), user_lock)
+        del user_lock
+        self.assertEqual(len(self.store._user_locks), 0)
+
+    def test_concurrent_ratings(self):
+        def rate(user_id):
+            for room_id in range(200):
+                self.store.rate(user_id, room_id, room_id % 6)
+                with self.store.lock(user_id):
+                    profile = self.store.get(user_id)
+                    self.store.update(user_id, {'count': profile.get('count', 0) + 1})
+
+        threads = [threading.Thread(target=rate, args=(user_id,)) for user_id in range(4) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for user_id in range(4):
+            profile = self.store.get(user_id)
+            self.assertEqual(profile['count'], 400)
+            self.assertEqual(profile['ratings'], {room_id: room_id % 6 for room_id in range(200)})
+
+
+class TestMemoryProfileStore(ProfileStoreTests, unittest.TestCase):
+    def make_store(self):
+        return MemoryProfileStore()
+
+
+class TestSQLiteProfileStore(ProfileStoreTests, unittest.TestCase):
+    def make_store(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'profiles.db')
+        return SQLiteProfileStore(self.path, flush_interval=0.01, batch_size=50, cache_size=2)
+
+    def tearDown(self):
+        super().tearDown()
+        self.directory.cleanup()
+
+    def test_persists_across_restarts(self):
+        self.store.update(1, {'name': 'Alice'})
+        for room_id in range(10):
+            self.store.rate(1, room_id, 5)
+        self.store.close()
+        self.store = SQLiteProfileStore(self.path)
+        self.assertEqual(self.store.get(1), {'name': 'Alice', 'ratings': {room_id: 5 for room_id in range(10)}})
+
+    def test_evicted_profiles_keep_pending_changes(self):
+        for user_id in range(5):
+            self.store.update(user_id, {'name': str(user_id)})
+            self.store.rate(user_id, 1, user_id)
+        for user_id in range(5):
+            self.assertEqual(self.store.get(user_id), {'name': str(user_id), 'ratings': {1: user_id}})
+
+    def test_reads_do_not_flush(self):
+        self.store.close()
+        self.store = SQLiteProfileStore(self.path, flush_interval=60, cache_size=1)
+        self.store.update(1, {'name': 'Alice'})
+        self.store.rate(2, 42, 5)
+        with mock.patch.object(self.store, '_flush', wraps=self.store._flush) as flush:
+            self.assertIsNone(self.store.get(3))
+            self.assertEqual(self.store.get(2), {'ratings': {42: 5}})
+            # Evicted by the profile of user 2, then read again with its pending fields
+            self.assertEqual(self.store.get(1), {'name': 'Alice', 'ratings': {}})
+            flush.assert_not_called()
+
+    def test_failed_flush_keeps_pending_changes(self):
+        self.store.close()
+        self.store = SQLiteProfileStore(self.path, flush_interval=60)
+        self.store.update(1, {'name': 'Alice'})
+        self.store.rate(1, 42, 5)
+        with self.store._db_lock:
+            # A database without the tables fails every write
+            connection, self.store.connection = self.store.connection, sqlite3.connect(':memory:')
+            with self.assertRaises(sqlite3.OperationalError):
+                self.store._flush()
+        self.store.rate(1, 43, 4)
+        with self.assertLogs('services.profiles.store', 'ERROR') as logs:
+            self.store._wake.set()
+            deadline = time.monotonic() + 5
+            while not logs.output and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertTrue(self.store._flusher.is_alive())
+        with self.store._db_lock:
+            self.store.connection.close()
+            self.store.connection = connection
+        self.store.close()
+        self.store = SQLiteProfileStore(self.path)
+        self.assertEqual(self.store.get(1), {'name': 'Alice', 'ratings': {42: 5, 43: 4}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+import unittest
+
+import nltk
+
+from services.nlp.resources import NLTK_RESOURCES, ensure_resource
+
+
+class TestResources(unittest.TestCase):
+    def test_ensure_resource(self):
+        for name, path in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                with self.assertRaisesRegex(LookupError, 'python -m services.nlp.resources'):
+                    ensure_resource(name)
+            else:
+                ensure_resource(name)
+
+    def test_import_does_not_load_nltk_nor_tensorflow(self):
+        script = 'import sys, services.nlp; print(any(m in sys.modules for m in ("nltk", "tensorflow")))'
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+from aiohttp.test_utils import TestServer
+
+from services.scraping.crawler import Crawler
+from services.scraping.results import EMPTY, FAILED, OK, ResultStore, compact, enrich
+from test.fixtures import make_stub_app
+
+
+def room_data(room_id, title='Room', images=None, rating=4.5):
+    return {'id': room_id, 'url': '', 'title': title, 'images': images or [], 'rating': rating}
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ResultStore(os.path.join(self.directory.name, 'scraping.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_pending(self):
+        self.store.save([(room_data(1), OK), (room_data(2, title=''), EMPTY), (room_data(3, title=''), FAILED)])
+        self.store.save([(room_data(4), OK)], fetched_at=time.time() - 10 * 86400)
+        self.assertEqual(self.store.pending([5, 4, 3, 2, 1]), [5, 3])
+        self.assertEqual(self.store.pending(np.array([5, 4, 3, 2, 1]), refresh_days=7), [5, 4, 3])
+
+    def test_enrich_resumes(self):
+        app, stats = make_stub_app(failures={2595: 1})
+
+        async def run():
+            async with TestServer(app) as server:
+                crawler = Crawler(url_template=f'http://{server.host}:{server.port}/rooms/{{room_id}}', rate=None,
+                                  retries=0)
+                counts = [await enrich([2595, 5136, 42], self.store, crawler, checkpoint_size=2)]
+                hits = [dict(stats['hits'])]
+                # Only the failed room is fetched again, then the rooms older than refresh_days
+                counts.append(await enrich([2595, 5136, 42], self.store, crawler, checkpoint_size=2))
+                hits.append(dict(stats['hits']))
+                counts.append(await enrich([2595, 5136, 42], self.store, crawler, refresh_days=1))
+                counts.append(await enrich([2595, 5136], self.store, crawler, refresh_days=0))
+                return counts, hits
+
+        counts, hits = asyncio.run(run())
+        self.assertEqual(counts, [
+            {OK: 0, EMPTY: 2, FAILED: 1},
+            {OK: 1, EMPTY: 0, FAILED: 0},
+            {OK: 0, EMPTY: 0, FAILED: 0},
+            {OK: 1, EMPTY: 1, FAILED: 0},
+        ])
+        self.assertEqual(hits, [{2595: 1, 5136: 1, 42: 1}, {2595: 2, 5136: 1, 42: 1}])
+
+        frame = self.store.to_frame().set_index('id')
+        self.assertEqual(frame.loc[2595, 'status'], OK)
+        self.assertEqual(frame.loc[2595, 'title'], 'Skylit Midtown Castle')
+        self.assertEqual(frame.loc[2595, 'rating'], 4.7)
+        self.assertEqual(len(frame.loc[2595, 'images'].split(',')), 4)
+        self.assertEqual(frame.loc[42, 'status'], EMPTY)
+
+    def test_compact(self):
+        self.store.save([
+            (room_data(1, images=['a.jpg', 'b.jpg'], rating=4.5), OK),
+            (room_data(2, title=''), EMPTY),
+            (room_data(3, images=[], rating=3.0), OK),
+        ])
+        df = pd.DataFrame({'id': [1, 2, 3, 4], 'price': [10, 20, 30, 40],
+                           'rating': [None, 2.0, None, None], 'images': [None, 'c.jpg', 'd.jpg', None]})
+        merged = compact(df, self.store)
+        self.assertEqual(list(merged.columns), ['id', 'price', 'rating', 'images'])
+        self.assertEqual(merged['price'].tolist(), [10, 20, 30, 40])
+        self.assertEqual(merged['rating'].tolist()[:3], [4.5, 2.0, 3.0])
+        self.assertTrue(np.isnan(merged['rating'][3]))
+        self.assertEqual(merged['images'].tolist()[:3], ['a.jpg,b.jpg', 'c.jpg', 'd.jpg'])
+        self.assertTrue(pd.isna(merged['images'][3]))
+
+    def test_forbidden_rooms_are_fetched_again(self):
+        app, stats = make_stub_app(statuses={2595: 403})
+
+        async def run():
+            async with TestServer(app) as server:
+                crawler = Crawler(url_template=f'http://{server.host}:{server.port}/rooms/{{room_id}}', rate=None,
+                                  retries=0)
+                return await enrich([2595, 42], self.store, crawler)
+
+        self.assertEqual(asyncio.run(run()), {OK: 0, EMPTY: 1, FAILED: 1})
+        self.assertEqual(stats['hits'], {2595: 1, 42: 1})
+        # The 404 of a room that does not exist is a result, not the 403 of a blocked request
+        self.assertEqual(self.store.pending([2595, 42]), [2595])
+
+
+if __name__ == '__main__':
+    unittest.main()
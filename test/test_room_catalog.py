@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from data.room_catalog import RoomCatalog
+from data.room_store import RoomStore
+from test.fixtures import make_room_profiles
+
+
+class TestRoomCatalog(unittest.TestCase):
+    def setUp(self):
+        self.room_profiles = make_room_profiles()
+        self.catalog = RoomCatalog(RoomStore.from_frame(self.room_profiles))
+        self.room_ids = self.room_profiles.id.iloc[[12, 3, 150]].tolist()
+
+    def test_get_rows(self):
+        rows = self.catalog.get_rows(self.room_ids + [-1])
+        self.assertEqual(rows.id.tolist(), self.room_ids)
+        self.assertEqual(rows.name.tolist(), ['Room 12', 'Room 3', 'Room 150'])
+        self.assertEqual(list(rows.columns), list(self.room_profiles.columns[:6]))
+
+    def test_get_rows_with_features(self):
+        rows = self.catalog.get_rows(self.room_ids, with_features=True)
+        self.assertEqual(list(rows.columns), list(self.room_profiles.columns))
+        np.testing.assert_allclose(rows.iloc[:, 6:].to_numpy(),
+                                   self.room_profiles.iloc[[12, 3, 150], 6:].to_numpy(), rtol=1e-6)
+
+    def test_get_vector(self):
+        np.testing.assert_allclose(self.catalog.get_vector(self.room_ids[0]),
+                                   self.room_profiles.iloc[12, 6:].to_numpy(dtype=float), rtol=1e-6)
+        self.assertIsNone(self.catalog.get_vector(-1))
+
+    def test_position(self):
+        self.assertEqual(self.catalog.position(self.room_ids[1]), 3)
+        self.assertIsNone(self.catalog.position(-1))
+        self.assertNotIn(-1, self.catalog)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.room_store import RoomStore, build_store, load_store
+from test.fixtures import make_room_profiles
+
+
+class TestRoomStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, 'rooms.csv')
+        self.store_path = os.path.join(self.directory.name, 'rooms')
+        self.room_profiles = make_room_profiles()
+        self.room_profiles.loc[4, 'name'] = np.nan
+        self.room_profiles.loc[5, 'name'] = 'Café ☕'
+        self.room_profiles.to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_through_memory_map(self):
+        build_store(self.csv_path, self.store_path)
+        store = RoomStore.load(self.store_path)
+        self.assertIsInstance(store.features, np.memmap)
+        self.assertEqual(store.features.dtype, np.float32)
+        pd.testing.assert_frame_equal(
+            store.to_frame(),
+            pd.read_csv(self.csv_path).astype({column: np.float32 for column in store.feature_columns})
+        )
+
+    def test_fallback_on_csv(self):
+        store = load_store(self.store_path, self.csv_path)
+        self.assertNotIsInstance(store.features, np.memmap)
+        self.assertEqual(store.feature_columns, list(self.room_profiles.columns[6:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+
+from services.recommendation.scoring import ScoringEngine, SparseScoringEngine
+from services.recommendation.similarity import cosine_similarity
+from test.fixtures import make_room_profiles
+
+
+def reference_top_n(room_profiles, user_vector, n):
+    cols = room_profiles.columns[6:]
+    similarity_scores = []
+    for index, row in room_profiles.iterrows():
+        similarity_scores.append((row.id, cosine_similarity(user_vector, list(row[cols].values))))
+    similarity_scores = [x for x in similarity_scores if not np.isnan(x[1])]
+    return sorted(similarity_scores, key=lambda x: x[1], reverse=True)[:n]
+
+
+class TestScoringEngine(unittest.TestCase):
+    def setUp(self):
+        self.room_profiles = make_room_profiles()
+        self.features = self.room_profiles.columns[6:]
+        self.engine = ScoringEngine.from_frame(self.room_profiles, self.features)
+        self.user_vector = self.room_profiles[self.features].iloc[[5, 8, 13]].mean()
+
+    def assertSameRecommendations(self, expected, actual):
+        # Rooms with equal similarities may be swapped by float rounding, so compare the scores of each position and
+        # the score of each recommended room
+        self.assertEqual(len(expected), len(actual))
+        all_scores = dict(reference_top_n(self.room_profiles, self.user_vector, len(self.room_profiles)))
+        for (_, expected_score), (room_id, score) in zip(expected, actual):
+            self.assertAlmostEqual(expected_score, score, places=5)
+            self.assertAlmostEqual(all_scores[room_id], score, places=5)
+
+    def test_matrix_is_contiguous_float32(self):
+        self.assertEqual(self.engine.matrix.dtype, np.float32)
+        self.assertTrue(self.engine.matrix.flags['C_CONTIGUOUS'])
+
+    def test_top_n_matches_reference(self):
+        for n in (1, 5, 50, 500):
+            self.assertSameRecommendations(
+                reference_top_n(self.room_profiles, self.user_vector, n),
+                self.engine.top_n(self.user_vector, n=n)
+            )
+
+    def test_top_n_on_candidate_rows(self):
+        rows = np.flatnonzero(self.room_profiles.price.to_numpy() < 100)
+        self.assertSameRecommendations(
+            reference_top_n(self.room_profiles.iloc[rows], self.user_vector, 10),
+            self.engine.top_n(self.user_vector, rows=rows, n=10)
+        )
+
+    def test_rooms_without_norm_are_skipped(self):
+        room_ids = [room_id for room_id, _ in self.engine.top_n(self.user_vector, n=len(self.engine))]
+        self.assertEqual(len(room_ids), len(self.engine) - 3)
+        self.assertNotIn(self.room_profiles.id.iloc[0], room_ids)
+
+    def test_ties_keep_candidate_order(self):
+        features = np.zeros((6, 3))
+        features[:, 0] = [0.2, 0.9, 0.4, 0.0, 0.6, 0.8]
+        features[[1, 3], 1] = 0.5
+        engine = ScoringEngine(np.array([10, 11, 12, 13, 14, 15]), features)
+        self.assertEqual([room_id for room_id, _ in engine.top_n([1.0, 0.0, 0.0], n=3)], [10, 12, 14])
+        self.assertEqual([room_id for room_id, _ in engine.top_n([1.0, 0.0, 0.0], rows=[5, 4, 2], n=2)], [15, 14])
+
+    def test_vectors_must_have_the_same_length(self):
+        with self.assertRaises(ValueError):
+            self.engine.scores([1.0, 2.0])
+
+
+class TestSparseScoringEngine(unittest.TestCase):
+    def setUp(self):
+        self.room_profiles = make_room_profiles()
+        features = self.room_profiles[self.room_profiles.columns[6:]].to_numpy()
+        self.dense = ScoringEngine(self.room_profiles.id.to_numpy(), features)
+        self.sparse = SparseScoringEngine(self.room_profiles.id.to_numpy(), features)
+        self.user_vector = features[[5, 8, 13]].mean(axis=0)
+
+    def test_scores_match_dense_backend(self):
+        rows = np.arange(0, len(self.dense), 3)
+        np.testing.assert_allclose(self.sparse.scores(self.user_vector), self.dense.scores(self.user_vector),
+                                   rtol=1e-5)
+        np.testing.assert_allclose(self.sparse.scores(self.user_vector, rows),
+                                   self.dense.scores(self.user_vector, rows), rtol=1e-5)
+
+    def test_top_n_matches_dense_backend(self):
+        np.testing.assert_allclose(
+            [score for _, score in self.sparse.top_n(self.user_vector, n=20)],
+            [score for _, score in self.dense.top_n(self.user_vector, n=20)],
+            rtol=1e-5
+        )
+
+    def test_sparse_user_vector(self):
+        features = np.flatnonzero(self.user_vector)
+        np.testing.assert_allclose(self.sparse.scores((features, self.user_vector[features])),
+                                   self.sparse.scores(self.user_vector))
+
+    def test_get_vector(self):
+        np.testing.assert_array_equal(self.sparse.get_vector(42), self.dense.get_vector(42))
+
+    def test_memory(self):
+        self.assertLess(self.sparse.nbytes, self.dense.nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
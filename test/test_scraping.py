@@ -1,6 +1,9 @@
 import unittest
 
-from services.scraping.scrape import get_url, get_data
+from bs4 import FeatureNotFound
+
+from services.scraping.scrape import BACKENDS, get_url, get_data
+from test.fixtures import read_page
 
 
 class TestScraping(unittest.TestCase):
@@ -54,5 +57,32 @@ class TestScraping(unittest.TestCase):
         )
 
 
+class TestExtractionBackends(unittest.TestCase):
+    PAGES = [
+        read_page(2595),
+        read_page(5136),
+        '<h1>A &amp; B<br>c</h1><img src><img><img src="x"><span class="x _12si43g">4.<b>5</b> ·</span>',
+        '<span class="_12si43g"><span>3.9</span></span><h1>x<h1>y</h1>z</h1>',
+        '<H1>Up</H1><SPAN CLASS="_12si43g">4</SPAN><IMG SRC=A>',
+        '<h1>T</h1><span class=_12si43g>no rating</span><img src=a>',
+    ]
+
+    def test_identical_data(self):
+        expected = [get_data(room_id=2595, response=page) for page in self.PAGES]
+        self.assertEqual(expected[0]['title'], 'Skylit Midtown Castle')
+        self.assertEqual(expected[2]['images'], ['', None, 'x'])
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                try:
+                    data = [get_data(room_id=2595, response=page, backend=backend) for page in self.PAGES]
+                except FeatureNotFound:
+                    self.skipTest(f'{backend} is not installed')
+                self.assertEqual(data, expected)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_data(room_id=2595, response=read_page(2595), backend='regex')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from data.room_catalog import RoomCatalog
+from data.room_store import RoomStore
+from services.recommendation.user_vector import UserVector
+from test.fixtures import make_room_profiles
+
+
+def reference_user_vector(room_catalog, user_ratings):
+    room_ids = [room_id for room_id in user_ratings if room_id in room_catalog]
+    user_profile = room_catalog.get_rows(room_ids, with_features=True)
+    user_profile['rating'] = [user_ratings[room_id] for room_id in room_ids]
+    feature_columns = room_catalog.store.feature_columns
+    for column in feature_columns:
+        user_profile[column] = user_profile[column] * user_profile.rating / 5
+    return user_profile[feature_columns].mean().to_numpy()
+
+
+class TestUserVector(unittest.TestCase):
+    def setUp(self):
+        self.room_profiles = make_room_profiles()
+        self.catalog = RoomCatalog(RoomStore.from_frame(self.room_profiles))
+        self.room_ids = self.room_profiles.id.tolist()
+
+    def test_matches_user_profile_mean(self):
+        ratings = {self.room_ids[index]: index % 6 for index in range(10, 40)}
+        np.testing.assert_allclose(UserVector(self.catalog, ratings).vector,
+                                   reference_user_vector(self.catalog, ratings), rtol=1e-12, atol=1e-15)
+
+    def test_overwrite_rating(self):
+        user_vector = UserVector(self.catalog)
+        ratings = {}
+        for room_id, rating in [(self.room_ids[4], 5), (self.room_ids[9], 2), (self.room_ids[4], 1),
+                                (self.room_ids[12], 0), (self.room_ids[9], 4)]:
+            user_vector.rate(room_id, rating)
+            ratings[room_id] = rating
+            np.testing.assert_allclose(user_vector.vector, reference_user_vector(self.catalog, ratings),
+                                       rtol=1e-12, atol=1e-15)
+        self.assertEqual(len(user_vector), 3)
+
+    def test_unknown_rooms_are_ignored(self):
+        user_vector = UserVector(self.catalog, {-1: 5})
+        self.assertEqual(len(user_vector), 0)
+        self.assertIsNone(user_vector.vector)
+
+
+if __name__ == '__main__':
+    unittest.main()